@@ -23,15 +23,18 @@ Usage:
 
 """
 import os
-import io
-import re
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import filedialog, simpledialog, messagebox, Menu, Label, Button, Toplevel, Text, Scrollbar, END, Checkbutton, IntVar
-from mutagen.mp3 import MP3, HeaderNotFoundError
-from mutagen.id3 import ID3, APIC, error as ID3Error, ID3NoHeaderError
-from PIL import Image, ImageOps
-import pyperclip
-import json
+from tkinter import filedialog, simpledialog, messagebox, Menu, Label, Button, Toplevel, Text, Scrollbar, END, Checkbutton, IntVar, StringVar, ttk
+import mp3cover
+
+# Rows the album picker shows at once; only these are put into its list box
+ALBUM_PICKER_ROWS = 20
+
+# Pause in typing (in milliseconds) before the album picker filters its list
+ALBUM_SEARCH_DELAY_MS = 150
 
 class MP3AlbumCoverEmbedder:
     """
@@ -42,6 +45,14 @@ class MP3AlbumCoverEmbedder:
     DEFAULT_MP3_FOLDER: str - Default folder path for MP3 files.
     mp3_folder: str - Path to the selected MP3 folder.
     settings: dict - Dictionary to store user settings.
+    embed_workers: int - Number of MP3 files updated in parallel.
+    use_library_index: bool - Whether scans skip files that haven't changed since the last scan.
+    scan_subfolders: bool - Whether scans include Artist/Album subfolders of the music folder.
+    skip_unchanged: bool - Whether files that already have the cover are left untouched instead of rewritten.
+    embed_pipeline: bool - Whether files are embedded by the read/build/write pipeline instead of the thread pool.
+    covers_folder: str - Folder of <album>.jpg covers used by batch processing, or None.
+    device_profiles: dict - Device profiles from settings.json, keyed by name.
+    device_profile: mp3cover.DeviceProfile - Profile covers are made and tags written for.
     SETTINGS_FILE: str - Path to the settings JSON file.
     """
 
@@ -56,28 +67,42 @@ class MP3AlbumCoverEmbedder:
         self.root.title("MP3 Album Cover Embedder")
         self.DEFAULT_MP3_FOLDER = os.path.expanduser("~/Music")
         self.settings = {}
-        self.SETTINGS_FILE = os.path.join(os.path.dirname(__file__), "settings.json")
+        self.SETTINGS_FILE = mp3cover.settings.SETTINGS_FILE
         self.load_settings()
 
         self.mp3_folder = self.settings.get("mp3_folder", self.DEFAULT_MP3_FOLDER)
         self.embed_folder = self.settings.get("embed_folder", os.path.join(os.path.dirname(__file__), "MP3AlbumCoverEmbedderEmbeds"))
         self.auto_save_embed = self.settings.get("auto_save_embed", True)
         self.show_corrupt_warning = self.settings.get("show_corrupt_warning", True)
+        self.embed_workers = self.settings.get("embed_workers", min(4, os.cpu_count() or 1))
+        self.use_library_index = self.settings.get("use_library_index", True)
+        self.scan_subfolders = self.settings.get("scan_subfolders", True)
+        self.skip_unchanged = self.settings.get("skip_unchanged", True)
+        self.embed_pipeline = self.settings.get("embed_pipeline", False)
+        self.covers_folder = self.settings.get("covers_folder")
+        self.profile_runs = self.settings.get("profile_runs", False)
+        self.device_profiles = mp3cover.load_profiles(self.settings)
+        self.device_profile = mp3cover.active_profile(self.settings, self.device_profiles)
+        settings_changed = mp3cover.profiles.PROFILES_SETTING not in self.settings
+        if settings_changed:
+            # Write the built-in profiles out so they can be edited and copied in settings.json
+            mp3cover.save_profiles(self.settings, self.device_profiles)
 
         self.setup_ui()
 
+        if settings_changed:
+            # Creating or updating settings.json waits until the window has been drawn
+            self.root.after_idle(self.save_settings)
+
     def load_settings(self) -> None:
         """
         Loads settings from the JSON file.
 
         No Return
         """
+        # A missing settings.json is created by __init__ once the window is up, together with the built-in profiles
         if os.path.exists(self.SETTINGS_FILE):
-            with open(self.SETTINGS_FILE, 'r') as file:
-                self.settings = json.load(file)
-        else:
-            os.makedirs(os.path.dirname(self.SETTINGS_FILE), exist_ok=True)
-            self.save_settings()  # Ensure settings.json is created if it doesn't exist
+            self.settings = mp3cover.settings.load_settings(self.SETTINGS_FILE)
 
     def save_settings(self) -> None:
         """
@@ -85,8 +110,7 @@ class MP3AlbumCoverEmbedder:
 
         No Return
         """
-        with open(self.SETTINGS_FILE, 'w') as file:
-            json.dump(self.settings, file)
+        mp3cover.settings.save_settings(self.settings, self.SETTINGS_FILE)
 
     def setup_ui(self) -> None:
         """
@@ -100,6 +124,8 @@ class MP3AlbumCoverEmbedder:
         file_menu = Menu(menu)
         menu.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Change Music Folder", command=self.change_folder)
+        file_menu.add_command(label="Sync to Device...", command=self.start_device_sync)
+        file_menu.add_command(label="Undo Last Run", command=self.undo_last_run)
         file_menu.add_separator()
         file_menu.add_command(label="Quit", command=self.quit_program)
 
@@ -107,6 +133,15 @@ class MP3AlbumCoverEmbedder:
         menu.add_cascade(label="Settings", menu=settings_menu)
         settings_menu.add_command(label="Change Save Embed Path", command=self.change_embed_folder)
         settings_menu.add_checkbutton(label="Don't Auto-Save Embeds", command=self.toggle_auto_save_embed)
+        settings_menu.add_command(label="Change Covers Folder", command=self.change_covers_folder)
+        self.profile_runs_var = IntVar(value=int(self.profile_runs))
+        settings_menu.add_checkbutton(label="Profile Runs (cProfile)", variable=self.profile_runs_var, command=self.toggle_profile_runs)
+
+        profile_menu = Menu(settings_menu)
+        settings_menu.add_cascade(label="Device Profile", menu=profile_menu)
+        self.device_profile_var = StringVar(value=self.device_profile.name)
+        for profile_name in self.device_profiles:
+            profile_menu.add_radiobutton(label=profile_name, variable=self.device_profile_var, value=profile_name, command=self.change_device_profile)
 
         help_menu = Menu(menu)
         menu.add_cascade(label="Help", menu=help_menu)
@@ -119,6 +154,9 @@ class MP3AlbumCoverEmbedder:
         start_button = Button(self.root, text="Start Processing", command=self.start_processing)
         start_button.pack(pady=10)
 
+        batch_button = Button(self.root, text="Batch Process All Albums", command=self.start_batch_processing)
+        batch_button.pack(pady=10)
+
         quit_button = Button(self.root, text="Quit", command=self.quit_program)
         quit_button.pack(pady=10)
 
@@ -142,6 +180,40 @@ class MP3AlbumCoverEmbedder:
             self.settings['embed_folder'] = embed_folder
             self.save_settings()
 
+    def change_covers_folder(self) -> None:
+        """
+        Opens a dialog to select the folder of <album>.jpg covers used by batch processing and updates settings.
+
+        No Return
+        """
+        covers_folder = filedialog.askdirectory(title="Select Covers Folder", initialdir=self.covers_folder or os.path.expanduser("~/Pictures"))
+        if covers_folder:
+            self.covers_folder = covers_folder
+            self.settings['covers_folder'] = covers_folder
+            self.save_settings()
+
+    def change_device_profile(self) -> None:
+        """
+        Switches to the device profile picked in the Device Profile menu and updates settings.
+
+        No Return
+        """
+        self.device_profile = self.device_profiles[self.device_profile_var.get()]
+        self.settings[mp3cover.profiles.ACTIVE_PROFILE_SETTING] = self.device_profile.name
+        self.save_settings()
+
+    def ask_device_profile(self) -> mp3cover.DeviceProfile:
+        """
+        Asks whether to resize covers to the device profile's size.
+
+        Return mp3cover.DeviceProfile - The device profile, without resizing if the user pressed no.
+        """
+        if self.device_profile.size is None:
+            return self.device_profile
+        width, height = self.device_profile.size
+        resize = messagebox.askyesno("Resize Image", f"Resize cover images to {width}x{height} for the {self.device_profile.name} device profile?\n\n(Pressing no will save the original images to the files.)")
+        return self.device_profile if resize else self.device_profile.copy(size=None)
+
     def toggle_auto_save_embed(self) -> None:
         """
         Toggles the auto-save embed setting and updates settings.
@@ -152,73 +224,138 @@ class MP3AlbumCoverEmbedder:
         self.settings['auto_save_embed'] = self.auto_save_embed
         self.save_settings()
 
-    def get_albums(self, folder: str) -> dict:
+    def toggle_profile_runs(self) -> None:
+        """
+        Toggles profiling of embed runs with cProfile and updates settings.
+
+        No Return
+        """
+        self.profile_runs = not self.profile_runs
+        self.settings['profile_runs'] = self.profile_runs
+        self.save_settings()
+
+    def logged_task(self, mode: str, folder: str, task):
         """
-        Retrieves albums from the given MP3 folder.
+        Wraps a background task so the per-stage timings of its run are appended to the run log next to the embed folder.
 
         Parameters:
-        folder: str - Path to the folder containing MP3 files.
+        mode: str - Kind of run, stored with the timings ("album", "batch", "sync" or "undo").
+        folder: str - Path to the music folder, stored with the timings.
+        task: callable - The work to run; receives a stats keyword argument besides progress and cancel_event.
 
-        Return dict - A dictionary of albums with album names as keys and lists of MP3 files as values.
+        Return callable - Task for run_in_background.
         """
-        albums = {}
-        mp3_files = [f for f in os.listdir(folder) if f.lower().endswith('.mp3')]
+        log_path = mp3cover.run_log_path(self.embed_folder)
+        # Only the last profiled run is kept; open it with python -m pstats
+        profile_path = os.path.join(os.path.dirname(log_path), "last_run.pstats") if self.profile_runs else None
 
-        if not mp3_files:
-            return albums
+        def logged(**kwargs):
+            stats = mp3cover.RunStats()
+            with mp3cover.profiled(profile_path):
+                outcome = task(stats=stats, **kwargs)
+            mp3cover.write_run_log(log_path, stats, folder=folder, mode=mode, workers=self.embed_workers)
+            return outcome
+
+        return logged
+
+    def run_in_background(self, title: str, task, on_done) -> None:
+        """
+        Runs a long task on a background thread while showing a progress window with a Cancel button.
+
+        The task is called as task(progress=..., cancel_event=...) and reports progress through a
+        thread-safe queue, which is polled from the Tk main loop with root.after so the window never freezes.
+
+        Parameters:
+        title: str - Title of the progress window.
+        task: callable - The work to run; receives progress and cancel_event keyword arguments.
+        It reports progress as progress(done, total), where total is None if it isn't known.
+        on_done: callable - Called on the main thread with the task's return value and whether it was cancelled.
+
+        No Return
+        """
+        progress_queue = queue.Queue()
+        cancel_event = threading.Event()
+        start_time = time.monotonic()
+
+        progress_window = Toplevel(self.root)
+        progress_window.title(title)
+
+        status_label = Label(progress_window, text="Starting...", width=50)
+        status_label.pack(padx=10, pady=10)
+
+        progress_bar = ttk.Progressbar(progress_window, length=350, mode='determinate')
+        progress_bar.pack(padx=10, pady=5)
+
+        def on_cancel() -> None:
+            """
+            Handles the Cancel button click event, stopping the task after the current file.
+
+            No Return
+            """
+            cancel_event.set()
+            cancel_button.config(state=tk.DISABLED)
+            status_label.config(text="Cancelling after the current file...")
+
+        cancel_button = Button(progress_window, text="Cancel", command=on_cancel)
+        cancel_button.pack(pady=10)
+        progress_window.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        def report_progress(done: int, total: int) -> None:
+            progress_queue.put(("progress", done, total))
+
+        def worker() -> None:
+            try:
+                progress_queue.put(("done", task(progress=report_progress, cancel_event=cancel_event)))
+            except Exception as e:
+                progress_queue.put(("error", e))
 
-        corrupted_files = []
+        def poll_queue() -> None:
+            """
+            Applies the queued progress updates and finishes once the task is done.
 
-        for i, mp3_file in enumerate(mp3_files):
-            mp3_path = os.path.join(folder, mp3_file)
+            No Return
+            """
             try:
-                audio = MP3(mp3_path, ID3=ID3)
-                album = audio.get('TALB')
-                if album:
-                    album_name = album.text[0]
-                    if album_name not in albums:
-                        albums[album_name] = []
-                    albums[album_name].append(mp3_file)
-                else:
-                    # Create a default album name based on the filename
-                    default_album_name = os.path.splitext(mp3_file)[0]
-
-                    # Replace underscores and multiple spaces
-                    default_album_name = re.sub(r'[_]', ' ', default_album_name)
-                    default_album_name = re.sub(r' +', ' ', default_album_name)
-
-                    # Add space between word and number if not already present
-                    default_album_name = re.sub(r'(?<=\D)(?=\d)', ' ', default_album_name)
-
-                    # Ensure " - " stays as it is
-                    default_album_name = re.sub(r' - ', ' - ', default_album_name)
-
-                    # Title case while ensuring words with three or fewer characters and apostrophes are handled correctly
-                    words = default_album_name.split()
-                    if words[0] == "mom's":
-                        pass
-                    for j, word in enumerate(words):
-                        if '-' in word:
-                            subwords = word.split('-')
-                            subwords = [subwords[0].capitalize()] + [sw if len(sw) <= 3 else sw.capitalize() for sw in subwords[1:]]
-                            words[j] = '-'.join(subwords)
-                        elif len(word) <= 3 or (len(word) == 4 and "'" in word):
-                            words[j] = word.lower()
+                while True:
+                    message = progress_queue.get_nowait()
+                    if message[0] == "progress":
+                        done, total = message[1], message[2]
+                        elapsed = time.monotonic() - start_time
+                        rate = done / elapsed if elapsed > 0 else 0.0
+                        if total is None:
+                            # Streaming scans don't know the total up front
+                            progress_bar.config(mode='indeterminate')
+                            progress_bar.step()
+                            status_text = f"{done} files - {rate:.1f} files/sec"
+                        else:
+                            eta = int((total - done) / rate) if rate > 0 else 0
+                            progress_bar.config(mode='determinate', maximum=max(total, 1), value=done)
+                            status_text = f"{done}/{total} files - {rate:.1f} files/sec - ETA {eta // 60}:{eta % 60:02d}"
+                        if not cancel_event.is_set():
+                            status_label.config(text=status_text)
+                    else:
+                        progress_window.destroy()
+                        if message[0] == "error":
+                            messagebox.showerror("Error", f"Processing failed: {message[1]}")
                         else:
-                            words[j] = word.capitalize()
-                    default_album_name = ' '.join(words)
+                            on_done(message[1], cancel_event.is_set())
+                        return
+            except queue.Empty:
+                pass
+            self.root.after(100, poll_queue)
 
-                    if default_album_name not in albums:
-                        albums[default_album_name] = []
-                    albums[default_album_name].append(mp3_file)
-            except (ID3Error, IOError, HeaderNotFoundError, ID3NoHeaderError) as e:
-                corrupted_files.append(mp3_file)
-                mp3_files.pop(i)
+        threading.Thread(target=worker, daemon=True).start()
 
-        if corrupted_files and self.show_corrupt_warning:
-            self.show_corrupted_files_warning(corrupted_files)
+        # Center the progress_window on the screen
+        progress_window.update_idletasks()
+        width = progress_window.winfo_width()
+        height = progress_window.winfo_height()
+        x = (progress_window.winfo_screenwidth() // 2) - (width // 2)
+        y = (progress_window.winfo_screenheight() // 2) - (height // 2)
+        progress_window.geometry(f'{width}x{height}+{x}+{y}')
 
-        return albums
+        self.focus_window(progress_window)
+        self.root.after(100, poll_queue)
 
     def show_corrupted_files_warning(self, corrupted_files: list) -> None:
         """
@@ -268,7 +405,6 @@ class MP3AlbumCoverEmbedder:
                 self.settings['show_corrupt_warning'] = False
                 self.save_settings()
             warning_window.destroy()
-            self.check_for_music_files()
 
         Button(warning_window, text="OK", command=on_ok).pack(side=tk.RIGHT, padx=10, pady=10)
 
@@ -288,9 +424,49 @@ class MP3AlbumCoverEmbedder:
 
         No Return
         """
-        albums = self.get_albums(self.mp3_folder)
+        self.run_in_background("Scanning Music Folder", self.scan_task(self.mp3_folder), self.on_albums_scanned)
+
+    def scan_task(self, folder: str):
+        """
+        Builds the background task that scans the music folder with the current settings.
+
+        Parameters:
+        folder: str - Path to the music folder.
+
+        Return callable - Task for run_in_background returning (albums, corrupted_files).
+        """
+        use_library_index = self.use_library_index
+        recursive = self.scan_subfolders
+
+        def task(**kwargs) -> tuple:
+            if not use_library_index:
+                return mp3cover.get_albums(folder, recursive=recursive, **kwargs)
+            # The index is opened on the worker thread, since SQLite connections can't be shared between threads
+            with mp3cover.LibraryIndex(mp3cover.settings.INDEX_FILE) as index:
+                return mp3cover.get_albums(folder, index=index, recursive=recursive, **kwargs)
+
+        return task
+
+    def on_albums_scanned(self, scan: tuple, cancelled: bool) -> None:
+        """
+        Continues processing once the background folder scan has finished.
+
+        Parameters:
+        scan: tuple - (albums, corrupted_files) as returned by mp3cover.get_albums.
+        cancelled: bool - Whether the user cancelled the scan.
+
+        No Return
+        """
+        if cancelled:
+            return
+
+        albums, corrupted_files = scan
+        if corrupted_files and self.show_corrupt_warning:
+            self.show_corrupted_files_warning(corrupted_files)
+
         if not albums:
-            mp3_files = [f for f in os.listdir(self.mp3_folder) if f.lower().endswith('.mp3')]
+            # Every MP3 file that was found is either in an album or in corrupted_files
+            mp3_files = corrupted_files
             if not mp3_files:
                 messagebox.showwarning("No Music Files", "No music files found in the selected folder. Please select a folder with MP3 files.")
                 self.mp3_folder = self.select_folder()
@@ -299,22 +475,20 @@ class MP3AlbumCoverEmbedder:
                 self.check_for_music_files()
             else:
                 messagebox.showwarning("No Albums Found", "No albums found in the selected folder. Default albums will be created based on filenames.")
-                self.continue_processing({os.path.splitext(f)[0].replace('_', ' ').replace('-', ' ').title(): [f] for f in mp3_files})
+                self.continue_processing({mp3cover.fallback_album_name(f): [f] for f in mp3_files})
         else:
             self.continue_processing(albums)
 
-    def resize_cover_image(self, cover_image_path: str) -> Image:
+    def resize_cover_image(self, cover_image_path: str) -> "Image.Image":
         """
-        Resizes the cover image to 240x240 pixels.
+        Resizes the cover image to the device profile's size (240x240 pixels for the MECHEN 2.4 profile).
 
         Parameters:
         cover_image_path: str - Path to the cover image file.
 
         Return Image - The resized cover image.
         """
-        cover_image = Image.open(cover_image_path).convert("RGB")
-        cover_image = ImageOps.fit(cover_image, (240, 240), method=Image.LANCZOS, bleed=0.0, centering=(0.5, 0.5))
-        return cover_image
+        return mp3cover.resize_cover_image(cover_image_path, self.device_profile.size or mp3cover.MECHEN_COVER_SIZE)
 
     def show_details_window(self, updated_files: list, embed_example_path: str, album_name: str) -> None:
         """
@@ -362,6 +536,8 @@ class MP3AlbumCoverEmbedder:
 
             No Return
             """
+            import pyperclip  # Only loaded when something is copied
+
             pyperclip.copy(embed_example_path)
             messagebox.showinfo("Copied", "Embed example path copied to clipboard.")
 
@@ -389,81 +565,82 @@ class MP3AlbumCoverEmbedder:
 
         self.focus_window(details_window)
 
-    def embed_album_cover(self, folder: str, cover_image_path: str, album_name: str, mp3_files: list, option: int, resize: bool = False) -> None:
+    def embed_album_cover(self, folder: str, cover_image_path: str, albums: dict, option: int, profile: mp3cover.DeviceProfile = None) -> None:
         """
-        Embeds the cover image into the MP3 files' metadata.
+        Embeds the cover image into the MP3 files' metadata of one or more albums.
 
         Parameters:
         folder: str - Path to the folder containing MP3 files.
         cover_image_path: str - Path to the cover image file.
-        album_name: str - Name of the album.
-        mp3_files: list - List of MP3 files in the album.
+        albums: dict - Names of the selected albums mapped to their MP3 files.
         option: int - Option for saving the image (1: same name as MP3 file, 2: album name).
-        resize: bool - Whether to resize the cover image.
+        profile: mp3cover.DeviceProfile - Device profile to make the cover and write the tags for (defaults to the selected one).
 
         No Return
         """
-        folder = os.path.normpath(folder)  # Normalize the path
-
-        if self.auto_save_embed:
-            album_images_folder = os.path.join(self.embed_folder, f"{album_name.lower()}_image")
-            os.makedirs(album_images_folder, exist_ok=True)
-        else:
-            album_images_folder = ""
-
-        if resize:
-            cover_image = self.resize_cover_image(cover_image_path)
-        else:
-            cover_image = Image.open(cover_image_path).convert("RGB")
-
-        short_image_path = os.path.basename(cover_image_path).split(".")[0]
-
-        jpeg_image_path = os.path.join(album_images_folder, f"{short_image_path}_embed_example.jpg") if album_images_folder else None
-        if jpeg_image_path:
-            cover_image.save(jpeg_image_path, format='JPEG')
-
-        with io.BytesIO() as img_bytes:
-            cover_image.save(img_bytes, format='JPEG')
-            cover_data = img_bytes.getvalue()
-
-        updated_files = []
-
-        for mp3_file in mp3_files:
-            mp3_path = os.path.join(folder, mp3_file)
-            try:
-                audio = MP3(mp3_path, ID3=ID3)
-
-                if audio.tags is None:
-                    audio.add_tags()
-
-                if 'TALB' in audio:
-                    audio.tags['TALB'].encoding = 0
-                if 'TPE1' in audio:
-                    audio.tags['TPE1'].encoding = 0
-                if 'TIT2' in audio:
-                    audio.tags['TIT2'].encoding = 0
-
-                audio.tags.delall('APIC')
-
-                audio.tags.add(
-                    APIC(
-                        encoding=0,
-                        mime='image/jpeg',
-                        type=0,
-                        desc='',
-                        data=cover_data
-                    )
-                )
-
-                audio.save()
-                updated_files.append(mp3_path)
-
-            except (ID3Error, IOError, HeaderNotFoundError, ID3NoHeaderError) as e:
-                messagebox.showerror("Error", f"Error updating {mp3_file}: {e}")
+        embed_folder = self.embed_folder if self.auto_save_embed else None
+        profile = profile or self.device_profile
+        total = sum(len(mp3_files) for mp3_files in albums.values())
+
+        plan = mp3cover.run_plan([(folder, profile)], albums, cover_image_path)
+
+        def task(progress, cancel_event, stats) -> list:
+            cache = mp3cover.CoverCache(mp3cover.settings.COVER_CACHE_DIR)
+            results = []
+            done_before = 0
+            undo_log = mp3cover.UndoLog(mp3cover.undo_log_path(mp3cover.settings.UNDO_DIR))
+            # Running the same albums again after a crash or cancel continues from the last finished file
+            with mp3cover.journaled_run(mp3cover.settings.JOURNAL_FILE, plan, cancel_event) as journal, undo_log:
+                for album_name, mp3_files in albums.items():
+                    if cancel_event.is_set():
+                        break
+
+                    def album_progress(done: int, album_total: int, done_before=done_before) -> None:
+                        progress(done_before + done, total)
+
+                    results.append(mp3cover.embed_album_cover(folder, cover_image_path, album_name, mp3_files, embed_folder=embed_folder, workers=self.embed_workers,
+                                                              progress=album_progress, cancel_event=cancel_event, cache=cache, skip_unchanged=self.skip_unchanged,
+                                                              profile=profile, stats=stats, journal=journal, pipeline=self.embed_pipeline, undo=undo_log))
+                    done_before += len(mp3_files)
+            return results
+
+        title = f"Embedding Cover Into {next(iter(albums))}" if len(albums) == 1 else f"Embedding Cover Into {len(albums)} Albums"
+        self.run_in_background(title, self.logged_task("album", folder, task), self.on_embed_finished)
+
+    def on_embed_finished(self, results: list, cancelled: bool) -> None:
+        """
+        Reports the outcome of a background embed run.
 
-        self.show_processing_complete_window(updated_files, jpeg_image_path, album_name)
+        Parameters:
+        results: list - mp3cover.EmbedResult of each album that was started, with its updated files and errors.
+        cancelled: bool - Whether the user cancelled the run.
 
-    def show_processing_complete_window(self, updated_files: list, jpeg_image_path: str, album_name: str) -> None:
+        No Return
+        """
+        if not results:
+            return  # Cancelled before the first album started
+
+        errors = [error for result in results for error in result.errors]
+        if errors:
+            error_list = "\n".join(f"{mp3_file}: {message}" for mp3_file, message in errors[:50])
+            if len(errors) > 50:
+                error_list += f"\n...and {len(errors) - 50} more."
+            messagebox.showerror("Error", f"{len(errors)} file(s) could not be updated:\n\n{error_list}")
+
+        updated_files = [mp3_file for result in results for mp3_file in result.updated_files]
+        if cancelled:
+            album_names = ", ".join(f"'{result.album_name}'" for result in results)
+            messagebox.showinfo("Cancelled", f"Processing was cancelled. {len(updated_files)} file(s) from {album_names} were updated before stopping.\n\nEmbed the same cover into these albums again to continue where it stopped.")
+
+        # Files finished by an interrupted run of the same albums are left untouched like unchanged ones
+        skipped_count = sum(len(result.skipped_files) + len(result.resumed_files) for result in results)
+        rewritten_count = sum(len(result.rewritten_files) for result in results)
+        tag_sizes = [sizes for result in results for sizes in result.tag_sizes.values()]
+        tag_bytes = (sum(before for before, after in tag_sizes), sum(after for before, after in tag_sizes)) if tag_sizes else None
+        album_name = results[0].album_name if len(results) == 1 else f"{len(results)} albums"
+        self.show_processing_complete_window(updated_files, results[-1].embed_example_path, album_name, skipped_count, rewritten_count, len(results), tag_bytes)
+
+    def show_processing_complete_window(self, updated_files: list, jpeg_image_path: str, album_name: str, skipped_count: int = 0, rewritten_count: int = 0, album_count: int = 1, tag_bytes: tuple = None) -> None:
         """
         Displays a window indicating the processing is complete and provides options to view details.
 
@@ -471,13 +648,22 @@ class MP3AlbumCoverEmbedder:
         updated_files: list - List of updated MP3 files.
         jpeg_image_path: str - Path to the embed example image.
         album_name: str - Name of the album.
+        skipped_count: int - Number of files that already had the cover and were not rewritten.
+        rewritten_count: int - Number of written files that needed a full rewrite instead of an in-place tag update.
+        album_count: int - Number of albums the files belong to; album_name is only shown for a single album.
+        tag_bytes: tuple - Total size in bytes of the written files' tags (before, after), or None.
 
         No Return
         """
         complete_window = Toplevel(self.root)
         complete_window.title("Processing Complete")
 
-        Label(complete_window, text=f"All songs and the embed example image from the album '{album_name}' have been saved correctly.").pack(pady=10)
+        source = f"the album '{album_name}'" if album_count == 1 else f"the {album_count} selected albums"
+        Label(complete_window, text=f"All songs and the embed example image from {source} have been saved correctly.").pack(pady=10)
+        in_place_count = len(updated_files) - rewritten_count
+        Label(complete_window, text=f"{len(updated_files)} file(s) written ({in_place_count} updated in place, {rewritten_count} fully rewritten), {skipped_count} file(s) already had this cover and were skipped.").pack(pady=5)
+        if tag_bytes is not None:
+            Label(complete_window, text=f"Tags of the written files: {tag_bytes[0] / 1024:.1f} KB before, {tag_bytes[1] / 1024:.1f} KB after.").pack(pady=5)
         Button(complete_window, text="OK", command=complete_window.destroy).pack(side=tk.LEFT, padx=20, pady=10)
         Button(complete_window, text="Details...", command=lambda: [complete_window.destroy(), self.show_details_window(updated_files, jpeg_image_path, album_name)]).pack(side=tk.RIGHT, padx=20, pady=10)
 
@@ -556,100 +742,196 @@ class MP3AlbumCoverEmbedder:
 
         self.check_for_music_files()
 
-    def continue_processing(self, albums: dict, cover_image_path: str = None) -> None:
+    def start_batch_processing(self) -> None:
         """
-        Continues the process of embedding album covers into MP3 files after checking for music files.
+        Scans the music folder and embeds a cover into every album in one pass, finding each cover automatically.
+
+        No Return
+        """
+        if not self.mp3_folder:
+            messagebox.showerror("Error", "No music folder selected.")
+            return
+
+        profile = self.ask_device_profile()
+
+        folder = self.mp3_folder
+        scan = self.scan_task(folder)
+        covers_folder = self.covers_folder
+        embed_folder = self.embed_folder if self.auto_save_embed else None
+
+        def task(progress, cancel_event, stats) -> mp3cover.BatchResult:
+            albums, corrupted_files = scan(progress=progress, cancel_event=cancel_event, stats=stats)
+            cache = mp3cover.CoverCache(mp3cover.settings.COVER_CACHE_DIR)
+            plan = mp3cover.run_plan([(folder, profile)], albums)
+            undo_log = mp3cover.UndoLog(mp3cover.undo_log_path(mp3cover.settings.UNDO_DIR))
+            with mp3cover.journaled_run(mp3cover.settings.JOURNAL_FILE, plan, cancel_event) as journal, undo_log:
+                return mp3cover.embed_library(folder, albums, covers_folder=covers_folder, embed_folder=embed_folder, workers=self.embed_workers,
+                                              progress=progress, cancel_event=cancel_event, cache=cache, skip_unchanged=self.skip_unchanged,
+                                              profile=profile, stats=stats, journal=journal, pipeline=self.embed_pipeline, undo=undo_log)
+
+        self.run_in_background("Batch Processing All Albums", self.logged_task("batch", folder, task), self.on_batch_finished)
+
+    def on_batch_finished(self, batch: mp3cover.BatchResult, cancelled: bool) -> None:
+        """
+        Reports the outcome of a batch run.
 
         Parameters:
-        albums: dict - Dictionary of albums with album names as keys and lists of MP3 files as values.
-        cover_image_path: str - Path to the selected cover image file (optional).
+        batch: mp3cover.BatchResult - The per-album results and the albums without a cover.
+        cancelled: bool - Whether the user cancelled the run.
 
         No Return
         """
-        self.albums = albums  # Save the albums state for navigation
-        if cover_image_path is None:
-            self.select_image_window()
+        written = sum(len(result.updated_files) for result in batch.results)
+        skipped = sum(len(result.skipped_files) for result in batch.results)
+        failed = sum(len(result.errors) for result in batch.results)
+        resumed = sum(len(result.resumed_files) for result in batch.results)
+
+        summary = (
+            f"{len(batch.results)} album(s) processed with {batch.covers_encoded} distinct cover(s).\n"
+            f"{written} file(s) written, {skipped} already up to date, {failed} failed."
+        )
+        if resumed:
+            summary += f"\n{resumed} file(s) were already done by the interrupted run."
+        if cancelled:
+            summary = "Processing was cancelled. Run Batch Processing again to continue where it stopped.\n\n" + summary
+        if batch.missing_covers:
+            summary += "\n\nNo cover was found for:\n" + "\n".join(batch.missing_covers[:20])
+            if len(batch.missing_covers) > 20:
+                summary += f"\n...and {len(batch.missing_covers) - 20} more."
+
+        messagebox.showinfo("Batch Processing Complete", summary)
+
+    def undo_last_run(self) -> None:
+        """
+        Puts back the original tags of the files changed by the last embed or batch run.
+
+        No Return
+        """
+        undo_logs = mp3cover.list_undo_logs(mp3cover.settings.UNDO_DIR)
+        if not undo_logs:
+            messagebox.showinfo("Undo Last Run", "There is no run to undo.")
+            return
+        try:
+            snapshots = mp3cover.read_undo_log(undo_logs[0])
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"The undo log could not be read: {e}")
+            return
+        if not messagebox.askyesno("Undo Last Run", f"Put back the original tags of the {len(snapshots)} file(s) changed by the last run?"):
             return
 
-        album_keys = list(albums.keys())
-        if len(album_keys) >= 15:
-            album_window = Toplevel(self.root)
-            album_window.title("Select Album")
+        def task(progress, cancel_event, stats) -> mp3cover.UndoResult:
+            result = mp3cover.restore_tags(snapshots, self.embed_workers, progress, cancel_event, stats)
+            if not result.errors and not result.cancelled:
+                # Undone runs can't be undone again, so the next Undo goes back one more run
+                os.remove(undo_logs[0])
+            return result
 
-            Label(album_window, text="Select an album by entering the number:").pack(pady=10)
+        self.run_in_background("Undoing Last Run", self.logged_task("undo", self.mp3_folder, task), self.on_undo_finished)
 
-            text_frame = tk.Frame(album_window)
-            text_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    def on_undo_finished(self, result: mp3cover.UndoResult, cancelled: bool) -> None:
+        """
+        Reports the outcome of undoing a run.
 
-            text_box = Text(text_frame, wrap=tk.WORD, height=15)
-            text_box.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        Parameters:
+        result: mp3cover.UndoResult - The restored, unchanged and failed files.
+        cancelled: bool - Whether the user cancelled the undo.
 
-            scrollbar = Scrollbar(text_frame, command=text_box.yview)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            text_box.config(yscrollcommand=scrollbar.set)
+        No Return
+        """
+        summary = f"{len(result.restored)} file(s) restored, {len(result.unchanged)} already had their original tags, {len(result.errors)} failed."
+        if cancelled:
+            summary = "Undo was cancelled. Undo the last run again to restore the rest.\n\n" + summary
+        if result.errors:
+            summary += "\n\nCould not restore:\n" + "\n".join(f"{mp3_file}: {message}" for mp3_file, message in result.errors[:10])
+            if len(result.errors) > 10:
+                summary += f"\n...and {len(result.errors) - 10} more."
 
-            album_str = "\n".join(f"{i+1}. {album}" for i, album in enumerate(album_keys))
-            text_box.insert(END, album_str)
-            text_box.config(state=tk.DISABLED)
+        messagebox.showinfo("Undo Complete", summary)
 
-            def on_back() -> None:
-                """
-                Handles the Back button click event.
+    def start_device_sync(self) -> None:
+        """
+        Copies the music folder to a player's folder with every album's cover embedded, leaving the music folder unchanged.
 
-                No Return
-                """
-                album_window.destroy()
-                self.select_image_window()
+        No Return
+        """
+        if not self.mp3_folder:
+            messagebox.showerror("Error", "No music folder selected.")
+            return
 
-            back_button = Button(album_window, text="Back", command=on_back)
-            back_button.pack(side=tk.LEFT, padx=10, pady=10)
+        sync_folder = filedialog.askdirectory(title="Select the Player's Music Folder")
+        if not sync_folder:
+            return  # User cancelled folder selection
+        music_folder = os.path.normcase(os.path.abspath(self.mp3_folder))
+        try:
+            inside_folder = os.path.commonpath([music_folder, os.path.normcase(os.path.abspath(sync_folder))]) == music_folder
+        except ValueError:
+            # On different drives
+            inside_folder = False
+        if inside_folder:
+            messagebox.showerror("Error", "The player's folder can't be the music folder or inside it.")
+            return
 
-            def on_cancel() -> None:
-                """
-                Handles the Cancel button click event.
+        profile = self.ask_device_profile()
 
-                No Return
-                """
-                album_window.destroy()
-                self.select_image_window()
+        folder = self.mp3_folder
+        scan = self.scan_task(folder)
+        covers_folder = self.covers_folder
 
-            cancel_button = Button(album_window, text="Cancel", command=on_cancel)
-            cancel_button.pack(side=tk.RIGHT, padx=10, pady=10)
+        def task(progress, cancel_event, stats) -> mp3cover.SyncResult:
+            albums, corrupted_files = scan(progress=progress, cancel_event=cancel_event, stats=stats)
+            cache = mp3cover.CoverCache(mp3cover.settings.COVER_CACHE_DIR)
+            return mp3cover.sync_library(folder, sync_folder, albums, profile, covers_folder, corrupted_files, self.embed_workers,
+                                         cache, progress, cancel_event, stats)
 
-            valid_selection = False
-            while not valid_selection:
-                album_index = simpledialog.askinteger("Select Album", "Enter the album number:", parent=album_window)
+        self.run_in_background("Syncing to Device", self.logged_task("sync", folder, task), self.on_sync_finished)
 
-                if album_index is not None and (1 <= album_index <= len(albums)):
-                    valid_selection = True
-                else:
-                    messagebox.showwarning("Invalid Selection", "You entered an invalid selection. Please try again.")
+    def on_sync_finished(self, result: mp3cover.SyncResult, cancelled: bool) -> None:
+        """
+        Reports the outcome of a device sync.
 
-            album_window.destroy()
-        else:
-            album_str = "\n".join(f"{i+1}. {album}" for i, album in enumerate(albums.keys()))
+        Parameters:
+        result: mp3cover.SyncResult - The written, copied, skipped and failed files.
+        cancelled: bool - Whether the user cancelled the sync.
 
-            valid_selection = False
-            while not valid_selection:
-                album_index = simpledialog.askinteger("Select Album", f"Select an album by entering the number:\n{album_str}")
-                if isinstance(album_index, int) and album_index > len(albums):
-                    messagebox.showwarning("Invalid Option", "You entered an invalid number. Please try again.")
-                    continue
-                elif album_index is not None and (1 <= album_index <= len(albums)):
-                    valid_selection = True
-                else:
-                    response = self.custom_warning_box("Invalid Selection", "You cancelled the album selection. What would you like to do?")
-                    if response == 'try':
-                        continue
-                    elif response == 'back':
-                        self.select_image_window()
-                        return
-                    elif response == 'quit':
-                        self.root.destroy()
-                        return
+        No Return
+        """
+        summary = (
+            f"{len(result.written)} file(s) written with their cover, {len(result.copied)} copied unchanged, "
+            f"{len(result.skipped)} already up to date, {len(result.errors)} failed.\n"
+            f"{result.bytes_written / 1e6:.1f} MB written to {result.target}."
+        )
+        if cancelled:
+            summary = "Syncing was cancelled. Sync again to continue where it stopped.\n\n" + summary
+        if result.missing_covers:
+            summary += "\n\nNo cover was found for (copied without one):\n" + "\n".join(result.missing_covers[:20])
+            if len(result.missing_covers) > 20:
+                summary += f"\n...and {len(result.missing_covers) - 20} more."
+        if result.errors:
+            summary += "\n\nCould not sync:\n" + "\n".join(f"{mp3_file}: {message}" for mp3_file, message in result.errors[:10])
+            if len(result.errors) > 10:
+                summary += f"\n...and {len(result.errors) - 10} more."
+
+        messagebox.showinfo("Sync Complete", summary)
+
+    def continue_processing(self, albums: dict, cover_image_path: str = None) -> None:
+        """
+        Continues the process of embedding album covers into MP3 files after checking for music files.
+
+        Parameters:
+        albums: dict - Dictionary of albums with album names as keys and lists of MP3 files as values.
+        cover_image_path: str - Path to the selected cover image file (optional).
 
-        selected_album = album_keys[album_index - 1]
-        mp3_files = albums[selected_album]
+        No Return
+        """
+        self.albums = albums  # Save the albums state for navigation
+        if cover_image_path is None:
+            self.select_image_window()
+            return
+
+        selected_albums = self.select_albums(list(albums))
+        if selected_albums is None:
+            self.select_image_window()
+            return
 
         valid_option = False
         while not valid_option:
@@ -663,13 +945,191 @@ class MP3AlbumCoverEmbedder:
                     continue
                 elif action == 'back':
                     self.continue_processing(albums, cover_image_path)
+                    return
                 elif action == 'quit':
                     self.root.destroy()
                     return None
 
-        resize = messagebox.askyesno("Resize Image", "Resize cover image to 240x240 for MECHEN 2.4\" screen MP3/MP4 player?\n\n(Pressing no will save the original image to the file.)")
+        profile = self.ask_device_profile()
+
+        self.embed_album_cover(self.mp3_folder, cover_image_path, {album_name: albums[album_name] for album_name in selected_albums}, option, profile)
+
+    def select_albums(self, album_names: list) -> list:
+        """
+        Shows a searchable list of the albums and lets the user pick one or more of them.
+
+        Typing in the search box filters the list (see mp3cover.AlbumSearchIndex). Clicking an album selects or
+        deselects it, and Shift+click selects every album up to the last one clicked. Only the rows in view are
+        put into the list box, so the window stays responsive with tens of thousands of albums.
+
+        Parameters:
+        album_names: list - Names of the albums to choose from.
+
+        Return list - The selected album names in list order, or None if the user went back.
+        """
+        index = mp3cover.AlbumSearchIndex(album_names)
+        rows = ALBUM_PICKER_ROWS
+        # matches: positions in index.names shown by the current search; offset: first match in view;
+        # anchor: the last album clicked, for Shift+click; pending: the scheduled search, if any
+        view = {"matches": index.search(""), "offset": 0, "anchor": None, "pending": None}
+        selected = set()
+        chosen = []
+
+        picker_window = Toplevel(self.root)
+        picker_window.title("Select Albums")
+
+        Label(picker_window, text="Type to search. Click albums to select them, Shift+click to select a range:").pack(padx=10, pady=10)
+
+        search_var = StringVar()
+        search_entry = tk.Entry(picker_window, textvariable=search_var, width=60)
+        search_entry.pack(padx=10, fill=tk.X)
+
+        list_frame = tk.Frame(picker_window)
+        list_frame.pack(padx=10, pady=10, fill=tk.X)
+
+        listbox = tk.Listbox(list_frame, height=rows, width=60, selectmode=tk.MULTIPLE, activestyle=tk.NONE, exportselection=False, takefocus=0)
+        listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-        self.embed_album_cover(self.mp3_folder, cover_image_path, selected_album, mp3_files, option, resize)
+        scrollbar = Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        status_label = Label(picker_window, text="")
+        status_label.pack(padx=10)
+
+        def render() -> None:
+            """
+            Fills the list box with the matching albums in view and marks the selected ones.
+
+            No Return
+            """
+            matches = view["matches"]
+            view["offset"] = max(0, min(view["offset"], len(matches) - rows))
+            visible = matches[view["offset"]:view["offset"] + rows]
+            listbox.delete(0, END)
+            listbox.insert(END, *(index.names[i] for i in visible))
+            for row, i in enumerate(visible):
+                if i in selected:
+                    listbox.selection_set(row)
+            if matches:
+                scrollbar.set(view["offset"] / len(matches), (view["offset"] + len(visible)) / len(matches))
+            else:
+                scrollbar.set(0, 1)
+            status_label.config(text=f"{len(matches)} of {len(index)} albums shown, {len(selected)} selected")
+
+        def scroll_to(offset: int) -> None:
+            view["offset"] = offset
+            render()
+
+        def on_scrollbar(action: str, amount: str, unit: str = None) -> None:
+            """
+            Moves the view when the scrollbar is dragged or its arrows are clicked.
+
+            No Return
+            """
+            if action == "moveto":
+                scroll_to(int(float(amount) * len(view["matches"])))
+            else:
+                scroll_to(view["offset"] + int(amount) * (rows if unit == "pages" else 1))
+
+        def on_mouse_wheel(event: tk.Event) -> str:
+            # Windows and macOS report a wheel delta, X11 reports buttons 4 and 5
+            scroll_to(view["offset"] + (-3 if event.num == 4 or event.delta > 0 else 3))
+            return "break"
+
+        def on_click(event: tk.Event) -> str:
+            """
+            Selects or deselects the clicked album, or the range from the last clicked album with Shift held.
+
+            Return str - "break", so the list box doesn't change the selection itself.
+            """
+            matches = view["matches"]
+            position = view["offset"] + listbox.nearest(event.y)
+            if position >= len(matches):
+                return "break"
+            clicked = matches[position]
+            shift_held = event.state & 0x0001
+            if shift_held and view["anchor"] in selected and view["anchor"] in matches:
+                anchor_position = matches.index(view["anchor"])
+                selected.update(matches[min(anchor_position, position):max(anchor_position, position) + 1])
+            elif clicked in selected:
+                selected.discard(clicked)
+            else:
+                selected.add(clicked)
+            view["anchor"] = clicked
+            render()
+            return "break"
+
+        scrollbar.config(command=on_scrollbar)
+        listbox.bind("<Button-1>", on_click)
+        listbox.bind("<B1-Motion>", lambda event: "break")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            listbox.bind(sequence, on_mouse_wheel)
+
+        def apply_search() -> None:
+            view["pending"] = None
+            view["matches"] = index.search(search_var.get())
+            view["offset"] = 0
+            render()
+
+        def on_search_changed(*args) -> None:
+            # Wait for a pause in typing instead of searching on every key
+            if view["pending"] is not None:
+                picker_window.after_cancel(view["pending"])
+            view["pending"] = picker_window.after(ALBUM_SEARCH_DELAY_MS, apply_search)
+
+        search_var.trace_add("write", on_search_changed)
+
+        def close() -> None:
+            if view["pending"] is not None:
+                picker_window.after_cancel(view["pending"])
+            picker_window.destroy()
+
+        def on_select_shown() -> None:
+            selected.update(view["matches"])
+            render()
+
+        def on_clear() -> None:
+            selected.clear()
+            render()
+
+        def on_ok(event: tk.Event = None) -> None:
+            """
+            Handles the Embed Cover button and the Enter key; with nothing selected, Enter picks the only matching album.
+
+            No Return
+            """
+            if view["pending"] is not None:
+                picker_window.after_cancel(view["pending"])
+                apply_search()
+            if not selected and event is not None and len(view["matches"]) == 1:
+                selected.add(view["matches"][0])
+            if not selected:
+                messagebox.showwarning("No Album Selected", "Select at least one album.", parent=picker_window)
+                return
+            chosen.extend(index.names[i] for i in sorted(selected))
+            close()
+
+        Button(picker_window, text="< Back", command=close).pack(side=tk.LEFT, padx=10, pady=10)
+        Button(picker_window, text="Embed Cover", command=on_ok).pack(side=tk.RIGHT, padx=10, pady=10)
+        Button(picker_window, text="Clear Selection", command=on_clear).pack(side=tk.RIGHT, padx=10, pady=10)
+        Button(picker_window, text="Select All Shown", command=on_select_shown).pack(side=tk.RIGHT, padx=10, pady=10)
+        search_entry.bind("<Return>", on_ok)
+        picker_window.protocol("WM_DELETE_WINDOW", close)
+
+        render()
+
+        # Center the picker_window on the screen
+        picker_window.update_idletasks()
+        width = picker_window.winfo_width()
+        height = picker_window.winfo_height()
+        x = (picker_window.winfo_screenwidth() // 2) - (width // 2)
+        y = (picker_window.winfo_screenheight() // 2) - (height // 2)
+        picker_window.geometry(f'{width}x{height}+{x}+{y}')
+
+        self.focus_window(picker_window)
+        search_entry.focus_set()
+        self.root.wait_window(picker_window)
+        return chosen or None
 
     def custom_warning_box(self, title: str, message: str, filedialog: bool = False) -> str:
         """
@@ -751,20 +1211,34 @@ class MP3AlbumCoverEmbedder:
             "containing your MP3 files. By default, it uses the path to your Music folder.\n\n"
             "2. Start Processing: Click 'Start Processing' to begin the process of embedding album covers. "
             "The program will analyze the selected folder and list all albums found.\n\n"
-            "3. Select Album: When prompted, select the album you want to update by entering the corresponding number.\n\n"
+            "3. Select Albums: When prompted, type part of an album's name to filter the list, then click the album you want "
+            "to update. Click more albums (or Shift+click for a range) to embed the same cover into all of them.\n\n"
             "4. Select Cover Image: Choose the cover image file you want to embed into the MP3 files.\n\n"
             "5. Choose Save Option: You will be prompted to choose how to save the image: "
             "1) Save with the same name as the MP3 file or 2) Save with the album name.\n\n"
-            "6. Resize Image: Choose whether to resize the cover image to 240x240 pixels for compatibility with the MECHEN 2.4\" screen MP3/MP4 player.\n\n"
+            "6. Resize Image: Choose whether to resize the cover image to the size of the selected device profile "
+            "(240x240 pixels for the MECHEN 2.4\" screen MP3/MP4 player by default).\n\n"
             "7. Completion: After processing, a completion window will appear with options to view detailed changes or finish.\n\n"
             "8. Details: If you choose to view details, you will see a list of all updated MP3 files and the path to the embed example image.\n\n"
             "Additional Features:\n"
             "- 'Copy Embed Example Path' button to copy the embed example image path to clipboard.\n"
             "- 'Open Embed Example' button to open the embed example image in the default application.\n"
+            "- 'Batch Process All Albums' button to embed a cover into every album at once. Each album's cover is found "
+            "automatically from a cover.jpg, folder.jpg, front.jpg or <album>.jpg file in the album's folder, an <album>.jpg file "
+            "in the covers folder, or a cover already embedded in one of the album's tracks.\n"
+            "- 'File' > 'Undo Last Run' to put back the original tags of the files changed by the last embed or batch run. "
+            "Only the tags are saved before each run, so undoing is quick and the audio is never touched.\n"
+            "- 'File' > 'Sync to Device...' to copy the music folder to a player's SD card or music folder with every album's cover "
+            "embedded on the way, without changing the music folder. Covers are found like in batch processing, and files that are "
+            "already up to date on the player are skipped.\n"
+            "- 'Settings' > 'Device Profile' to pick the player covers are made for. Profiles (cover size, JPEG quality, "
+            "progressive or baseline JPEG, maximum cover size in bytes, ID3 version and extra \"tag_transforms\" such as dropping comments or "
+            "private frames in the same save) are stored under \"device_profiles\" in settings.json.\n"
             "- 'Quit' button to exit the program.\n\n"
             "Settings:\n"
             "- 'Change Save Embed Path': Allows you to change the folder where embed example images are saved.\n"
-            "- 'Don't Auto-Save Embeds': If checked, you will be prompted to save an embed example image after processing.\n\n"
+            "- 'Don't Auto-Save Embeds': If checked, you will be prompted to save an embed example image after processing.\n"
+            "- 'Change Covers Folder': Sets the folder of <album>.jpg covers used by batch processing.\n\n"
             "For more information, refer to the README on GitHub or contact me at mp3.m4r.gitproject@gmail.com."
         )
 
@@ -0,0 +1,72 @@
+"""
+Headless core of the MP3 Album Cover Embedder.
+
+The scan, resize and embed logic lives here without any tkinter dependency.
+The GUI in mp3_album_cover_embedder.py is a thin client on top of it, and
+python -m mp3cover runs it from the command line.
+"""
+from .core import (
+    MECHEN_COVER_SIZE,
+    DEFAULT_JPEG_QUALITY,
+    MIN_JPEG_QUALITY,
+    JPEG_SUBSAMPLINGS,
+    READ_ERRORS,
+    LATIN1_TEXT_FRAMES,
+    MIN_TAG_PADDING,
+    WRITE_SKIPPED,
+    WRITE_IN_PLACE,
+    WRITE_REWRITTEN,
+    PIPELINE_QUEUE_SIZE,
+    EmbedResult,
+    list_mp3_files,
+    default_album_name,
+    fallback_album_name,
+    iter_album_folders,
+    get_albums,
+    load_cover_image,
+    decode_near_size,
+    resize_cover_image,
+    cover_padding,
+    tags_are_current,
+    read_tags,
+    build_cover_tags,
+    write_tags,
+    embed_cover_into_file,
+    psnr,
+    encode_jpeg_budget,
+    encode_jpeg,
+    encode_cover_variants,
+    encode_cover_bytes,
+    encode_cover,
+    embed_cover_data,
+    embed_cover_targets,
+    embed_example_path,
+    embed_album_cover_targets,
+    embed_album_cover,
+)
+from .profiles import (
+    DEFAULT_ID3_VERSION,
+    DeviceProfile,
+    MECHEN_PROFILE,
+    ORIGINAL_PROFILE,
+    DEFAULT_PROFILES,
+    legacy_profile,
+    load_profiles,
+    save_profiles,
+    active_profile,
+)
+from .runlog import RUN_LOG_NAME, StageStats, RunStats, io_counters, run_log_path, write_run_log, profiled
+from .journal import RunJournal, run_plan, completion_key, journaled_run
+from .fastscan import FastScanError, id3v2_tag_size, scan_tags, read_album_info, cover_hash
+from .transforms import TAG_TRANSFORMS, check_transforms, transforms_pending, apply_transforms
+from .library_index import IndexEntry, LibraryIndex
+from .cover_cache import CoverCache
+from .album_search import AlbumSearchIndex, normalize_album_name
+from .shared_cover import SharedCover
+from .scanner import iter_mp3_dirs, iter_mp3_files
+from . import settings
+from .batch import CoverSource, BatchResult, split_by_sidecar, find_cover, embed_library
+from .undo import UndoError, TagSnapshot, UndoLog, UndoResult, take_snapshot, restore_snapshot, read_undo_log, undo_log_path, list_undo_logs, restore_tags
+from .audit import FileAudit, AuditReport, audit_file, audit_library
+from .sync import SYNC_MANIFEST_NAME, SyncResult, load_manifest, save_manifest, sync_library
+from .watch import InotifyWatcher, PollingWatcher, open_watcher, embed_changed_files, watch_folder
@@ -0,0 +1,8 @@
+"""
+Allows the command-line interface to be run with python -m mp3cover.
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
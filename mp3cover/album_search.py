@@ -0,0 +1,81 @@
+"""
+Type-ahead search over album names.
+
+The GUI's album picker filters the album list as the user types, which has to
+stay fast for libraries of tens of thousands of albums. AlbumSearchIndex
+normalizes every name once up front (case, accents and punctuation are
+ignored) and keeps them sorted, so each keystroke is a plain substring test
+per album. Typing more characters only narrows the previous matches instead
+of searching the whole library again.
+"""
+import re
+import unicodedata
+
+# Runs of characters that don't count when matching names, such as punctuation and spaces
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_album_name(name: str) -> str:
+    """
+    Normalizes an album name or search query for matching.
+
+    Parameters:
+    name: str - The album name or query.
+
+    Return str - The name in lower case without accents, with punctuation and runs of spaces turned into single spaces.
+    """
+    if not name.isascii():
+        decomposed = unicodedata.normalize("NFKD", name)
+        name = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SEPARATORS.sub(" ", name.casefold()).strip()
+
+
+class AlbumSearchIndex:
+    """
+    Album names with their normalized forms, sorted for display and filtered by search queries.
+
+    A name matches a query if it contains every word of the query, in any order.
+
+    Attributes:
+    names: list - Album names, sorted by their normalized form.
+    keys: list - Normalized form of each name in names.
+    """
+
+    def __init__(self, album_names):
+        """
+        Normalizes and sorts the album names.
+
+        Parameters:
+        album_names: iterable - The album names to search.
+        """
+        entries = sorted((normalize_album_name(album_name), album_name) for album_name in album_names)
+        self.keys = [key for key, album_name in entries]
+        self.names = [album_name for key, album_name in entries]
+        self._last_query = ""
+        self._last_matches = range(len(self.names))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str) -> list:
+        """
+        Finds the albums matching a query.
+
+        Parameters:
+        query: str - The search text; an empty query matches every album.
+
+        Return list - Positions in names of the matching albums, in order.
+        """
+        query = normalize_album_name(query)
+        if not query:
+            matches = range(len(self.names))
+        else:
+            # A longer query can only match albums the shorter one matched
+            candidates = self._last_matches if query.startswith(self._last_query) else range(len(self.names))
+            keys = self.keys
+            matches = candidates
+            for word in query.split():
+                matches = [i for i in matches if word in keys[i]]
+        self._last_query = query
+        self._last_matches = matches
+        return list(matches)
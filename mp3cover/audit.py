@@ -0,0 +1,343 @@
+"""
+Integrity and cover audit of a whole library.
+
+Scanning only tells corrupt files apart from readable ones, and embedding
+only shows what it changed. audit_library fully parses every MP3 file, in
+parallel, and reports what would go wrong on the player:
+
+- corrupt: mutagen can't parse the file
+- truncated: the ID3 tag runs past the end of the file, or there is less
+  audio than the file's Xing/VBRI header says
+- missing_cover, multiple_covers: no APIC frame, or more than one
+- oversized_cover: bigger than the profile's max_bytes or size in pixels
+- bad_cover: an image that can't be read, isn't a JPEG, or is progressive
+  when the profile needs baseline
+- mismatched_covers: tracks of the same album with different covers
+- non_latin1_text: album, artist or title text that Latin-1 can't hold,
+  which embedding would mangle when it forces those frames to Latin-1
+
+The report can be printed, saved as JSON or CSV, and lists the albums to
+embed again with --batch --album.
+"""
+import csv
+import io
+import os
+import time
+from collections import deque
+
+from mutagen.id3 import ID3
+from mutagen.mp3 import MP3
+
+from .core import LATIN1_TEXT_FRAMES, READ_ERRORS, default_album_name
+from .fastscan import cover_hash, id3v2_tag_size
+from .scanner import iter_mp3_files
+
+# Problems found in a file, or in an album for ISSUE_MISMATCHED_COVERS
+ISSUE_CORRUPT = "corrupt"
+ISSUE_TRUNCATED = "truncated"
+ISSUE_MISSING_COVER = "missing_cover"
+ISSUE_MULTIPLE_COVERS = "multiple_covers"
+ISSUE_OVERSIZED_COVER = "oversized_cover"
+ISSUE_BAD_COVER = "bad_cover"
+ISSUE_MISMATCHED_COVERS = "mismatched_covers"
+ISSUE_NON_LATIN1_TEXT = "non_latin1_text"
+
+# Issues fixed by embedding the album's cover again
+COVER_ISSUES = (ISSUE_MISSING_COVER, ISSUE_MULTIPLE_COVERS, ISSUE_OVERSIZED_COVER, ISSUE_BAD_COVER, ISSUE_MISMATCHED_COVERS)
+
+# Share of the audio a Xing/VBRI header promises that has to be there; the rest is allowed for encoder delay and padding
+TRUNCATION_TOLERANCE = 0.98
+
+# Files audited ahead of the results being collected, per worker
+AUDIT_LOOKAHEAD = 4
+
+# Columns of the CSV report
+CSV_FIELDS = ("file", "album", "issue", "detail")
+
+
+class FileAudit:
+    """
+    What the audit found in one MP3 file.
+
+    Attributes:
+    mp3_file: str - Path of the file relative to the music folder.
+    album_name: str - The file's album, derived from the file name if the tags have none, or None if the file is corrupt.
+    cover_hash: str - Hash of the first cover's image data, or None if the file has no cover.
+    issues: list - (issue, detail) tuples, where issue is one of the ISSUE_* values.
+    size: int - Size of the file in bytes.
+    seconds: float - Time spent auditing the file.
+    """
+
+    def __init__(self, mp3_file: str):
+        """
+        Initializes an empty FileAudit.
+
+        Parameters:
+        mp3_file: str - Path of the file relative to the music folder.
+        """
+        self.mp3_file = mp3_file
+        self.album_name = None
+        self.cover_hash = None
+        self.issues = []
+        self.size = 0
+        self.seconds = 0.0
+
+
+class AuditReport:
+    """
+    The outcome of auditing a library.
+
+    Attributes:
+    folder: str - The music folder that was audited.
+    profile: str - Name of the device profile covers were checked against.
+    files_checked: int - Number of MP3 files audited.
+    issues: list - Dictionaries with the file, album, issue and detail of each problem found.
+    cancelled: bool - Whether the audit was cancelled before every file was checked.
+    """
+
+    def __init__(self, folder: str, profile: str):
+        """
+        Initializes an empty AuditReport.
+
+        Parameters:
+        folder: str - The music folder being audited.
+        profile: str - Name of the device profile covers are checked against.
+        """
+        self.folder = folder
+        self.profile = profile
+        self.files_checked = 0
+        self.issues = []
+        self.cancelled = False
+
+    def add(self, mp3_file: str, album_name: str, issue: str, detail: str) -> None:
+        """
+        Records a problem.
+
+        Parameters:
+        mp3_file: str - The file, relative to the music folder, or None for a problem with a whole album.
+        album_name: str - The album, or None if it isn't known.
+        issue: str - One of the ISSUE_* values.
+        detail: str - Human-readable description of the problem.
+
+        No Return
+        """
+        self.issues.append({"file": mp3_file, "album": album_name, "issue": issue, "detail": detail})
+
+    def counts(self) -> dict:
+        """
+        Counts the problems of each kind.
+
+        Return dict - Number of problems keyed by issue.
+        """
+        counts = {}
+        for issue in self.issues:
+            counts[issue["issue"]] = counts.get(issue["issue"], 0) + 1
+        return counts
+
+    def albums_to_embed(self) -> list:
+        """
+        Lists the albums whose cover should be embedded again, for --batch --album.
+
+        Return list - Sorted album names.
+        """
+        return sorted({issue["album"] for issue in self.issues if issue["issue"] in COVER_ISSUES and issue["album"] is not None})
+
+    def to_dict(self) -> dict:
+        """
+        Converts the report to a JSON-serializable dictionary.
+
+        Return dict - The report as a dictionary.
+        """
+        return {
+            "folder": self.folder,
+            "profile": self.profile,
+            "files_checked": self.files_checked,
+            "counts": self.counts(),
+            "issues": self.issues,
+            "albums_to_embed": self.albums_to_embed(),
+            "cancelled": self.cancelled,
+        }
+
+    def write_csv(self, csv_path: str) -> None:
+        """
+        Saves the problems as CSV, one row per problem.
+
+        Parameters:
+        csv_path: str - Path of the CSV file to write.
+
+        No Return
+        """
+        with open(csv_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.issues)
+
+
+def _check_cover(cover_data: bytes, profile) -> list:
+    """
+    Checks an embedded cover against a device profile, reading only the image header.
+
+    Parameters:
+    cover_data: bytes - The image data of the APIC frame.
+    profile: mp3cover.DeviceProfile - Device profile the cover should suit.
+
+    Return list - (issue, detail) tuples.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    issues = []
+    if profile.max_bytes is not None and len(cover_data) > profile.max_bytes:
+        issues.append((ISSUE_OVERSIZED_COVER, f"{len(cover_data)} bytes, more than the {profile.max_bytes} bytes of {profile.name}"))
+
+    try:
+        with Image.open(io.BytesIO(cover_data)) as cover_image:
+            width, height = cover_image.size
+            image_format = cover_image.format
+            progressive = bool(cover_image.info.get("progressive"))
+    except (UnidentifiedImageError, OSError, ValueError):
+        issues.append((ISSUE_BAD_COVER, f"{len(cover_data)} bytes of image data that can't be read"))
+        return issues
+
+    if profile.size is not None and (width > profile.size[0] or height > profile.size[1]):
+        issues.append((ISSUE_OVERSIZED_COVER, f"{width}x{height}, bigger than the {profile.size[0]}x{profile.size[1]} of {profile.name}"))
+    if image_format != "JPEG":
+        issues.append((ISSUE_BAD_COVER, f"{image_format or 'unknown'} image instead of a JPEG"))
+    elif progressive and not profile.progressive:
+        issues.append((ISSUE_BAD_COVER, f"progressive JPEG, but {profile.name} needs a baseline JPEG"))
+    return issues
+
+
+def audit_file(folder: str, mp3_file: str, profile) -> FileAudit:
+    """
+    Audits one MP3 file. Runs on a worker thread or process.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    mp3_file: str - Path of the file relative to folder.
+    profile: mp3cover.DeviceProfile - Device profile covers are checked against.
+
+    Return FileAudit - What was found in the file.
+    """
+    started = time.perf_counter()
+    result = FileAudit(mp3_file)
+    mp3_path = os.path.join(folder, mp3_file)
+    try:
+        result.size = os.path.getsize(mp3_path)
+        with open(mp3_path, 'rb') as file:
+            header = file.read(10)
+    except OSError as e:
+        result.issues.append((ISSUE_CORRUPT, str(e) or type(e).__name__))
+        result.seconds = time.perf_counter() - started
+        return result
+
+    tag_size = id3v2_tag_size(header)
+    if tag_size is None:
+        result.issues.append((ISSUE_CORRUPT, f"invalid ID3 tag size in header {header.hex(' ')}"))
+        result.seconds = time.perf_counter() - started
+        return result
+    if tag_size > result.size:
+        result.issues.append((ISSUE_TRUNCATED, f"ID3 tag of {tag_size} bytes in a {result.size}-byte file"))
+        result.seconds = time.perf_counter() - started
+        return result
+
+    try:
+        audio = MP3(mp3_path, ID3=ID3)
+    except READ_ERRORS as e:
+        result.issues.append((ISSUE_CORRUPT, str(e) or type(e).__name__))
+        result.seconds = time.perf_counter() - started
+        return result
+
+    # For plain CBR files mutagen works the length out from the file size, so only a Xing/VBRI
+    # header's frame count can show missing audio
+    tags = audio.tags
+    audio_bytes = result.size - (tags.size if tags is not None else 0)
+    expected_bytes = audio.info.bitrate * audio.info.length / 8
+    if expected_bytes and audio_bytes < expected_bytes * TRUNCATION_TOLERANCE:
+        result.issues.append((ISSUE_TRUNCATED, f"{audio_bytes} bytes of audio, the header says {int(expected_bytes)}"))
+
+    album = tags.get('TALB') if tags is not None else None
+    result.album_name = str(album.text[0]) if album is not None and album.text and album.text[0] else default_album_name(mp3_file)
+
+    pictures = tags.getall('APIC') if tags is not None else []
+    if not pictures:
+        result.issues.append((ISSUE_MISSING_COVER, "no APIC frame"))
+    else:
+        if len(pictures) > 1:
+            result.issues.append((ISSUE_MULTIPLE_COVERS, f"{len(pictures)} APIC frames"))
+        result.cover_hash = cover_hash(pictures[0].data)
+        result.issues.extend(_check_cover(pictures[0].data, profile))
+
+    for frame_id in LATIN1_TEXT_FRAMES:
+        frame = tags.get(frame_id) if tags is not None else None
+        if frame is None:
+            continue
+        for text in frame.text:
+            try:
+                str(text).encode('latin-1')
+            except UnicodeEncodeError:
+                result.issues.append((ISSUE_NON_LATIN1_TEXT, f"{frame_id} {str(text)!r} can't be written as Latin-1"))
+                break
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def audit_library(folder: str, profile, workers: int = 1, use_processes: bool = False, recursive: bool = True, progress=None, cancel_event=None, stats=None) -> AuditReport:
+    """
+    Audits every MP3 file in the folder in parallel, then compares the covers of each album's tracks.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    profile: mp3cover.DeviceProfile - Device profile covers are checked against.
+    workers: int - Number of files audited at the same time.
+    use_processes: bool - Whether to use a process pool instead of a thread pool, so parsing runs on several cores.
+    recursive: bool - Whether to audit subfolders too.
+    progress: callable - Called as progress(done, None) after each file, since the total isn't known up front (optional).
+    cancel_event: threading.Event - Stops the audit between files once set (optional).
+    stats: mp3cover.RunStats - Records the audit_file stage (optional).
+
+    Return AuditReport - The problems found.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    folder = os.path.normpath(folder)
+    report = AuditReport(folder, profile.name)
+    album_covers = {}
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    lookahead = max(workers, 1) * AUDIT_LOOKAHEAD
+
+    with executor_class(max_workers=max(workers, 1)) as executor:
+        mp3_files = iter_mp3_files(folder, recursive)
+        pending = deque()
+        while True:
+            while len(pending) < lookahead and not report.cancelled:
+                mp3_file = next(mp3_files, None)
+                if mp3_file is None:
+                    break
+                pending.append(executor.submit(audit_file, folder, mp3_file, profile))
+            if not pending:
+                break
+
+            result = pending.popleft().result()
+            if stats is not None:
+                stats.record("audit_file", result.seconds, bytes_read=result.size,
+                             error=any(issue in (ISSUE_CORRUPT, ISSUE_TRUNCATED) for issue, detail in result.issues))
+            for issue, detail in result.issues:
+                report.add(result.mp3_file, result.album_name, issue, detail)
+            if result.cover_hash is not None:
+                album_covers.setdefault(result.album_name, {}).setdefault(result.cover_hash, []).append(result.mp3_file)
+            report.files_checked += 1
+            if progress is not None:
+                progress(report.files_checked, None)
+
+            if cancel_event is not None and cancel_event.is_set() and not report.cancelled:
+                report.cancelled = True
+                for future in pending:
+                    future.cancel()
+                pending = deque(future for future in pending if not future.cancelled())
+
+    for album_name, covers in album_covers.items():
+        if len(covers) > 1:
+            track_count = sum(len(mp3_files) for mp3_files in covers.values())
+            report.add(None, album_name, ISSUE_MISMATCHED_COVERS, f"{len(covers)} different covers in {track_count} tracks")
+    return report
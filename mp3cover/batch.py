@@ -0,0 +1,343 @@
+"""
+Whole-library batch mode with automatic cover discovery.
+
+Instead of picking an image for one album at a time, every album gets its
+cover from, in order:
+
+1. a sidecar image in one of the album's folders (cover.jpg, folder.jpg,
+   front.jpg or <album>.jpg, also .jpeg and .png),
+2. <album>.jpg (or .jpeg/.png) in a configured covers folder,
+3. a cover already embedded in another track of the same album.
+
+Albums are found by name, so two albums with the same name in different
+folders (two "Greatest Hits") end up as one. When their folders hold
+different sidecar images, split_by_sidecar splits them again, and each part
+gets its own cover.
+
+All albums then go through one shared pipeline: covers are grouped by the
+hash of their source data, so each distinct cover is decoded once no matter
+how many albums use it, and every device profile's variant is made from that
+one decode.
+"""
+import os
+import re
+import time
+
+from mutagen.id3 import ID3
+
+from .core import READ_ERRORS, EmbedResult, embed_cover_targets, encode_cover_variants, embed_example_path
+from .cover_cache import source_hash
+from .profiles import legacy_profile
+
+# Sidecar image names looked for in album folders, besides the album name itself
+SIDECAR_NAMES = ("cover", "folder", "front")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Where a discovered cover came from
+SOURCE_SIDECAR = "sidecar"
+SOURCE_COVERS_FOLDER = "covers_folder"
+SOURCE_EMBEDDED = "embedded"
+
+
+class CoverSource:
+    """
+    A cover found for an album.
+
+    The image data is only read when it's needed, so discovering the covers of a
+    large library doesn't hold every source image in memory.
+
+    Attributes:
+    kind: str - SOURCE_SIDECAR, SOURCE_COVERS_FOLDER or SOURCE_EMBEDDED.
+    path: str - Path to the image file, or to the MP3 file the cover was taken from.
+    """
+
+    def __init__(self, kind: str, path: str):
+        """
+        Initializes a CoverSource.
+
+        Parameters:
+        kind: str - SOURCE_SIDECAR, SOURCE_COVERS_FOLDER or SOURCE_EMBEDDED.
+        path: str - Path to the image file, or to the MP3 file the cover was taken from.
+        """
+        self.kind = kind
+        self.path = path
+
+    def read_data(self) -> bytes:
+        """
+        Reads the source image.
+
+        Return bytes - Contents of the image file, or the image data of the embedded cover.
+        """
+        if self.kind == SOURCE_EMBEDDED:
+            return embedded_cover_data(self.path)
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+
+class BatchResult:
+    """
+    The outcome of a whole-library batch run.
+
+    Attributes:
+    results: list - EmbedResult of every album that had a cover, one per target folder.
+    cover_sources: dict - CoverSource used for each album, keyed by album name (or split_by_sidecar label).
+    missing_covers: list - Names of the albums for which no cover was found.
+    covers_encoded: int - Number of distinct covers that were decoded and encoded.
+    cancelled: bool - Whether the run was cancelled before all albums were processed.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty BatchResult.
+        """
+        self.results = []
+        self.cover_sources = {}
+        self.missing_covers = []
+        self.covers_encoded = 0
+        self.cancelled = False
+
+    def to_dict(self) -> dict:
+        """
+        Converts the result to a JSON-serializable dictionary.
+
+        Return dict - The result as a dictionary.
+        """
+        return {
+            "albums": [
+                dict(result.to_dict(), cover_source=self.cover_sources[result.album_name].kind, cover_path=self.cover_sources[result.album_name].path)
+                for result in self.results
+            ],
+            "missing_covers": self.missing_covers,
+            "covers_encoded": self.covers_encoded,
+            "cancelled": self.cancelled,
+        }
+
+
+def safe_file_name(album_name: str) -> str:
+    """
+    Replaces characters that can't appear in file names.
+
+    Parameters:
+    album_name: str - Name of the album.
+
+    Return str - The album name usable as a file name.
+    """
+    return re.sub(r'[\\/:*?"<>|]', '_', album_name).strip()
+
+
+def _find_image(directory: str, stems: list) -> str:
+    """
+    Looks for an image with one of the given names (case-insensitively) in a folder.
+
+    Parameters:
+    directory: str - Folder to look in.
+    stems: list - File names without extension, in order of preference.
+
+    Return str - Path to the first image found, or None.
+    """
+    try:
+        names = {name.lower(): name for name in os.listdir(directory)}
+    except OSError:
+        return None
+
+    for stem in stems:
+        for extension in IMAGE_EXTENSIONS:
+            name = names.get(f"{stem}{extension}".lower())
+            if name is not None:
+                return os.path.join(directory, name)
+    return None
+
+
+def embedded_cover_data(mp3_path: str) -> bytes:
+    """
+    Reads the image data of the cover embedded in an MP3 file, preferring the front cover.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+
+    Return bytes - The image data, or None if the file has no cover or can't be read.
+    """
+    try:
+        pictures = ID3(mp3_path).getall('APIC')
+    except READ_ERRORS:
+        return None
+    if not pictures:
+        return None
+    return next((picture for picture in pictures if picture.type == 3), pictures[0]).data
+
+
+def split_by_sidecar(folder: str, album_name: str, mp3_files: list) -> list:
+    """
+    Splits an album whose folders hold different sidecar covers, such as two albums that share a name.
+
+    Folders without a sidecar stay with the album's sidecar when there is only one, like the other discs of a
+    multi-disc album with the cover in the first disc's folder. Sidecars with the same image count as one.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    album_name: str - Name of the album.
+    mp3_files: list - MP3 files of the album, relative to folder.
+
+    Return list - (label, mp3_files) pairs. An album that isn't split is a single pair labelled with its name;
+    otherwise each part is labelled with the name and its folders, like "Greatest Hits (Queen/Greatest Hits)".
+    """
+    album_stems = list(SIDECAR_NAMES) + [safe_file_name(album_name)]
+    directory_files = {}
+    for mp3_file in mp3_files:
+        directory_files.setdefault(os.path.dirname(mp3_file), []).append(mp3_file)
+    if len(directory_files) == 1:
+        return [(album_name, mp3_files)]
+
+    sidecars = {directory: _find_image(os.path.join(folder, directory), album_stems) for directory in directory_files}
+    if len(set(sidecars.values()) - {None}) <= 1:
+        return [(album_name, mp3_files)]
+
+    # Folders grouped by the image of their sidecar, the ones without one last
+    groups = {}
+    for directory, path in sidecars.items():
+        key = None
+        if path is not None:
+            try:
+                with open(path, 'rb') as file:
+                    key = source_hash(file.read())
+            except OSError:
+                key = path
+        groups.setdefault(key, []).append(directory)
+    if len(groups) - (None in groups) <= 1:
+        return [(album_name, mp3_files)]
+    if None in groups:
+        groups[None] = groups.pop(None)
+
+    return [(f"{album_name} ({', '.join(directory or '.' for directory in directories)})",
+             [mp3_file for directory in directories for mp3_file in directory_files[directory]])
+            for directories in groups.values()]
+
+
+def find_cover(folder: str, album_name: str, mp3_files: list, covers_folder: str = None) -> CoverSource:
+    """
+    Finds a cover for an album from sidecar files, the covers folder or the album's own tracks.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    album_name: str - Name of the album.
+    mp3_files: list - MP3 files of the album, relative to folder.
+    covers_folder: str - Folder with <album>.jpg covers (optional).
+
+    Return CoverSource - The cover found, or None.
+    The first folder with a sidecar wins, so albums should be split with split_by_sidecar first.
+    """
+    album_stems = list(SIDECAR_NAMES) + [safe_file_name(album_name)]
+    album_directories = list(dict.fromkeys(os.path.dirname(os.path.join(folder, mp3_file)) for mp3_file in mp3_files))
+
+    for directory in album_directories:
+        path = _find_image(directory, album_stems)
+        if path:
+            return CoverSource(SOURCE_SIDECAR, path)
+
+    if covers_folder:
+        path = _find_image(covers_folder, [safe_file_name(album_name)])
+        if path:
+            return CoverSource(SOURCE_COVERS_FOLDER, path)
+
+    for mp3_file in mp3_files:
+        mp3_path = os.path.join(folder, mp3_file)
+        if embedded_cover_data(mp3_path) is not None:
+            return CoverSource(SOURCE_EMBEDDED, mp3_path)
+
+    return None
+
+
+def embed_library(folder: str, albums: dict, resize: bool = False, covers_folder: str = None, embed_folder: str = None, workers: int = 1, use_processes: bool = False, progress=None, cancel_event=None, cache=None, skip_unchanged: bool = False, profile=None, targets: list = None, stats=None, journal=None, pipeline: bool = False, undo=None) -> BatchResult:
+    """
+    Finds a cover for every album and embeds it, decoding each distinct cover only once.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    albums: dict - Album names mapped to their MP3 files, as returned by mp3cover.get_albums.
+    resize: bool - Whether to resize the covers.
+    covers_folder: str - Folder with <album>.jpg covers (optional).
+    embed_folder: str - Folder to save embed example images in, or None to not save them.
+    workers: int - Number of files to update at the same time.
+    use_processes: bool - Whether to use a process pool instead of a thread pool.
+    progress: callable - Called as progress(done, total) after each file, counted over all albums (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    skip_unchanged: bool - Whether to leave files that already have their cover untouched.
+    profile: mp3cover.DeviceProfile - Device profile for the covers in folder, instead of resize (optional).
+    targets: list - More (folder, DeviceProfile) pairs for other copies of the library, such as a player's music folder (optional).
+    stats: mp3cover.RunStats - Records the time spent in each stage (optional).
+    journal: mp3cover.RunJournal - Checkpoint journal of the run, used to skip files an interrupted run already finished (optional).
+    pipeline: bool - Whether to embed each album's files with the asyncio pipeline instead of a worker pool (see embed_cover_data).
+    undo: mp3cover.UndoLog - Gets each file's original tags before they're written (optional).
+
+    Return BatchResult - The per-album results and the albums without a cover.
+    """
+    batch = BatchResult()
+    targets = [(folder, profile or legacy_profile(resize))] + list(targets or [])
+    profiles = [target_profile for target_folder, target_profile in targets]
+    several_profiles = len({target_profile.name for target_profile in profiles}) > 1
+
+    album_files = {}
+    for album_name, mp3_files in albums.items():
+        for label, part_files in split_by_sidecar(folder, album_name, mp3_files):
+            album_files[label] = part_files
+            source = find_cover(folder, album_name, part_files, covers_folder)
+            if source is None:
+                batch.missing_covers.append(label)
+            else:
+                batch.cover_sources[label] = source
+
+    total = sum(len(album_files[album_name]) for album_name in batch.cover_sources) * len(targets)
+    done_before = 0
+    encoded_covers = {}
+
+    for album_name, source in batch.cover_sources.items():
+        if cancel_event is not None and cancel_event.is_set():
+            batch.cancelled = True
+            break
+
+        started = time.perf_counter()
+        try:
+            source_data = source.read_data()
+        except OSError:
+            source_data = None
+        if stats is not None:
+            stats.record("cover_read", time.perf_counter() - started, bytes_read=len(source_data or b""), error=source_data is None)
+        digest = source_hash(source_data) if source_data else None
+
+        if digest is not None and digest not in encoded_covers:
+            try:
+                encoded_covers[digest] = encode_cover_variants(source_data, profiles, cache, stats)
+            except (OSError, ValueError):
+                # Pillow raises OSError subclasses for images it can't decode
+                encoded_covers[digest] = None
+
+        variants = encoded_covers.get(digest)
+        if variants is None:
+            result = EmbedResult(album_name)
+            result.errors.append((source.path, "Cover image could not be read or decoded"))
+            batch.results.append(result)
+            done_before += len(album_files[album_name]) * len(targets)
+            continue
+
+        def album_progress(done: int, album_total: int, offset: int = done_before) -> None:
+            progress(offset + done, total)
+
+        results = embed_cover_targets(targets, album_name, album_files[album_name], variants, workers, use_processes,
+                                      album_progress if progress is not None else None, cancel_event, skip_unchanged, stats, journal, pipeline, undo)
+
+        if embed_folder:
+            example_source = source.path if source.kind != SOURCE_EMBEDDED else "embedded_cover"
+            for result, cover_data in zip(results, variants):
+                result.embed_example_path = embed_example_path(embed_folder, album_name, example_source, result.profile if several_profiles else None)
+                with open(result.embed_example_path, 'wb') as file:
+                    file.write(cover_data)
+
+        batch.results.extend(results)
+        done_before += len(album_files[album_name]) * len(targets)
+        if results[-1].cancelled:
+            batch.cancelled = True
+            break
+
+    batch.covers_encoded = sum(1 for variants in encoded_covers.values() if variants is not None)
+    return batch
@@ -0,0 +1,651 @@
+"""
+Benchmarks for the MP3 Album Cover Embedder.
+
+Run with python -m mp3cover.benchmark <benchmark>:
+
+- resize: times the reduced-resolution decode path of resize_cover_image against a
+  full decode, measures the peak memory of each, and checks that both produce the
+  same cover (PSNR of the fast output against the full-decode output). The exit
+  code is non-zero if the outputs differ by more than --min-psnr allows.
+- covers: finds the cover of every album in a library (like --batch does) and
+  reports how much smaller the byte-budget encoder (see encode_jpeg_budget) makes
+  them, per cover and across every track the cover is embedded in.
+- library: generates a synthetic library (see mp3cover.synthetic) and times the
+  scan (fast, full parse, and with a cold and a warm library index), the cover
+  resize and the batch embed (first run, rewriting every file with the thread
+  pool, the process pool and the read/build/write pipeline, and with
+  skip-unchanged). Each
+  stage reports files/sec, bytes written and peak memory. --output saves the
+  results as JSON, and --compare checks them against an earlier run, with a
+  non-zero exit code if a stage got slower than --tolerance allows.
+- startup: times a cold start in a fresh interpreter: importing the package, the
+  command line and the GUI, running --help, and the GUI up to its first paint
+  (skipped without a display). It also lists which optional heavy modules
+  (Pillow, mutagen, asyncio, ...) each one loaded, since those should only load
+  on the code paths that need them.
+
+Each measurement (and the generation of the test image) runs in a fresh process
+so its peak memory isn't hidden by an earlier one; on Linux a child process
+starts with its parent's peak. Peak memory is read from the operating system
+(resource.getrusage), because Pillow's pixel buffers aren't visible to
+tracemalloc; it's reported as None where the resource module isn't available
+(Windows). Bytes written are the bytes the process passed to write calls, from
+/proc/self/io (Linux only), so they don't include process pool workers.
+"""
+import argparse
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import mutagen
+import PIL
+from PIL import Image
+
+from .batch import embed_library, find_cover
+from .core import MECHEN_COVER_SIZE, encode_jpeg, encode_jpeg_budget, get_albums, load_cover_image, psnr, resize_cover_image
+from .library_index import LibraryIndex
+from .profiles import MECHEN_PROFILE, load_profiles
+from .runlog import io_counters
+from .settings import APP_DIR, SETTINGS_FILE, load_settings
+from .synthetic import make_library, make_test_image
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Default smallest PSNR (in dB) at which the fast and full resize count as the same cover
+DEFAULT_MIN_PSNR = 40.0
+
+# Stages of the library benchmark, in the order they run
+LIBRARY_STAGES = ("scan", "scan_full", "scan_index_cold", "scan_index_warm", "resize", "embed", "embed_rewrite", "embed_processes", "embed_pipeline", "embed_unchanged")
+
+# Default slowdown (in percent of files/sec) a stage may show against --compare results
+DEFAULT_TOLERANCE = 10.0
+
+# Cases of the startup benchmark, in the order they run
+STARTUP_CASES = ("interpreter", "import_package", "import_cli", "cli_help", "import_gui", "gui_first_paint")
+
+# Modules the startup benchmark reports as loaded; each one is only needed on some code paths
+STARTUP_HEAVY_MODULES = ("tkinter", "PIL", "mutagen", "pyperclip", "asyncio", "concurrent.futures", "multiprocessing", "sqlite3", "ctypes")
+
+# Run by the startup benchmark in a fresh interpreter, with the case as its argument; prints the time it took as JSON
+_STARTUP_SCRIPT = """
+import contextlib, io, json, os, sys, tempfile, time
+start = time.perf_counter()
+case, heavy_modules = sys.argv[1], sys.argv[2:]
+seconds = error = None
+if case == "import_package":
+    import mp3cover
+elif case == "import_cli":
+    import mp3cover.cli
+elif case == "cli_help":
+    from mp3cover.cli import main
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(SystemExit):
+        main(["--help"])
+elif case in ("import_gui", "gui_first_paint"):
+    import mp3_album_cover_embedder as gui
+    if case == "gui_first_paint":
+        import tkinter
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Start like a first run, without touching the real settings.json
+            gui.mp3cover.settings.SETTINGS_FILE = os.path.join(temp_dir, "settings.json")
+            try:
+                root = tkinter.Tk()
+            except tkinter.TclError as e:
+                error = str(e) or "no display"
+            else:
+                gui.MP3AlbumCoverEmbedder(root)
+                root.update()
+                seconds = time.perf_counter() - start
+                root.destroy()
+if seconds is None:
+    seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "error": error, "loaded": [name for name in heavy_modules if name in sys.modules]}))
+"""
+
+
+def _peak_rss_kib() -> int:
+    """
+    Reads the peak resident memory of the current process.
+
+    Return int - Peak resident memory in KiB, or None if it can't be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _time_resize(image_path: str, size: tuple, fast: bool, repeat: int) -> dict:
+    """
+    Resizes an image repeatedly in the current process. Run in a fresh worker process.
+
+    Parameters:
+    image_path: str - Path to the source image.
+    size: tuple - (width, height) of the resized image.
+    fast: bool - Whether to use the reduced-resolution decode path.
+    repeat: int - Number of timed runs.
+
+    Return dict - Run times, peak memory growth and the resized image's raw RGB data.
+    """
+    baseline = _peak_rss_kib()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cover_image = resize_cover_image(image_path, size, fast=fast)
+        times.append(time.perf_counter() - start)
+    peak = _peak_rss_kib()
+
+    return {
+        "times": times,
+        "peak_rss_kib": peak - baseline if peak is not None else None,
+        "pixels": cover_image.tobytes(),
+    }
+
+
+def benchmark_resize(image_path: str, size: tuple = MECHEN_COVER_SIZE, repeat: int = 5) -> dict:
+    """
+    Compares the fast and full-decode resize paths on one image.
+
+    Parameters:
+    image_path: str - Path to the source image.
+    size: tuple - (width, height) of the resized image.
+    repeat: int - Number of timed runs per path.
+
+    Return dict - Source size, per-path median and best time and peak memory, and the PSNR
+    of the fast output against the full-decode output.
+    """
+    with Image.open(image_path) as source:
+        source_size = source.size
+
+    context = multiprocessing.get_context("spawn")
+    runs = {}
+    for name, fast in (("full", False), ("fast", True)):
+        with context.Pool(1) as pool:
+            runs[name] = pool.apply(_time_resize, (image_path, size, fast, repeat))
+
+    full_image, fast_image = (Image.frombytes("RGB", size, runs[name].pop("pixels")) for name in ("full", "fast"))
+
+    report = {"image": image_path, "source_size": list(source_size), "size": list(size), "repeat": repeat}
+    for name, run in runs.items():
+        report[name] = {
+            "median_seconds": statistics.median(run["times"]),
+            "best_seconds": min(run["times"]),
+            "peak_rss_kib": run["peak_rss_kib"],
+        }
+    report["speedup"] = report["full"]["median_seconds"] / report["fast"]["median_seconds"]
+    report["psnr_db"] = psnr(full_image, fast_image)
+    return report
+
+
+def print_resize_report(report: dict) -> None:
+    """
+    Prints a resize benchmark report in a readable form.
+
+    Parameters:
+    report: dict - Report returned by benchmark_resize.
+
+    No Return
+    """
+    width, height = report["source_size"]
+    print(f"Source image: {report['image']} ({width}x{height}), resized to {report['size'][0]}x{report['size'][1]}")
+    for name in ("full", "fast"):
+        run = report[name]
+        memory = f"{run['peak_rss_kib'] / 1024:.1f} MiB" if run["peak_rss_kib"] is not None else "n/a"
+        print(f"  {name:>4} decode: median {run['median_seconds'] * 1000:.1f} ms, best {run['best_seconds'] * 1000:.1f} ms, peak memory +{memory}")
+    print(f"  Speedup: {report['speedup']:.1f}x")
+    print(f"  PSNR of fast vs full output: {report['psnr_db']:.1f} dB")
+
+
+def benchmark_covers(folder: str, profile, max_bytes: int, covers_folder: str = None) -> dict:
+    """
+    Measures how much the byte-budget encoder shrinks the covers of a library.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    profile: mp3cover.DeviceProfile - Profile the covers are made for.
+    max_bytes: int - Byte budget per cover.
+    covers_folder: str - Folder with <album>.jpg covers (optional).
+
+    Return dict - Per-album cover sizes with and without the budget, the chosen quality and
+    subsampling, and totals counted once per track the cover is embedded in.
+    """
+    albums, corrupted_files = get_albums(folder)
+    report = {"folder": folder, "profile": profile.name, "max_bytes": max_bytes, "albums": [], "missing_covers": []}
+
+    for album_name, mp3_files in albums.items():
+        source = find_cover(folder, album_name, mp3_files, covers_folder)
+        if source is None:
+            report["missing_covers"].append(album_name)
+            continue
+
+        source_data = source.read_data()
+        if profile.size is None:
+            cover_image = load_cover_image(io.BytesIO(source_data))
+        else:
+            cover_image = resize_cover_image(io.BytesIO(source_data), profile.size)
+
+        default_data = encode_jpeg(cover_image, profile.quality, profile.progressive, strip_metadata=profile.strip_metadata)
+        start = time.perf_counter()
+        if len(default_data) > max_bytes:
+            budget_data, quality, subsampling = encode_jpeg_budget(cover_image, max_bytes, profile.quality, profile.progressive, profile.strip_metadata)
+        else:
+            budget_data, quality, subsampling = default_data, profile.quality, None
+        search_seconds = time.perf_counter() - start
+
+        report["albums"].append({
+            "album_name": album_name,
+            "tracks": len(mp3_files),
+            "cover_path": source.path,
+            "default_bytes": len(default_data),
+            "budget_bytes": len(budget_data),
+            "quality": quality,
+            "subsampling": subsampling,
+            "psnr_db": psnr(cover_image, Image.open(io.BytesIO(budget_data)).convert("RGB")),
+            "search_seconds": search_seconds,
+        })
+
+    default_total = sum(album["default_bytes"] * album["tracks"] for album in report["albums"])
+    budget_total = sum(album["budget_bytes"] * album["tracks"] for album in report["albums"])
+    report["default_library_bytes"] = default_total
+    report["budget_library_bytes"] = budget_total
+    report["reduction_percent"] = 100 * (1 - budget_total / default_total) if default_total else 0.0
+    return report
+
+
+def print_covers_report(report: dict) -> None:
+    """
+    Prints a cover size report in a readable form.
+
+    Parameters:
+    report: dict - Report returned by benchmark_covers.
+
+    No Return
+    """
+    print(f"Covers in {report['folder']} for {report['profile']}, budget {report['max_bytes'] / 1024:.1f} KiB per cover")
+    for album in report["albums"]:
+        settings = f"quality {album['quality']}, {album['subsampling']}" if album["subsampling"] else "unchanged"
+        print(f"  {album['album_name']} ({album['tracks']} tracks): {album['default_bytes'] / 1024:.1f} KiB -> "
+              f"{album['budget_bytes'] / 1024:.1f} KiB ({settings}, PSNR {album['psnr_db']:.1f} dB, search {album['search_seconds'] * 1000:.0f} ms)")
+    for album_name in report["missing_covers"]:
+        print(f"  {album_name}: no cover found")
+    print(f"  Embedded in every track: {report['default_library_bytes'] / 1024 / 1024:.2f} MiB -> "
+          f"{report['budget_library_bytes'] / 1024 / 1024:.2f} MiB ({report['reduction_percent']:.1f}% smaller)")
+
+
+def _library_stage_once(stage: str, root: str, index_file: str, workers: int, albums: dict, covers: list) -> tuple:
+    """
+    Runs one pass of a library benchmark stage.
+
+    Parameters:
+    stage: str - One of LIBRARY_STAGES.
+    root: str - Folder of the synthetic library.
+    index_file: str - Library index used by the scan_index stages.
+    workers: int - Number of files the embed stages update at the same time.
+    albums: dict - Albums of the library, used by the embed stages.
+    covers: list - Paths of the cover.jpg files, used by the resize stage.
+
+    Return tuple - (files, details) with the number of files handled and stage-specific counts.
+    """
+    if stage.startswith("scan"):
+        fast = stage != "scan_full"
+        if stage.startswith("scan_index"):
+            with LibraryIndex(index_file) as index:
+                albums, corrupted_files = get_albums(root, fast, index=index)
+        else:
+            albums, corrupted_files = get_albums(root, fast)
+        files = sum(len(mp3_files) for mp3_files in albums.values()) + len(corrupted_files)
+        return files, {"albums": len(albums), "corrupted_files": len(corrupted_files)}
+
+    if stage == "resize":
+        for cover_path in covers:
+            resize_cover_image(cover_path)
+        return len(covers), {"source_bytes": sum(os.path.getsize(cover_path) for cover_path in covers)}
+
+    batch = embed_library(root, albums, resize=True, workers=workers, skip_unchanged=stage == "embed_unchanged",
+                          use_processes=stage == "embed_processes", pipeline=stage == "embed_pipeline")
+    details = {
+        "written": sum(len(result.updated_files) for result in batch.results),
+        "rewritten": sum(len(result.rewritten_files) for result in batch.results),
+        "skipped": sum(len(result.skipped_files) for result in batch.results),
+        "failed": sum(len(result.errors) for result in batch.results),
+        "covers_encoded": batch.covers_encoded,
+    }
+    return details["written"] + details["skipped"] + details["failed"], details
+
+
+def _run_library_stage(stage: str, root: str, index_file: str, workers: int, repeat: int) -> dict:
+    """
+    Runs one stage of the library benchmark. Run in a fresh worker process.
+
+    Every stage except the first embed leaves the library as it found it, so it's run
+    repeat times and the best time is kept; the cold index stage starts each run
+    from an empty index.
+
+    Parameters:
+    stage: str - One of LIBRARY_STAGES.
+    root: str - Folder of the synthetic library.
+    index_file: str - Library index used by the scan_index stages.
+    workers: int - Number of files the embed stages update at the same time.
+    repeat: int - Number of timed runs of repeatable stages.
+
+    Return dict - Best time, files handled, files/sec, bytes written and peak memory growth per run, and stage details.
+    """
+    albums = get_albums(root)[0] if stage.startswith("embed") else None
+    covers = sorted(os.path.join(directory, "cover.jpg") for directory, subdirectories, names in os.walk(root) if "cover.jpg" in names)
+    runs = 1 if stage == "embed" else repeat
+
+    baseline_rss = _peak_rss_kib()
+    baseline_written = io_counters()[1]
+    times = []
+    for _ in range(runs):
+        if stage == "scan_index_cold" and os.path.exists(index_file):
+            os.remove(index_file)
+        start = time.perf_counter()
+        files, details = _library_stage_once(stage, root, index_file, workers, albums, covers)
+        times.append(time.perf_counter() - start)
+    peak = _peak_rss_kib()
+    written = io_counters()[1]
+
+    seconds = min(times)
+    return dict({
+        "seconds": seconds,
+        "runs": runs,
+        "files": files,
+        "files_per_second": files / seconds if seconds else None,
+        "bytes_written": (written - baseline_written) // runs if written is not None else None,
+        "peak_rss_kib": peak - baseline_rss if peak is not None else None,
+    }, **details)
+
+
+def _environment() -> dict:
+    """
+    Describes the machine and versions a benchmark ran with, so results can be compared later.
+
+    Return dict - Python, platform, library versions, git commit and time of the run.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "mutagen": mutagen.version_string,
+        "pillow": PIL.__version__,
+        "commit": commit,
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def benchmark_library(albums: int = 50, tracks_per_album: int = 12, cover_sizes: tuple = (500, 1500, 3000), workers: int = 4, root: str = None, repeat: int = 3) -> dict:
+    """
+    Generates a synthetic library and times each of LIBRARY_STAGES on it.
+
+    Parameters:
+    albums: int - Number of albums to generate.
+    tracks_per_album: int - Number of tracks in each album.
+    cover_sizes: tuple - Side lengths of the albums' cover.jpg sidecars, used in turn.
+    workers: int - Number of files the embed stages update at the same time.
+    root: str - Folder to generate the library in and keep afterwards, or None for a temporary folder.
+    repeat: int - Number of timed runs of the stages that don't change the library.
+
+    Return dict - The environment, parameters, generated library and the results of each stage.
+    """
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = root or os.path.join(temp_dir, "library")
+        index_file = os.path.join(temp_dir, "library_index.sqlite")
+
+        with context.Pool(1) as pool:
+            library = pool.apply(make_library, (root, albums, tracks_per_album, cover_sizes))
+
+        stages = {}
+        for stage in LIBRARY_STAGES:
+            with context.Pool(1) as pool:
+                stages[stage] = pool.apply(_run_library_stage, (stage, root, index_file, workers, repeat))
+
+    return {
+        "environment": _environment(),
+        "parameters": {"albums": albums, "tracks_per_album": tracks_per_album, "cover_sizes": list(cover_sizes), "workers": workers, "repeat": repeat},
+        "library": library,
+        "stages": stages,
+    }
+
+
+def compare_library_reports(previous: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compares the files/sec of each stage with an earlier library benchmark.
+
+    Parameters:
+    previous: dict - Report of the earlier run.
+    current: dict - Report of this run.
+    tolerance: float - Slowdown in percent a stage may show before it counts as a regression.
+
+    Return list - (stage, previous files/sec, current files/sec, change in percent, regressed) for each stage both runs have.
+    """
+    rows = []
+    for stage, result in current["stages"].items():
+        before = previous.get("stages", {}).get(stage, {}).get("files_per_second")
+        after = result["files_per_second"]
+        if not before or not after:
+            continue
+        change = 100 * (after / before - 1)
+        rows.append((stage, before, after, change, change < -tolerance))
+    return rows
+
+
+def print_library_report(report: dict, comparison: list = None) -> None:
+    """
+    Prints a library benchmark report in a readable form.
+
+    Parameters:
+    report: dict - Report returned by benchmark_library.
+    comparison: list - Rows returned by compare_library_reports (optional).
+
+    No Return
+    """
+    library = report["library"]
+    print(f"Synthetic library: {library['albums']} albums, {library['files']} files, {library['bytes'] / 1024 / 1024:.1f} MiB "
+          f"({', '.join(f'{count} {kind}' for kind, count in sorted(library['kinds'].items()))})")
+    for stage, result in report["stages"].items():
+        written = f"{result['bytes_written'] / 1024 / 1024:.1f} MiB" if result["bytes_written"] is not None else "n/a"
+        memory = f"+{result['peak_rss_kib'] / 1024:.1f} MiB" if result["peak_rss_kib"] is not None else "n/a"
+        print(f"  {stage:<16} {result['seconds']:8.3f} s  {result['files']:6d} files  {result['files_per_second']:9.1f} files/s  "
+              f"written {written:>10}  peak memory {memory:>10}")
+
+    if comparison:
+        environment = report.get("compared_with", {})
+        print(f"Compared with commit {environment.get('commit') or 'unknown'} ({environment.get('time')}):")
+        if not report.get("same_parameters", True):
+            print("  (the earlier run used different parameters)")
+        for stage, before, after, change, regressed in comparison:
+            print(f"  {stage:<16} {before:9.1f} -> {after:9.1f} files/s ({change:+.1f}%)" + ("  REGRESSION" if regressed else ""))
+
+
+def benchmark_startup(repeat: int = 5) -> dict:
+    """
+    Times a cold start of each of STARTUP_CASES, each run in a fresh interpreter.
+
+    Parameters:
+    repeat: int - Number of timed runs of each case; the best and the median are reported.
+
+    Return dict - The environment, and for each case the best and median time inside the interpreter, the best
+    time of the whole process (including interpreter start-up), the heavy modules it loaded and any error.
+    """
+    cases = {}
+    for case in STARTUP_CASES:
+        times = []
+        process_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, case, *STARTUP_HEAVY_MODULES], cwd=APP_DIR, capture_output=True, text=True)
+            process_times.append(time.perf_counter() - start)
+            if completed.returncode != 0:
+                raise RuntimeError(f"startup case {case} failed:\n{completed.stderr}")
+            result = json.loads(completed.stdout.splitlines()[-1])
+            if result["error"] is not None:
+                break
+            times.append(result["seconds"])
+        cases[case] = {
+            "seconds": min(times) if times else None,
+            "median_seconds": statistics.median(times) if times else None,
+            "process_seconds": min(process_times),
+            "loaded": result["loaded"],
+            "error": result["error"],
+        }
+    return {"environment": _environment(), "repeat": repeat, "cases": cases}
+
+
+def print_startup_report(report: dict) -> None:
+    """
+    Prints a startup benchmark report in a readable form.
+
+    Parameters:
+    report: dict - Report returned by benchmark_startup.
+
+    No Return
+    """
+    print(f"Cold start, best of {report['repeat']} fresh interpreters:")
+    for case, result in report["cases"].items():
+        if result["error"] is not None:
+            print(f"  {case:<16} skipped: {result['error']}")
+            continue
+        print(f"  {case:<16} {result['seconds'] * 1000:7.1f} ms (median {result['median_seconds'] * 1000:7.1f} ms, "
+              f"whole process {result['process_seconds'] * 1000:7.1f} ms)  loads: {', '.join(result['loaded']) or '-'}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser for the benchmarks.
+
+    Return argparse.ArgumentParser - The argument parser.
+    """
+    parser = argparse.ArgumentParser(prog="python -m mp3cover.benchmark", description="Benchmarks for the MP3 Album Cover Embedder.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    resize_parser = subparsers.add_parser("resize", help="Compare the fast and full-decode cover resize.")
+    resize_parser.add_argument("--image", help="Source image. Defaults to a generated 3000x3000 JPEG.")
+    resize_parser.add_argument("--size", type=int, nargs=2, default=list(MECHEN_COVER_SIZE), metavar=("WIDTH", "HEIGHT"), help="Size to resize to.")
+    resize_parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path.")
+    resize_parser.add_argument("--min-psnr", type=float, default=DEFAULT_MIN_PSNR, help="Fail if the fast output's PSNR against the full output is lower (dB).")
+    resize_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    covers_parser = subparsers.add_parser("covers", help="Report how much the byte-budget encoder shrinks a library's covers.")
+    covers_parser.add_argument("--folder", required=True, help="Music folder to find the album covers in.")
+    covers_parser.add_argument("--covers-folder", help="Folder with <album>.jpg covers.")
+    covers_parser.add_argument("--profile", default=MECHEN_PROFILE.name, help="Device profile the covers are made for (default: %(default)s).")
+    covers_parser.add_argument("--settings", default=SETTINGS_FILE, help="Settings file the device profiles are read from (default: %(default)s).")
+    covers_parser.add_argument("--max-bytes", type=int, help="Byte budget per cover (defaults to the profile's max_bytes).")
+    covers_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    library_parser = subparsers.add_parser("library", help="Time scanning, resizing and embedding on a generated library.")
+    library_parser.add_argument("--albums", type=int, default=50, help="Number of albums to generate (default: %(default)s).")
+    library_parser.add_argument("--tracks", type=int, default=12, help="Tracks per album (default: %(default)s).")
+    library_parser.add_argument("--cover-sizes", type=int, nargs="+", default=[500, 1500, 3000], metavar="SIDE", help="Side lengths of the albums' cover.jpg files, used in turn (default: 500 1500 3000).")
+    library_parser.add_argument("--workers", type=int, default=4, help="Files the embed stages update at the same time (default: %(default)s).")
+    library_parser.add_argument("--repeat", type=int, default=3, help="Timed runs of the stages that don't change the library; the best is kept (default: %(default)s).")
+    library_parser.add_argument("--keep", metavar="FOLDER", help="Generate the library in FOLDER and keep it, instead of a temporary folder.")
+    library_parser.add_argument("--output", help="Save the results as JSON to this file.")
+    library_parser.add_argument("--compare", metavar="FILE", help="Compare files/sec with the results of an earlier run saved with --output.")
+    library_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Slowdown in percent allowed by --compare (default: %(default)s).")
+    library_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    startup_parser = subparsers.add_parser("startup", help="Time cold imports, --help and the GUI's first paint.")
+    startup_parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per case (default: %(default)s).")
+    startup_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """
+    Runs a benchmark from the command line.
+
+    Parameters:
+    argv: list - Command-line arguments, defaults to sys.argv[1:].
+
+    Return int - Exit code: 0 on success, 1 if a check failed.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.benchmark == "library":
+        if args.keep and os.path.exists(args.keep) and os.listdir(args.keep):
+            parser.error(f"--keep folder isn't empty: {args.keep}")
+        previous = None
+        if args.compare:
+            with open(args.compare) as file:
+                previous = json.load(file)
+
+        report = benchmark_library(args.albums, args.tracks, tuple(args.cover_sizes), args.workers, args.keep, args.repeat)
+        comparison = None
+        if previous is not None:
+            comparison = compare_library_reports(previous, report, args.tolerance)
+            report["compared_with"] = previous.get("environment", {})
+            report["same_parameters"] = previous.get("parameters") == report["parameters"]
+            report["comparison"] = [
+                {"stage": stage, "previous_files_per_second": before, "files_per_second": after, "change_percent": change, "regressed": regressed}
+                for stage, before, after, change, regressed in comparison
+            ]
+
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(report, file, indent=2)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_library_report(report, comparison)
+        return 1 if comparison and any(row[-1] for row in comparison) else 0
+
+    if args.benchmark == "startup":
+        report = benchmark_startup(args.repeat)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_startup_report(report)
+        return 0
+
+    if args.benchmark == "covers":
+        profiles = load_profiles(load_settings(args.settings))
+        if args.profile not in profiles:
+            parser.error(f"unknown device profile {args.profile!r} (available: {', '.join(profiles)})")
+        max_bytes = args.max_bytes or profiles[args.profile].max_bytes
+        if not max_bytes:
+            parser.error(f"profile {args.profile!r} has no max_bytes; give one with --max-bytes")
+        report = benchmark_covers(os.path.normpath(os.path.expanduser(args.folder)), profiles[args.profile], max_bytes, args.covers_folder)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_covers_report(report)
+        return 0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = args.image
+        if image_path is None:
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                image_path = pool.apply(make_test_image, (os.path.join(temp_dir, "cover.jpg"),))
+        report = benchmark_resize(image_path, tuple(args.size), args.repeat)
+
+    report["passed"] = report["psnr_db"] >= args.min_psnr
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_resize_report(report)
+        if not report["passed"]:
+            print(f"  FAILED: PSNR is below {args.min_psnr} dB")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+"""
+Command-line interface for non-interactive batch runs of the MP3 Album Cover Embedder.
+
+Examples:
+- python -m mp3cover --folder ~/Music --list
+- python -m mp3cover --folder ~/Music --cover cover.jpg --album "My Album" --resize
+- python -m mp3cover --folder ~/Music --batch --covers-folder ~/Covers --resize
+- python -m mp3cover --folder ~/Music --batch --profile "MECHEN 2.4" --target "Car stereo=/media/usb/Music"
+- python -m mp3cover --folder ~/Music --batch --run-log run_log.jsonl --cprofile run.pstats
+- python -m mp3cover --folder ~/Music --watch --profile "MECHEN 2.4"
+- python -m mp3cover --folder ~/Music --audit --profile "MECHEN 2.4" --workers 4 --csv audit.csv
+- python -m mp3cover --folder ~/Music --undo last --workers 4
+- python -m mp3cover --folder ~/Music --sync /media/sdcard/Music --profile "MECHEN 2.4" --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import nullcontext
+
+from .audit import audit_library
+from .batch import embed_library
+from .core import MECHEN_COVER_SIZE, fallback_album_name, get_albums, embed_album_cover_targets
+from .cover_cache import CoverCache
+from .journal import journaled_run, run_plan
+from .library_index import LibraryIndex
+from .profiles import legacy_profile, load_profiles
+from .runlog import RUN_LOG_NAME, RunStats, profiled, run_log_path, write_run_log
+from .settings import COVER_CACHE_DIR, INDEX_FILE, JOURNAL_FILE, SETTINGS_FILE, UNDO_DIR, load_settings
+from .sync import sync_library
+from .transforms import TAG_TRANSFORMS
+from .undo import UndoLog, list_undo_logs, read_undo_log, restore_tags, undo_log_path
+from .watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, watch_folder
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser for the command-line interface.
+
+    Return argparse.ArgumentParser - The argument parser.
+    """
+    parser = argparse.ArgumentParser(prog="python -m mp3cover", description="Embed album covers into MP3 files' metadata.")
+    parser.add_argument("--folder", required=True, help="Folder containing the MP3 files.")
+    parser.add_argument("--cover", help="Cover image to embed.")
+    parser.add_argument("--album", action="append", default=[], help="Album to embed the cover into (can be repeated). Defaults to the only album in the folder.")
+    parser.add_argument("--batch", action="store_true", help="Embed a cover into every album (or every --album), finding each cover automatically from cover.jpg/folder.jpg/<album>.jpg sidecars, --covers-folder or a cover already in one of the album's tracks.")
+    parser.add_argument("--watch", action="store_true", help="Keep running and embed covers into new or changed MP3 files as they arrive, finding each album's cover like --batch (stop with Ctrl+C).")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE, help="Seconds without newly finished files before --watch processes them (default: %(default)s).")
+    parser.add_argument("--polling", action="store_true", help="Make --watch poll the folder instead of using inotify.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between polls when --watch polls the folder (default: %(default)s).")
+    parser.add_argument("--sync", metavar="FOLDER", help="Copy the library (or every --album) to FOLDER, such as a player's music folder, embedding each album's cover on the way like --batch, without changing the library. Files whose copy is already current are skipped.")
+    parser.add_argument("--covers-folder", help="Folder with <album>.jpg covers used by --batch, --watch and --sync.")
+    parser.add_argument("--resize", action="store_true", help="Resize the cover to %dx%d for the MECHEN 2.4\" screen." % MECHEN_COVER_SIZE)
+    parser.add_argument("--profile", help="Device profile (from settings.json) to make the cover and write the tags for, instead of --resize.")
+    parser.add_argument("--max-bytes", type=int, help="Largest embedded cover in bytes; bigger covers are re-encoded with the quality and chroma subsampling that fit best (overrides the profile's max_bytes).")
+    parser.add_argument("--id3-version", type=int, choices=(3, 4), help="Write the tags as ID3v2.3 or ID3v2.4 (overrides the profile's id3_version).")
+    parser.add_argument("--tag-transform", action="append", default=[], choices=list(TAG_TRANSFORMS), metavar="NAME", help="Also apply this tag transform in the same save, after the profile's tag_transforms (can be repeated; one of: %(choices)s).")
+    parser.add_argument("--target", action="append", default=[], metavar="PROFILE=FOLDER", help="Also embed into another copy of the library, such as a player's music folder, with the cover variant of PROFILE (can be repeated).")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help="Settings file the device profiles are read from (default: %(default)s).")
+    parser.add_argument("--embed-folder", help="Folder to save the embed example image in (not saved if omitted).")
+    parser.add_argument("--skip-unchanged", action="store_true", help="Don't rewrite files that already have this cover and the Latin-1 text encodings.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of MP3 files to update in parallel (default: 1).")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of a thread pool for --workers.")
+    parser.add_argument("--pipeline", action="store_true", help="Embed with an asyncio pipeline that overlaps reading, building and writing the tags through bounded queues, with --workers reads and writes at a time.")
+    parser.add_argument("--no-recursive", action="store_true", help="Only scan the folder itself, not its subfolders.")
+    parser.add_argument("--full-scan", action="store_true", help="Fully parse every MP3 file when scanning instead of reading only the ID3 tags.")
+    parser.add_argument("--index", default=INDEX_FILE, help="Library index used to skip unchanged files when scanning (default: %(default)s).")
+    parser.add_argument("--no-index", action="store_true", help="Scan every file without using the library index.")
+    parser.add_argument("--cache-dir", default=COVER_CACHE_DIR, help="Cache of processed covers, so the same cover isn't decoded and encoded again (default: %(default)s).")
+    parser.add_argument("--no-cache", action="store_true", help="Process the cover without using the cover cache.")
+    parser.add_argument("--journal", default=JOURNAL_FILE, help="Checkpoint journal of the run; running the same job again after a crash skips the files already done (default: %(default)s).")
+    parser.add_argument("--no-journal", action="store_true", help="Run without the checkpoint journal.")
+    parser.add_argument("--undo-dir", default=UNDO_DIR, help="Folder of the undo logs, which keep the original tags of every file a run changes (default: %(default)s).")
+    parser.add_argument("--no-undo", action="store_true", help="Run without saving an undo log.")
+    parser.add_argument("--undo", metavar="LOG", help="Put back the original tags saved in the undo log LOG (or 'last' for the newest one in --undo-dir) for the files in --folder, then exit.")
+    parser.add_argument("--list", action="store_true", help="List the albums found in the folder and exit.")
+    parser.add_argument("--audit", action="store_true", help="Fully parse every MP3 file in parallel and report corrupt or truncated files, missing, extra, oversized or unreadable covers (checked against --profile), albums with mismatched covers and text Latin-1 can't hold, then exit.")
+    parser.add_argument("--csv", metavar="PATH", help="Also save the problems --audit finds to PATH as CSV.")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of text.")
+    parser.add_argument("--run-log", help="Append the per-stage timings, byte counts and errors of the run as one JSON line to this file (default: %s next to --embed-folder, if given)." % RUN_LOG_NAME)
+    parser.add_argument("--cprofile", metavar="PATH", help="Profile the whole run with cProfile and save the stats to PATH (read them with python -m pstats).")
+    return parser
+
+
+def parse_target(value: str, profiles: dict) -> tuple:
+    """
+    Parses a --target value.
+
+    Parameters:
+    value: str - The value, PROFILE=FOLDER.
+    profiles: dict - DeviceProfile objects keyed by name.
+
+    Return tuple - (folder, DeviceProfile).
+    """
+    profile_name, separator, target_folder = value.partition("=")
+    if not separator or not target_folder:
+        raise ValueError(f"--target must be PROFILE=FOLDER, got {value!r}")
+    if profile_name not in profiles:
+        raise ValueError(f"unknown device profile {profile_name!r} (available: {', '.join(profiles)})")
+    target_folder = os.path.normpath(os.path.expanduser(target_folder))
+    if not os.path.isdir(target_folder):
+        raise ValueError(f"target folder not found: {target_folder}")
+    return target_folder, profiles[profile_name]
+
+
+def print_results(results: list) -> None:
+    """
+    Prints a text summary of embed results.
+
+    Parameters:
+    results: list - EmbedResult of each album.
+
+    No Return
+    """
+    for result in results:
+        in_place_count = len(result.updated_files) - len(result.rewritten_files)
+        label = f"{result.album_name} [{result.profile}: {result.folder}]" if result.profile else result.album_name
+        print(f"{label}: {len(result.updated_files)} written ({in_place_count} in place, {len(result.rewritten_files)} full rewrites), "
+              f"{len(result.skipped_files)} skipped (unchanged), {len(result.errors)} failed")
+        if result.resumed_files:
+            print(f"  {len(result.resumed_files)} already done by the interrupted run")
+        if result.tag_sizes:
+            before = sum(sizes[0] for sizes in result.tag_sizes.values())
+            after = sum(sizes[1] for sizes in result.tag_sizes.values())
+            print(f"  Tags of written files: {before / 1024:.1f} KB before, {after / 1024:.1f} KB after")
+        for mp3_file, message in result.errors:
+            print(f"  Error updating {mp3_file}: {message}", file=sys.stderr)
+        if result.embed_example_path:
+            print(f"  Embed example: {result.embed_example_path}")
+
+
+def main(argv: list = None) -> int:
+    """
+    Runs the command-line interface.
+
+    Parameters:
+    argv: list - Command-line arguments (defaults to sys.argv[1:]).
+
+    Return int - The process exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    folder = os.path.normpath(os.path.expanduser(args.folder))
+    if not os.path.isdir(folder):
+        parser.error(f"folder not found: {folder}")
+
+    try:
+        profiles = load_profiles(load_settings(args.settings))
+        targets = [parse_target(value, profiles) for value in args.target]
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.pipeline and args.processes:
+        parser.error("--pipeline can't be combined with --processes")
+    if args.debounce <= 0:
+        parser.error("--debounce must be positive")
+    if args.poll_interval <= 0:
+        parser.error("--poll-interval must be positive")
+    if args.profile and args.resize:
+        parser.error("--resize can't be combined with --profile")
+    if args.profile and args.profile not in profiles:
+        parser.error(f"unknown device profile {args.profile!r} (available: {', '.join(profiles)})")
+    profile = profiles[args.profile] if args.profile else legacy_profile(args.resize)
+    if args.max_bytes is not None:
+        if args.max_bytes < 1:
+            parser.error("--max-bytes must be positive")
+        profile = profile.copy(max_bytes=args.max_bytes)
+    if args.id3_version is not None:
+        profile = profile.copy(id3_version=args.id3_version)
+    if args.tag_transform:
+        profile = profile.copy(tag_transforms=profile.tag_transforms + tuple(args.tag_transform))
+
+    stats = RunStats()
+    with profiled(args.cprofile):
+        exit_code = run(args, parser, folder, profile, targets, stats)
+
+    log_path = args.run_log or (run_log_path(args.embed_folder) if args.embed_folder else None)
+    if log_path:
+        mode = "watch" if args.watch else "list" if args.list else "audit" if args.audit else "undo" if args.undo else "batch" if args.batch else "sync" if args.sync else "album"
+        write_run_log(log_path, stats, folder=folder, mode=mode, profile=profile.name, workers=args.workers, exit_code=exit_code)
+
+    return exit_code
+
+
+def run(args: argparse.Namespace, parser: argparse.ArgumentParser, folder: str, profile, targets: list, stats: RunStats) -> int:
+    """
+    Scans the folder and lists the albums or embeds the covers, as the parsed arguments say.
+
+    Parameters:
+    args: argparse.Namespace - The parsed arguments.
+    parser: argparse.ArgumentParser - The parser, for reporting usage errors.
+    folder: str - The normalized music folder.
+    profile: mp3cover.DeviceProfile - Device profile for the covers in folder.
+    targets: list - More (folder, DeviceProfile) pairs from --target.
+    stats: mp3cover.RunStats - Records the time spent in each stage.
+
+    Return int - The process exit code.
+    """
+    if args.watch:
+        if args.cover or args.batch or args.list or args.sync or args.audit or args.undo or targets:
+            parser.error("--watch can't be combined with --cover, --batch, --list, --sync, --audit, --undo or --target")
+        return watch(args, folder, profile, stats)
+
+    if args.undo:
+        if args.cover or args.batch or args.list or args.sync or args.audit or targets:
+            parser.error("--undo can't be combined with --cover, --batch, --list, --sync, --audit or --target")
+        return undo(args, parser, folder, stats)
+
+    if args.audit:
+        if args.cover or args.batch or args.list or args.sync or targets or args.pipeline:
+            parser.error("--audit can't be combined with --cover, --batch, --list, --sync, --target or --pipeline")
+        return audit(args, folder, profile, stats)
+    if args.csv:
+        parser.error("--csv is only used with --audit")
+
+    if args.sync:
+        if args.cover or args.batch or targets or args.processes or args.pipeline:
+            parser.error("--sync can't be combined with --cover, --batch, --target, --processes or --pipeline")
+        sync_folder = os.path.normpath(os.path.expanduser(args.sync))
+        if not os.path.isdir(sync_folder):
+            parser.error(f"sync folder not found: {sync_folder}")
+        try:
+            inside_folder = os.path.commonpath([os.path.abspath(folder), os.path.abspath(sync_folder)]) == os.path.abspath(folder)
+        except ValueError:
+            # On different drives
+            inside_folder = False
+        if inside_folder:
+            parser.error("the --sync folder can't be --folder or inside it")
+
+    if args.no_index:
+        albums, corrupted_files = get_albums(folder, not args.full_scan, recursive=not args.no_recursive, stats=stats)
+    else:
+        with LibraryIndex(args.index) as index:
+            albums, corrupted_files = get_albums(folder, not args.full_scan, index=index, recursive=not args.no_recursive, stats=stats)
+    if not albums and corrupted_files:
+        albums = {fallback_album_name(f): [f] for f in corrupted_files}
+
+    if args.list:
+        if args.json:
+            print(json.dumps({"albums": albums, "corrupted_files": corrupted_files}, indent=2))
+        else:
+            for album_name, mp3_files in albums.items():
+                print(f"{album_name} ({len(mp3_files)} files)")
+            for mp3_file in corrupted_files:
+                print(f"Unreadable: {mp3_file}", file=sys.stderr)
+        return 0
+
+    if args.sync:
+        if args.album:
+            missing = [album_name for album_name in args.album if album_name not in albums]
+            if missing:
+                parser.error("album not found: " + ", ".join(missing))
+            albums, corrupted_files = {album_name: albums[album_name] for album_name in args.album}, []
+        return sync(args, folder, sync_folder, profile, albums, corrupted_files, stats)
+
+    if args.batch:
+        if args.cover:
+            parser.error("--cover can't be combined with --batch, which finds each album's cover")
+    elif not args.cover:
+        parser.error("--cover is required unless --list or --batch is given")
+    elif not os.path.isfile(args.cover):
+        parser.error(f"cover image not found: {args.cover}")
+    if not albums:
+        print(f"No MP3 files found in {folder}", file=sys.stderr)
+        return 1
+
+    selected_albums = args.album
+    if not selected_albums and args.batch:
+        selected_albums = list(albums)
+    elif not selected_albums:
+        if len(albums) != 1:
+            parser.error("the folder has %d albums; choose one or more with --album (see --list)" % len(albums))
+        selected_albums = list(albums)
+
+    missing = [album_name for album_name in selected_albums if album_name not in albums]
+    if missing:
+        parser.error("album not found: " + ", ".join(missing))
+
+    cache = None if args.no_cache else CoverCache(args.cache_dir)
+    selected = {album_name: albums[album_name] for album_name in selected_albums}
+    if args.no_journal:
+        journaled = nullcontext()
+    else:
+        journaled = journaled_run(args.journal, run_plan([(folder, profile)] + targets, selected, args.cover))
+
+    undo_context = nullcontext() if args.no_undo else UndoLog(undo_log_path(args.undo_dir))
+
+    with journaled as journal, undo_context as undo_log:
+        if journal is not None and journal.resumed:
+            print(f"Resuming an interrupted run: {len(journal.completed)} file(s) already done", file=sys.stderr)
+        exit_code = embed(args, folder, profile, targets, selected, cache, stats, journal, undo_log)
+    if undo_log is not None and undo_log.paths:
+        print(f"Original tags saved to {undo_log.path} (put them back with --undo last)", file=sys.stderr)
+    return exit_code
+
+
+def watch(args: argparse.Namespace, folder: str, profile, stats: RunStats) -> int:
+    """
+    Watches the folder and embeds covers into new or changed MP3 files until interrupted, printing each result.
+
+    Parameters:
+    args: argparse.Namespace - The parsed arguments.
+    folder: str - The normalized music folder.
+    profile: mp3cover.DeviceProfile - Device profile to make the covers and write the tags for.
+    stats: mp3cover.RunStats - Records the time spent in each stage.
+
+    Return int - The process exit code.
+    """
+    def on_results(directory: str, results: list, missing_covers: list) -> None:
+        if args.json:
+            print(json.dumps({"folder": directory, "results": [result.to_dict() for result in results], "missing_covers": missing_covers}), flush=True)
+            return
+        print_results(results)
+        for album_name in missing_covers:
+            print(f"No cover found for: {album_name} ({directory})", file=sys.stderr)
+        sys.stdout.flush()
+
+    cache = None if args.no_cache else CoverCache(args.cache_dir)
+    print(f"Watching {folder} for new MP3 files (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        if args.no_index:
+            watch_folder(folder, profile, args.covers_folder, not args.no_recursive, args.debounce, args.poll_interval, args.polling,
+                         args.workers, args.processes, cache, on_results=on_results, stats=stats)
+        else:
+            with LibraryIndex(args.index) as index:
+                watch_folder(folder, profile, args.covers_folder, not args.no_recursive, args.debounce, args.poll_interval, args.polling,
+                             args.workers, args.processes, cache, index, on_results, stats=stats)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def undo(args: argparse.Namespace, parser: argparse.ArgumentParser, folder: str, stats: RunStats) -> int:
+    """
+    Puts back the original tags saved in an undo log for the files in the folder and prints the result.
+
+    Parameters:
+    args: argparse.Namespace - The parsed arguments.
+    parser: argparse.ArgumentParser - The parser, for reporting usage errors.
+    folder: str - The normalized music folder; files of the log outside it are left alone.
+    stats: mp3cover.RunStats - Records the time spent in each stage.
+
+    Return int - The process exit code.
+    """
+    if args.undo == "last":
+        undo_logs = list_undo_logs(args.undo_dir)
+        if not undo_logs:
+            parser.error(f"no undo logs found in {args.undo_dir}")
+        log_path = undo_logs[0]
+    else:
+        log_path = args.undo
+    try:
+        snapshots = read_undo_log(log_path)
+    except (OSError, ValueError) as e:
+        parser.error(f"can't read undo log {log_path}: {e}")
+
+    folder_prefix = os.path.join(os.path.abspath(folder), "")
+    in_folder = [snapshot for snapshot in snapshots if snapshot.path.startswith(folder_prefix)]
+    result = restore_tags(in_folder, args.workers, stats=stats)
+    if args.undo == "last" and not result.errors and len(in_folder) == len(snapshots):
+        # The run is fully undone, so the next --undo last goes back one more run
+        os.remove(log_path)
+    if args.json:
+        print(json.dumps(dict(result.to_dict(), undo_log=log_path), indent=2))
+    else:
+        print(f"{log_path}: {len(result.restored)} file(s) restored, {len(result.unchanged)} already had their original tags")
+        for mp3_file, message in result.errors:
+            print(f"Error restoring {mp3_file}: {message}", file=sys.stderr)
+    return 1 if result.errors else 0
+
+
+def audit(args: argparse.Namespace, folder: str, profile, stats: RunStats) -> int:
+    """
+    Audits every MP3 file in the folder and prints the problems found.
+
+    Parameters:
+    args: argparse.Namespace - The parsed arguments.
+    folder: str - The normalized music folder.
+    profile: mp3cover.DeviceProfile - Device profile covers are checked against.
+    stats: mp3cover.RunStats - Records the time spent in each stage.
+
+    Return int - The process exit code.
+    """
+    report = audit_library(folder, profile, args.workers, args.processes, not args.no_recursive, stats=stats)
+    if args.csv:
+        try:
+            report.write_csv(args.csv)
+        except OSError as e:
+            print(f"Could not save {args.csv}: {e}", file=sys.stderr)
+            return 1
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        for issue in report.issues:
+            print(f"{issue['file'] or issue['album']}: {issue['issue']}: {issue['detail']}")
+        counts = ", ".join(f"{count} {issue}" for issue, count in sorted(report.counts().items())) or "no problems"
+        print(f"{report.files_checked} file(s) checked: {counts}")
+        albums_to_embed = report.albums_to_embed()
+        if albums_to_embed:
+            print(f"{len(albums_to_embed)} album(s) need their cover embedded again (see --json for the list)")
+    return 1 if report.issues else 0
+
+
+def sync(args: argparse.Namespace, folder: str, sync_folder: str, profile, albums: dict, corrupted_files: list, stats: RunStats) -> int:
+    """
+    Syncs the albums to the sync folder with their covers embedded and prints the result.
+
+    Parameters:
+    args: argparse.Namespace - The parsed arguments.
+    folder: str - The normalized music folder.
+    sync_folder: str - The normalized folder to sync to.
+    profile: mp3cover.DeviceProfile - Device profile to make the covers and write the tags for.
+    albums: dict - The selected album names mapped to their MP3 files.
+    corrupted_files: list - Unreadable MP3 files to copy unchanged.
+    stats: mp3cover.RunStats - Records the time spent in each stage.
+
+    Return int - The process exit code.
+    """
+    cache = None if args.no_cache else CoverCache(args.cache_dir)
+    result = sync_library(folder, sync_folder, albums, profile, args.covers_folder, corrupted_files, args.workers, cache, stats=stats)
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print(f"{len(result.written)} file(s) written with their cover, {len(result.copied)} copied unchanged, "
+              f"{len(result.skipped)} already up to date ({result.bytes_written / 1e6:.1f} MB written)")
+        for album_name in result.missing_covers:
+            print(f"No cover found for: {album_name}", file=sys.stderr)
+        for mp3_file, message in result.errors:
+            print(f"Error syncing {mp3_file}: {message}", file=sys.stderr)
+    return 1 if result.errors else 0
+
+
+def embed(args: argparse.Namespace, folder: str, profile, targets: list, albums: dict, cache, stats: RunStats, journal, undo_log) -> int:
+    """
+    Embeds the covers into the selected albums and prints the results.
+
+    Parameters:
+    args: argparse.Namespace - The parsed arguments.
+    folder: str - The normalized music folder.
+    profile: mp3cover.DeviceProfile - Device profile for the covers in folder.
+    targets: list - More (folder, DeviceProfile) pairs from --target.
+    albums: dict - The selected album names mapped to their MP3 files.
+    cache: mp3cover.CoverCache - Cache of processed covers, or None.
+    stats: mp3cover.RunStats - Records the time spent in each stage.
+    journal: mp3cover.RunJournal - Checkpoint journal of the run, or None.
+    undo_log: mp3cover.UndoLog - Undo log of the run, or None.
+
+    Return int - The process exit code.
+    """
+    if args.batch:
+        batch = embed_library(folder, albums, args.resize, args.covers_folder,
+                              args.embed_folder, args.workers, args.processes, cache=cache, skip_unchanged=args.skip_unchanged,
+                              profile=profile, targets=targets, stats=stats, journal=journal, pipeline=args.pipeline, undo=undo_log)
+        if args.json:
+            print(json.dumps(batch.to_dict(), indent=2))
+        else:
+            print_results(batch.results)
+            print(f"{len(batch.results)} album(s) processed, {batch.covers_encoded} distinct cover(s) encoded")
+            for album_name in batch.missing_covers:
+                print(f"No cover found for: {album_name}", file=sys.stderr)
+        return 1 if batch.missing_covers or any(result.errors for result in batch.results) else 0
+
+    results = []
+    for album_name, mp3_files in albums.items():
+        results.extend(embed_album_cover_targets([(folder, profile)] + targets, args.cover, album_name, mp3_files, args.embed_folder,
+                                                 args.workers, args.processes, cache=cache, skip_unchanged=args.skip_unchanged, stats=stats, journal=journal,
+                                                 pipeline=args.pipeline, undo=undo_log))
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        print_results(results)
+
+    return 1 if any(result.errors for result in results) else 0
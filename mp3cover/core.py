@@ -0,0 +1,1250 @@
+"""
+Core scan, resize and embed logic for the MP3 Album Cover Embedder.
+
+Nothing in this module depends on tkinter, so it can be driven from the GUI,
+from the command line (python -m mp3cover) or from other scripts.
+"""
+import os
+import io
+import math
+import re
+import time
+from contextlib import nullcontext
+from mutagen import MutagenError
+from mutagen.mp3 import MP3, HeaderNotFoundError
+from mutagen.id3 import ID3, APIC, error as ID3Error, ID3NoHeaderError
+
+from .cover_cache import cache_key, source_hash
+from .fastscan import cover_hash, read_album_info
+from .journal import completion_key
+from .library_index import IndexEntry
+from .profiles import MECHEN_COVER_SIZE, DEFAULT_JPEG_QUALITY, DEFAULT_ID3_VERSION, DeviceProfile, legacy_profile
+from .runlog import RunStats
+from .scanner import iter_mp3_dirs, iter_mp3_files
+from .transforms import apply_transforms, transforms_pending
+from .undo import UndoError, take_snapshot
+
+# Errors raised by mutagen (or the filesystem) for unreadable or broken MP3 files
+READ_ERRORS = (ID3Error, IOError, HeaderNotFoundError, ID3NoHeaderError, MutagenError)
+
+# Errors that fail one file of an embed, including a tag header the undo log can't make sense of
+_EMBED_ERRORS = READ_ERRORS + (UndoError,)
+
+# Lowest JPEG quality tried when a cover has to fit a profile's max_bytes
+MIN_JPEG_QUALITY = 20
+
+# Chroma subsamplings tried when a cover has to fit a profile's max_bytes: full colour
+# resolution, and Pillow's default of half the colour resolution in both directions
+JPEG_SUBSAMPLINGS = ("4:4:4", "4:2:0")
+
+# Parsed files each bounded queue of the embed pipeline holds; together with the reads and writes
+# in flight this caps how many files are in memory at once, however large the album
+PIPELINE_QUEUE_SIZE = 8
+
+# Smallest padding reserved when a tag has to grow, so later covers can be written in place
+MIN_TAG_PADDING = 16 * 1024
+
+# What happened to a file when the cover was embedded
+WRITE_SKIPPED = "skipped"
+WRITE_IN_PLACE = "in_place"
+WRITE_REWRITTEN = "rewritten"
+
+# Text frames the MECHEN player only shows correctly with Latin-1 (encoding 0)
+LATIN1_TEXT_FRAMES = ('TALB', 'TPE1', 'TIT2')
+
+# Cover data and options handed to each process pool worker once, instead of once per task
+_worker_cover_data = None
+_worker_skip_unchanged = False
+_worker_id3_version = DEFAULT_ID3_VERSION
+_worker_transforms = ()
+
+
+class EmbedResult:
+    """
+    The outcome of embedding a cover into the MP3 files of one album.
+
+    Attributes:
+    album_name: str - Name of the album.
+    folder: str - Folder the MP3 files are in, or None.
+    profile: str - Name of the device profile the cover was made for, or None.
+    updated_files: list - Paths of the MP3 files that were written.
+    skipped_files: list - Paths of the MP3 files that already had the cover and were left untouched.
+    rewritten_files: list - Paths of the written files whose tag outgrew its padding, so the whole file was rewritten.
+    resumed_files: list - Paths of the MP3 files an interrupted run had already finished, which were left untouched.
+    errors: list - (mp3_file, message) pairs for files that could not be updated.
+    tag_sizes: dict - (before, after) size in bytes of the ID3 tag region of each written file, keyed by path.
+    embed_example_path: str - Path to the saved embed example image, or None.
+    cancelled: bool - Whether the run was cancelled before all files were processed.
+    """
+
+    def __init__(self, album_name: str):
+        """
+        Initializes an empty EmbedResult.
+
+        Parameters:
+        album_name: str - Name of the album.
+        """
+        self.album_name = album_name
+        self.folder = None
+        self.profile = None
+        self.updated_files = []
+        self.skipped_files = []
+        self.rewritten_files = []
+        self.resumed_files = []
+        self.errors = []
+        self.tag_sizes = {}
+        self.embed_example_path = None
+        self.cancelled = False
+
+    def to_dict(self) -> dict:
+        """
+        Converts the result to a JSON-serializable dictionary.
+
+        Return dict - The result as a dictionary.
+        """
+        return {
+            "album_name": self.album_name,
+            "folder": self.folder,
+            "profile": self.profile,
+            "updated_files": self.updated_files,
+            "skipped_files": self.skipped_files,
+            "written_count": len(self.updated_files),
+            "skipped_count": len(self.skipped_files),
+            "in_place_count": len(self.updated_files) - len(self.rewritten_files),
+            "rewritten_count": len(self.rewritten_files),
+            "resumed_count": len(self.resumed_files),
+            "errors": [{"file": mp3_file, "error": message} for mp3_file, message in self.errors],
+            "tag_sizes": {mp3_path: list(sizes) for mp3_path, sizes in self.tag_sizes.items()},
+            "tag_bytes_before": sum(before for before, after in self.tag_sizes.values()),
+            "tag_bytes_after": sum(after for before, after in self.tag_sizes.values()),
+            "embed_example_path": self.embed_example_path,
+            "cancelled": self.cancelled,
+        }
+
+
+def list_mp3_files(folder: str, recursive: bool = True) -> list:
+    """
+    Lists the MP3 files in the given folder.
+
+    Parameters:
+    folder: str - Path to the folder containing MP3 files.
+    recursive: bool - Whether to include MP3 files in subfolders.
+
+    Return list - Paths of the MP3 files, relative to the folder.
+    """
+    return list(iter_mp3_files(folder, recursive))
+
+
+def default_album_name(mp3_file: str) -> str:
+    """
+    Creates a default album name based on the filename, for files without a TALB frame.
+
+    Parameters:
+    mp3_file: str - File name of the MP3 file.
+
+    Return str - The derived album name.
+    """
+    default_name = os.path.splitext(os.path.basename(mp3_file))[0]
+
+    # Replace underscores and multiple spaces
+    default_name = re.sub(r'[_]', ' ', default_name)
+    default_name = re.sub(r' +', ' ', default_name)
+
+    # Add space between word and number if not already present
+    default_name = re.sub(r'(?<=\D)(?=\d)', ' ', default_name)
+
+    # Ensure " - " stays as it is
+    default_name = re.sub(r' - ', ' - ', default_name)
+
+    # Title case while ensuring words with three or fewer characters and apostrophes are handled correctly
+    words = default_name.split()
+    for j, word in enumerate(words):
+        if '-' in word:
+            subwords = word.split('-')
+            subwords = [subwords[0].capitalize()] + [sw if len(sw) <= 3 else sw.capitalize() for sw in subwords[1:]]
+            words[j] = '-'.join(subwords)
+        elif len(word) <= 3 or (len(word) == 4 and "'" in word):
+            words[j] = word.lower()
+        else:
+            words[j] = word.capitalize()
+    return ' '.join(words)
+
+
+def fallback_album_name(mp3_file: str) -> str:
+    """
+    Creates the simple title-cased album name used when no albums could be read at all.
+
+    Parameters:
+    mp3_file: str - File name of the MP3 file.
+
+    Return str - The derived album name.
+    """
+    return os.path.splitext(os.path.basename(mp3_file))[0].replace('_', ' ').replace('-', ' ').title()
+
+
+def iter_album_folders(folder: str, fast: bool = True, progress=None, cancel_event=None, index=None, recursive: bool = True, stats=None):
+    """
+    Walks the MP3 folder and yields the albums of each directory as soon as that directory has been read,
+    so callers can start working before the whole tree has been walked.
+
+    Parameters:
+    folder: str - Path to the folder containing MP3 files.
+    fast: bool - Whether to read only the ID3 tags (see mp3cover.fastscan) instead of fully parsing every file.
+    progress: callable - Called as progress(done, None) after each file, since the total isn't known up front (optional).
+    cancel_event: threading.Event - Stops the scan between files once set (optional).
+    index: mp3cover.LibraryIndex - Index used to skip files that haven't changed since the last scan (optional).
+    recursive: bool - Whether to scan subfolders too.
+    stats: mp3cover.RunStats - Records the scan_list, scan_index and scan_file stages (optional).
+
+    Yield tuple - (directory, albums, corrupted_files) where albums is a dictionary with album names as keys and
+    lists of MP3 files (relative to folder) as values, and corrupted_files lists the files that could not be read.
+    """
+    folder = os.path.abspath(folder)
+    prefix_length = len(os.path.join(folder, ""))
+    seen_directories = set()
+    done = 0
+    # Listing time is measured from the previous yield, so the caller's own work isn't counted
+    listing_started = time.perf_counter()
+
+    for directory, entries in iter_mp3_dirs(folder, recursive, cancel_event):
+        if stats is not None:
+            stats.record("scan_list", time.perf_counter() - listing_started)
+
+        if index is not None:
+            started = time.perf_counter()
+            known_entries = index.load_folder(directory)
+            if stats is not None:
+                stats.record("scan_index", time.perf_counter() - started)
+        else:
+            known_entries = {}
+        albums = {}
+        corrupted_files = []
+
+        for entry in entries:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+
+            mp3_file = entry.path[prefix_length:]
+            started = time.perf_counter()
+            album_name = _scan_entry(entry, fast, index, known_entries)
+            if stats is not None:
+                stats.record("scan_file", time.perf_counter() - started, error=album_name is None)
+            if album_name is None:
+                corrupted_files.append(mp3_file)
+            else:
+                albums.setdefault(album_name, []).append(mp3_file)
+
+            done += 1
+            if progress is not None:
+                progress(done, None)
+
+        if index is not None:
+            seen_directories.add(directory)
+            seen_names = {entry.path for entry in entries}
+            index.remove(path for path in known_entries if path not in seen_names)
+
+        yield directory, albums, corrupted_files
+        listing_started = time.perf_counter()
+
+    if index is not None and recursive and not (cancel_event is not None and cancel_event.is_set()):
+        # Forget folders that were deleted or no longer contain MP3 files
+        index.remove_folders(index.folders_under(folder) - seen_directories)
+
+
+def get_albums(folder: str, fast: bool = True, progress=None, cancel_event=None, index=None, recursive: bool = True, stats=None) -> tuple:
+    """
+    Retrieves albums from the given MP3 folder and its subfolders.
+
+    Parameters:
+    folder: str - Path to the folder containing MP3 files.
+    fast: bool - Whether to read only the ID3 tags (see mp3cover.fastscan) instead of fully parsing every file.
+    progress: callable - Called as progress(done, None) after each file (optional).
+    cancel_event: threading.Event - Stops the scan between files once set (optional).
+    index: mp3cover.LibraryIndex - Index used to skip files that haven't changed since the last scan (optional).
+    recursive: bool - Whether to scan subfolders too.
+    stats: mp3cover.RunStats - Records the time spent in each scan stage (optional).
+
+    Return tuple - (albums, corrupted_files) where albums is a dictionary with album names as keys
+    and lists of MP3 files (relative to folder) as values, and corrupted_files lists the files that could not be read.
+    """
+    albums = {}
+    corrupted_files = []
+
+    for directory, directory_albums, directory_corrupted_files in iter_album_folders(folder, fast, progress, cancel_event, index, recursive, stats):
+        for album_name, mp3_files in directory_albums.items():
+            albums.setdefault(album_name, []).extend(mp3_files)
+        corrupted_files.extend(directory_corrupted_files)
+
+    return albums, corrupted_files
+
+
+def _scan_entry(entry: os.DirEntry, fast: bool, index, known_entries: dict) -> str:
+    """
+    Reads the album name of one MP3 file, using the index entry if the file hasn't changed.
+
+    Parameters:
+    entry: os.DirEntry - Directory entry of the MP3 file.
+    fast: bool - Whether to use the fast tag-only scan.
+    index: mp3cover.LibraryIndex - Index to read from and update, or None.
+    known_entries: dict - Index entries of the file's directory, keyed by path.
+
+    Return str - The album name (derived from the filename if the tags have none), or None if the file can't be read.
+    """
+    if index is None:
+        try:
+            album_name, has_cover, picture_hash = read_album_info(entry.path, fast)
+        except READ_ERRORS:
+            return None
+        return album_name or default_album_name(entry.name)
+
+    try:
+        stat_result = entry.stat()
+    except OSError:
+        return None
+
+    indexed = known_entries.get(entry.path)
+    if indexed is None or not indexed.matches(stat_result):
+        indexed = _index_file(entry.path, stat_result, fast)
+        index.put(indexed)
+    return None if indexed.corrupt else (indexed.album_name or indexed.default_album_name)
+
+
+def _index_file(mp3_path: str, stat_result: os.stat_result, fast: bool) -> IndexEntry:
+    """
+    Reads the tags of a new or changed file into an index entry.
+
+    Parameters:
+    mp3_path: str - Absolute path to the MP3 file.
+    stat_result: os.stat_result - Stat of the file taken before reading it.
+    fast: bool - Whether to use the fast tag-only scan.
+
+    Return IndexEntry - The entry for the file.
+    """
+    entry = IndexEntry(mp3_path, stat_result.st_size, stat_result.st_mtime_ns)
+    try:
+        entry.album_name, entry.has_cover, entry.cover_hash = read_album_info(mp3_path, fast, hash_cover=True)
+    except READ_ERRORS:
+        entry.corrupt = True
+    if not entry.album_name:
+        entry.album_name = None
+        entry.default_album_name = default_album_name(mp3_path)
+    return entry
+
+
+def load_cover_image(cover_image_path) -> "Image.Image":
+    """
+    Opens the cover image and converts it to RGB.
+
+    Parameters:
+    cover_image_path: str - Path to the cover image file (or a binary file object).
+
+    Return Image - The cover image.
+    """
+    from PIL import Image
+
+    return Image.open(cover_image_path).convert("RGB")
+
+
+def decode_near_size(cover_image_path, *sizes: tuple) -> "Image.Image":
+    """
+    Decodes the cover image at a reduced resolution that is still at least twice every target size.
+
+    JPEG images are decoded with DCT scaling (Image.draft), which skips most of the decoding work
+    and memory for large scans; other formats are decoded fully and then shrunk with Image.reduce.
+    Either way the final high-quality resample in resize_cover_image works from a much smaller image.
+
+    Parameters:
+    cover_image_path: str - Path to the cover image file (or a binary file object).
+    sizes: tuple - (width, height) sizes the image will be fitted to, so one decode serves all of them.
+
+    Return Image - The decoded RGB image.
+    """
+    from PIL import Image
+
+    cover_image = Image.open(cover_image_path)
+    width, height = cover_image.size
+
+    # Scale that keeps the region ImageOps.fit crops out at twice the width of every target
+    scale = max((2 * target_width / min(width, height * target_width / target_height)
+                 for target_width, target_height in sizes), default=1)
+
+    if scale < 1 and cover_image.format == 'JPEG':
+        cover_image.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+
+    cover_image = cover_image.convert("RGB")
+
+    factor = int(1 / scale * cover_image.width / width) if scale < 1 else 1
+    if factor >= 2:
+        cover_image = cover_image.reduce(factor)
+
+    return cover_image
+
+
+def resize_cover_image(cover_image_path, size: tuple = MECHEN_COVER_SIZE, fast: bool = True) -> "Image.Image":
+    """
+    Resizes the cover image to the given size (240x240 pixels by default).
+
+    Parameters:
+    cover_image_path: str - Path to the cover image file (or a binary file object).
+    size: tuple - (width, height) of the resized image.
+    fast: bool - Whether to decode large images at a reduced resolution first (see decode_near_size).
+
+    Return Image - The resized cover image.
+    """
+    from PIL import Image, ImageOps
+
+    if fast:
+        cover_image = decode_near_size(cover_image_path, size)
+    else:
+        cover_image = load_cover_image(cover_image_path)
+    return ImageOps.fit(cover_image, size, method=Image.LANCZOS, bleed=0.0, centering=(0.5, 0.5))
+
+
+def embed_example_path(embed_folder: str, album_name: str, cover_image_path: str, profile_name: str = None) -> str:
+    """
+    Builds the path the embed example image is saved to, creating its folder.
+
+    Parameters:
+    embed_folder: str - Folder where embed example images are saved.
+    album_name: str - Name of the album.
+    cover_image_path: str - Path to the cover image file.
+    profile_name: str - Device profile the cover was made for, added to the name when one run makes several variants (optional).
+
+    Return str - Path to the embed example image.
+    """
+    # Split albums are labelled with their folders, whose separators mustn't nest the example folder
+    album_images_folder = os.path.join(embed_folder, re.sub(r'[/\\]+', '_', album_name.lower()) + "_image")
+    os.makedirs(album_images_folder, exist_ok=True)
+    short_image_path = os.path.basename(cover_image_path).split(".")[0]
+    if profile_name:
+        short_image_path += "_" + re.sub(r'[^\w.-]+', '_', profile_name.lower())
+    return os.path.join(album_images_folder, f"{short_image_path}_embed_example.jpg")
+
+
+def tags_are_current(tags: ID3, cover_digest: str, id3_version: int = DEFAULT_ID3_VERSION, transforms: tuple = ()) -> bool:
+    """
+    Checks whether the tags already hold exactly the cover, text encodings and ID3 version an embed would write.
+
+    Parameters:
+    tags: ID3 - The file's tags.
+    cover_digest: str - Hash of the cover data to embed (see mp3cover.cover_hash).
+    id3_version: int - ID3v2 minor version the tags would be written as.
+    transforms: tuple - Names of the extra tag transforms the embed would apply (see mp3cover.TAG_TRANSFORMS).
+
+    Return bool - True if writing the cover would not change the tags.
+    """
+    if tags is None or tags.version[1] != id3_version:
+        return False
+
+    pictures = tags.getall('APIC')
+    if len(pictures) != 1:
+        return False
+
+    picture = pictures[0]
+    if (picture.encoding, picture.mime, picture.type, picture.desc) != (0, 'image/jpeg', 0, ''):
+        return False
+    if cover_hash(picture.data) != cover_digest:
+        return False
+    if transforms_pending(tags, transforms):
+        return False
+
+    return all(tags[frame_id].encoding == 0 for frame_id in LATIN1_TEXT_FRAMES if frame_id in tags)
+
+
+def cover_padding(cover_size: int) -> int:
+    """
+    Chooses how much padding to reserve when a tag has to grow to fit a cover.
+
+    Reserving about one more cover's worth of space means a later cover of up to
+    twice the size can replace this one inside the existing tag region.
+
+    Parameters:
+    cover_size: int - Size of the cover data in bytes.
+
+    Return int - Padding in bytes.
+    """
+    return max(cover_size, MIN_TAG_PADDING)
+
+
+def read_tags(mp3_path: str, stats=None) -> MP3:
+    """
+    Parses an MP3 file and its ID3 tags.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+    stats: mp3cover.RunStats - Records the tag_parse stage (optional).
+
+    Return MP3 - The parsed file, with tags None if it has no ID3 tag.
+    """
+    started = time.perf_counter()
+    audio = MP3(mp3_path, ID3=ID3)
+    if stats is not None:
+        stats.record("tag_parse", time.perf_counter() - started, bytes_read=audio.tags.size if audio.tags is not None else 0)
+    return audio
+
+
+def build_cover_tags(audio: MP3, cover_data: bytes, skip_unchanged: bool = False, cover_digest: str = None, id3_version: int = DEFAULT_ID3_VERSION, transforms: tuple = ()) -> bool:
+    """
+    Puts the cover into the parsed tags in memory, forcing Latin-1 text frames for the player,
+    then applies the extra tag transforms, all before the tags are saved once.
+
+    Parameters:
+    audio: MP3 - The parsed file (see read_tags).
+    cover_data: bytes - JPEG data of the cover image.
+    skip_unchanged: bool - Whether to leave the tags alone if they already have this cover and encodings.
+    cover_digest: str - Precomputed hash of cover_data, used with skip_unchanged (optional).
+    id3_version: int - ID3v2 minor version the tags will be written as (3 or 4).
+    transforms: tuple - Names of the extra tag transforms to apply, in order (see mp3cover.TAG_TRANSFORMS).
+
+    Return bool - True if the tags were changed and need writing, False if they were already current.
+    """
+    if skip_unchanged and tags_are_current(audio.tags, cover_digest or cover_hash(cover_data), id3_version, transforms):
+        return False
+
+    if audio.tags is None:
+        audio.add_tags()
+
+    for frame_id in LATIN1_TEXT_FRAMES:
+        if frame_id in audio:
+            audio.tags[frame_id].encoding = 0
+
+    audio.tags.delall('APIC')
+
+    audio.tags.add(
+        APIC(
+            encoding=0,
+            mime='image/jpeg',
+            type=0,
+            desc='',
+            data=cover_data
+        )
+    )
+    apply_transforms(audio.tags, transforms)
+
+    if id3_version == 3:
+        audio.tags.update_to_v23()
+    return True
+
+
+def write_tags(audio: MP3, padding: int, id3_version: int = DEFAULT_ID3_VERSION, stats=None, fileobj=None, shrink: bool = False, tag_sizes: list = None) -> str:
+    """
+    Saves the built tags, keeping the tag region's size whenever the new frames fit in it.
+
+    Parameters:
+    audio: MP3 - The parsed file with its new tags (see build_cover_tags).
+    padding: int - Padding to reserve when the tag has to grow (see cover_padding).
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    stats: mp3cover.RunStats - Records the tag_save stage (optional).
+    fileobj: file object - Seekable file the MP3 was parsed from, such as an io.BytesIO, to save into instead of the file on disk (optional).
+    shrink: bool - Whether to also cut back more padding than the reserve, such as after frames were dropped, rewriting the file.
+    tag_sizes: list - Gets the size in bytes of the tag region before and after the save appended as a (before, after) pair (optional).
+
+    Return str - WRITE_IN_PLACE or WRITE_REWRITTEN.
+    """
+    tag_size = audio.tags.size
+    status = WRITE_IN_PLACE
+    new_tag_size = tag_size
+
+    def choose_padding(info) -> int:
+        """
+        Keeps the tag region the same size when the new tag fits, otherwise grows it with the reserve.
+
+        Parameters:
+        info: mutagen.PaddingInfo - Padding left over after the new frames (negative if they don't fit).
+
+        Return int - Padding to write.
+        """
+        nonlocal status, new_tag_size
+        chosen = info.padding
+        if info.padding < 0 or (shrink and info.padding > padding):
+            status = WRITE_REWRITTEN
+            chosen = padding
+        new_tag_size = tag_size - info.padding + chosen
+        return chosen
+
+    started = time.perf_counter()
+    if fileobj is not None:
+        # mutagen reads the old tag header from the current position
+        fileobj.seek(0)
+    audio.save(fileobj, padding=choose_padding, v2_version=id3_version)
+    if tag_sizes is not None:
+        tag_sizes.append((tag_size, new_tag_size))
+    if stats is not None:
+        # In place only the tag region is written; otherwise the whole file is
+        if status == WRITE_IN_PLACE:
+            bytes_written = tag_size
+        elif fileobj is None:
+            bytes_written = os.path.getsize(audio.filename)
+        else:
+            bytes_written = fileobj.seek(0, os.SEEK_END)
+        stats.record("tag_save", time.perf_counter() - started, bytes_written=bytes_written)
+    return status
+
+
+def embed_cover_into_file(mp3_path: str, cover_data: bytes, skip_unchanged: bool = False, cover_digest: str = None, padding: int = None, id3_version: int = DEFAULT_ID3_VERSION, stats=None, undo=None, transforms: tuple = ()) -> str:
+    """
+    Embeds the encoded cover into a single MP3 file, forcing Latin-1 text frames for the player.
+
+    The tag keeps its current size whenever the new frames fit in it, so only the tag region
+    is written. If the tag has to grow, the file is rewritten once with extra padding reserved.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+    cover_data: bytes - JPEG data of the cover image.
+    skip_unchanged: bool - Whether to leave the file untouched if it already has this cover and encodings.
+    cover_digest: str - Precomputed hash of cover_data, used with skip_unchanged (optional).
+    padding: int - Padding to reserve when the tag has to grow (defaults to cover_padding(len(cover_data))).
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    stats: mp3cover.RunStats - Records the tag_parse and tag_save stages (optional).
+    undo: mp3cover.UndoLog - Gets the file's original tags before they're written (optional).
+    transforms: tuple - Names of the extra tag transforms to apply (see mp3cover.TAG_TRANSFORMS). Padding left over
+    beyond the reserve, such as from dropped frames, is then cut back too.
+
+    Return str - WRITE_SKIPPED, WRITE_IN_PLACE or WRITE_REWRITTEN.
+    """
+    return _embed_file(mp3_path, cover_data, skip_unchanged, cover_digest, padding, id3_version, stats, undo, transforms)[0]
+
+
+def _embed_file(mp3_path: str, cover_data: bytes, skip_unchanged: bool = False, cover_digest: str = None, padding: int = None, id3_version: int = DEFAULT_ID3_VERSION, stats=None, undo=None, transforms: tuple = ()) -> tuple:
+    """
+    Embeds the cover into one MP3 file like embed_cover_into_file, also giving the size of its tag before and after.
+
+    Parameters:
+    See embed_cover_into_file.
+
+    Return tuple - (status, tag_sizes) where tag_sizes is (before, after) in bytes, or None if the file was skipped.
+    """
+    audio = read_tags(mp3_path, stats)
+    if not build_cover_tags(audio, cover_data, skip_unchanged, cover_digest, id3_version, transforms):
+        return WRITE_SKIPPED, None
+    if undo is not None:
+        undo.append(take_snapshot(mp3_path))
+    tag_sizes = []
+    status = write_tags(audio, cover_padding(len(cover_data)) if padding is None else padding, id3_version, stats, shrink=bool(transforms), tag_sizes=tag_sizes)
+    return status, tag_sizes[0]
+
+
+def psnr(image_a: "Image.Image", image_b: "Image.Image") -> float:
+    """
+    Computes the peak signal-to-noise ratio between two images of the same size and mode.
+
+    Parameters:
+    image_a: Image - The reference image.
+    image_b: Image - The image to compare.
+
+    Return float - PSNR in dB (math.inf for identical images).
+    """
+    from PIL import ImageChops, ImageStat
+
+    rms = ImageStat.Stat(ImageChops.difference(image_a, image_b)).rms
+    mse = sum(value * value for value in rms) / len(rms)
+    return math.inf if mse == 0 else 10 * math.log10(255 * 255 / mse)
+
+
+def _save_jpeg(cover_image: "Image.Image", quality: int, progressive: bool, strip_metadata: bool, **options) -> bytes:
+    """
+    Saves a cover image as JPEG data.
+
+    Parameters:
+    cover_image: Image - The cover image.
+    quality: int - JPEG quality.
+    progressive: bool - Whether to encode a progressive JPEG.
+    strip_metadata: bool - Whether to leave out the source's ICC profile and EXIF data.
+    options: keyword arguments - More Pillow JPEG options, such as subsampling and optimize.
+
+    Return bytes - The JPEG data.
+    """
+    if not strip_metadata:
+        options.setdefault("icc_profile", cover_image.info.get("icc_profile"))
+        options.setdefault("exif", cover_image.info.get("exif", b""))
+    with io.BytesIO() as img_bytes:
+        cover_image.save(img_bytes, format='JPEG', quality=quality, progressive=progressive, **options)
+        return img_bytes.getvalue()
+
+
+def encode_jpeg_budget(cover_image: "Image.Image", max_bytes: int, quality: int = DEFAULT_JPEG_QUALITY, progressive: bool = False, strip_metadata: bool = True) -> tuple:
+    """
+    Finds the JPEG encoding of a cover that stays within a byte budget and looks closest to the image.
+
+    For each of JPEG_SUBSAMPLINGS, the highest quality from MIN_JPEG_QUALITY up to quality that
+    fits is found by binary search, with optimized Huffman tables. Of those candidates, the one
+    with the highest PSNR against the image wins. If nothing fits, the smallest encoding is returned.
+
+    Parameters:
+    cover_image: Image - The cover image (RGB).
+    max_bytes: int - Largest size of the JPEG data.
+    quality: int - Highest JPEG quality to try.
+    progressive: bool - Whether to encode a progressive JPEG instead of a baseline one.
+    strip_metadata: bool - Whether to leave out the source's ICC profile and EXIF data.
+
+    Return tuple - (jpeg_data, quality, subsampling) of the chosen encoding.
+    """
+    from PIL import Image
+
+    candidates = []
+    for subsampling in JPEG_SUBSAMPLINGS:
+        low, high = MIN_JPEG_QUALITY, quality
+        best = None
+        while low <= high:
+            middle = (low + high) // 2
+            cover_data = _save_jpeg(cover_image, middle, progressive, strip_metadata, subsampling=subsampling, optimize=True)
+            if len(cover_data) <= max_bytes:
+                best = (cover_data, middle, subsampling)
+                low = middle + 1
+            else:
+                high = middle - 1
+        if best is not None:
+            candidates.append(best)
+
+    if not candidates:
+        subsampling = JPEG_SUBSAMPLINGS[-1]
+        return _save_jpeg(cover_image, MIN_JPEG_QUALITY, progressive, strip_metadata, subsampling=subsampling, optimize=True), MIN_JPEG_QUALITY, subsampling
+    if len(candidates) == 1:
+        return candidates[0]
+    return max(candidates, key=lambda candidate: psnr(cover_image, Image.open(io.BytesIO(candidate[0])).convert("RGB")))
+
+
+def encode_jpeg(cover_image: "Image.Image", quality: int = DEFAULT_JPEG_QUALITY, progressive: bool = False, max_bytes: int = None, strip_metadata: bool = True) -> bytes:
+    """
+    Encodes a cover image as JPEG, searching for settings that fit a size limit if it's too large.
+
+    Covers within the limit are encoded exactly as without one, so their data (and the files
+    they're embedded in) don't change.
+
+    Parameters:
+    cover_image: Image - The cover image.
+    quality: int - JPEG quality to encode with.
+    progressive: bool - Whether to encode a progressive JPEG instead of a baseline one.
+    max_bytes: int - Largest size of the JPEG data, or None for no limit (see encode_jpeg_budget).
+    strip_metadata: bool - Whether to leave out the source's ICC profile and EXIF data.
+
+    Return bytes - The JPEG data.
+    """
+    cover_data = _save_jpeg(cover_image, quality, progressive, strip_metadata)
+    if max_bytes is None or len(cover_data) <= max_bytes:
+        return cover_data
+    return encode_jpeg_budget(cover_image, max_bytes, quality, progressive, strip_metadata)[0]
+
+
+def encode_cover_variants(source_data: bytes, profiles: list, cache=None, stats=None) -> list:
+    """
+    Makes the cover for each device profile from a single decode of the source image.
+
+    The source is decoded once, at the lowest resolution that still serves the largest
+    profile, and each variant is fitted and encoded from that image. With a cache, variants
+    that were already made with the same settings are returned without decoding the source.
+
+    Parameters:
+    source_data: bytes - Contents of the source image.
+    profiles: list - DeviceProfile objects to make covers for.
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    stats: mp3cover.RunStats - Records the cover_decode, cover_resize and cover_encode stages (optional).
+
+    Return list - JPEG data of the cover for each profile, in the same order.
+    """
+    digest = source_hash(source_data)
+    keys = [cache_key(digest, **profile.encoding_params()) for profile in profiles]
+    variants = [cache.get(key) if cache is not None else None for key in keys]
+    missing = [i for i, cover_data in enumerate(variants) if cover_data is None]
+    if not missing:
+        return variants
+
+    # Pillow is only loaded once a cover actually has to be decoded
+    from PIL import Image, ImageOps
+
+    started = time.perf_counter()
+    sizes = [profiles[i].size for i in missing]
+    if None in sizes:
+        cover_image = load_cover_image(io.BytesIO(source_data))
+    else:
+        cover_image = decode_near_size(io.BytesIO(source_data), *sizes)
+    if stats is not None:
+        stats.record("cover_decode", time.perf_counter() - started, bytes_read=len(source_data))
+
+    encoded = {}
+    for i in missing:
+        profile = profiles[i]
+        # Profiles with the same size and encoding settings share one variant
+        if keys[i] not in encoded:
+            started = time.perf_counter()
+            if profile.size is None:
+                variant_image = cover_image
+            else:
+                variant_image = ImageOps.fit(cover_image, profile.size, method=Image.LANCZOS, bleed=0.0, centering=(0.5, 0.5))
+                if stats is not None:
+                    stats.record("cover_resize", time.perf_counter() - started)
+                started = time.perf_counter()
+            encoded[keys[i]] = encode_jpeg(variant_image, profile.quality, profile.progressive, profile.max_bytes, profile.strip_metadata)
+            if stats is not None:
+                stats.record("cover_encode", time.perf_counter() - started, bytes_written=len(encoded[keys[i]]))
+            if cache is not None:
+                cache.put(keys[i], encoded[keys[i]])
+        variants[i] = encoded[keys[i]]
+
+    return variants
+
+
+def encode_cover_bytes(source_data: bytes, resize: bool = False, cache=None, quality: int = DEFAULT_JPEG_QUALITY, profile: DeviceProfile = None) -> bytes:
+    """
+    Decodes (and optionally resizes) a cover image held in memory and encodes it as JPEG for embedding.
+
+    With a cache, a cover that was already processed with the same parameters is returned
+    without decoding or encoding it again.
+
+    Parameters:
+    source_data: bytes - Contents of the source image.
+    resize: bool - Whether to resize the cover image.
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    quality: int - JPEG quality of the encoded cover.
+    profile: DeviceProfile - Device profile to make the cover for, instead of resize and quality (optional).
+
+    Return bytes - JPEG data of the cover image.
+    """
+    if profile is None:
+        profile = legacy_profile(resize).copy(quality=quality)
+    return encode_cover_variants(source_data, [profile], cache)[0]
+
+
+def encode_cover(cover_image_path: str, resize: bool = False, jpeg_path: str = None, cache=None, quality: int = DEFAULT_JPEG_QUALITY, profile: DeviceProfile = None) -> bytes:
+    """
+    Loads (and optionally resizes) the cover image and encodes it as JPEG once for embedding.
+
+    Parameters:
+    cover_image_path: str - Path to the cover image file.
+    resize: bool - Whether to resize the cover image.
+    jpeg_path: str - Path to also save the encoded JPEG to, or None.
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    quality: int - JPEG quality of the encoded cover.
+    profile: DeviceProfile - Device profile to make the cover for, instead of resize and quality (optional).
+
+    Return bytes - JPEG data of the cover image.
+    """
+    with open(cover_image_path, 'rb') as file:
+        source_data = file.read()
+
+    cover_data = encode_cover_bytes(source_data, resize, cache, quality, profile)
+
+    # The embed example is the exact data that gets embedded
+    if jpeg_path:
+        with open(jpeg_path, 'wb') as file:
+            file.write(cover_data)
+
+    return cover_data
+
+
+def _embed_file_task(mp3_path: str, cover_data: bytes, skip_unchanged: bool = False, cover_digest: str = None, id3_version: int = DEFAULT_ID3_VERSION, stats=None, undo=None, transforms: tuple = ()) -> tuple:
+    """
+    Embeds the cover into one MP3 file, returning the error instead of raising it.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+    cover_data: bytes - JPEG data of the cover image.
+    skip_unchanged: bool - Whether to leave the file untouched if it already has this cover.
+    cover_digest: str - Precomputed hash of cover_data (optional).
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    stats: mp3cover.RunStats - Records the embed_file stage and the stages of embed_cover_into_file (optional).
+    undo: mp3cover.UndoLog - Gets the file's original tags before they're written (optional).
+    transforms: tuple - Names of the extra tag transforms to apply (see mp3cover.TAG_TRANSFORMS).
+
+    Return tuple - (status, error, tag_sizes) where status is one of the WRITE_* values, error is the error message,
+    or None if the file was processed, and tag_sizes is the (before, after) size of a written file's tag, or None.
+    """
+    started = time.perf_counter()
+    try:
+        status, tag_sizes = _embed_file(mp3_path, cover_data, skip_unchanged, cover_digest, id3_version=id3_version, stats=stats, undo=undo, transforms=transforms)
+        outcome = status, None, tag_sizes
+    except _EMBED_ERRORS as e:
+        outcome = None, str(e) or type(e).__name__, None
+    if stats is not None:
+        stats.record("embed_file", time.perf_counter() - started, error=outcome[1] is not None)
+    return outcome
+
+
+def _init_process_worker(shared_cover: "SharedCover", skip_unchanged: bool, id3_version: int = DEFAULT_ID3_VERSION, transforms: tuple = ()) -> None:
+    """
+    Stores the cover data and options in a process pool worker.
+
+    Parameters:
+    shared_cover: mp3cover.SharedCover - The cover, read once from shared memory for all the worker's files.
+    skip_unchanged: bool - Whether to leave files that already have this cover untouched.
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    transforms: tuple - Names of the extra tag transforms to apply (see mp3cover.TAG_TRANSFORMS).
+
+    No Return
+    """
+    global _worker_cover_data, _worker_skip_unchanged, _worker_id3_version, _worker_transforms
+    _worker_cover_data = shared_cover.read()
+    _worker_skip_unchanged = skip_unchanged
+    _worker_id3_version = id3_version
+    _worker_transforms = transforms
+
+
+def _embed_file_process_task(mp3_path: str, cover_digest: str, record_stats: bool = False) -> tuple:
+    """
+    Process pool variant of _embed_file_task using the cover data stored by _init_process_worker.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+    cover_digest: str - Precomputed hash of the cover data.
+    record_stats: bool - Whether to time the stages of the file for the parent's RunStats.
+
+    Return tuple - (status, error, tag_sizes, stats) where status, error and tag_sizes are as returned by _embed_file_task,
+    and stats is the RunStats of the file, or None if record_stats is False.
+    """
+    stats = RunStats() if record_stats else None
+    status, error, tag_sizes = _embed_file_task(mp3_path, _worker_cover_data, _worker_skip_unchanged, cover_digest, _worker_id3_version, stats,
+                                                transforms=_worker_transforms)
+    return status, error, tag_sizes, stats
+
+
+async def _embed_pipeline(mp3_paths: list, pending: list, cover_data: bytes, workers: int, skip_unchanged: bool, cover_digest: str, id3_version: int, cancel_event, stats, finish_file, undo=None, transforms: tuple = ()) -> bool:
+    """
+    Embeds the cover with an asyncio pipeline: reading tags, building the new tags and writing them are separate
+    stages joined by bounded queues, so reads and writes overlap while a full queue holds back the stage before it.
+    The blocking mutagen calls run in a thread pool.
+
+    Parameters:
+    mp3_paths: list - Paths of the MP3 files.
+    pending: list - Indexes of the files to embed into.
+    cover_data: bytes - JPEG data of the cover image.
+    workers: int - Number of files read at the same time, and number written at the same time.
+    skip_unchanged: bool - Whether to leave files that already have this cover untouched.
+    cover_digest: str - Precomputed hash of cover_data (optional).
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    cancel_event: threading.Event - Stops reading new files once set; files already read are finished (optional).
+    stats: mp3cover.RunStats - Records the embed_file, tag_parse and tag_save stages (optional).
+    finish_file: callable - Called as finish_file(index, (status, error, tag_sizes)) on the calling thread as each file is done.
+    undo: mp3cover.UndoLog - Gets each file's original tags before they're written (optional).
+    transforms: tuple - Names of the extra tag transforms to apply (see mp3cover.TAG_TRANSFORMS).
+
+    Return bool - Whether the run was cancelled.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    parsed = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    built = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    # Shared by the readers; only the event loop thread advances it
+    to_read = iter(pending)
+    padding = cover_padding(len(cover_data))
+    started = {}
+    cancelled = False
+
+    def done(i: int, status: str, error: str = None, tag_sizes: tuple = None) -> None:
+        seconds = time.perf_counter() - started.pop(i)
+        if stats is not None:
+            stats.record("embed_file", seconds, error=error is not None)
+        finish_file(i, (status, error, tag_sizes))
+
+    async def read_stage() -> None:
+        nonlocal cancelled
+        for i in to_read:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                return
+            started[i] = time.perf_counter()
+            try:
+                audio = await loop.run_in_executor(executor, read_tags, mp3_paths[i], stats)
+            except READ_ERRORS as e:
+                done(i, None, str(e) or type(e).__name__)
+                continue
+            await parsed.put((i, audio))
+
+    async def build_stage() -> None:
+        while (item := await parsed.get()) is not None:
+            i, audio = item
+            try:
+                changed = await loop.run_in_executor(executor, build_cover_tags, audio, cover_data, skip_unchanged, cover_digest, id3_version, transforms)
+            except READ_ERRORS as e:
+                done(i, None, str(e) or type(e).__name__)
+                continue
+            if changed:
+                await built.put((i, audio))
+            else:
+                done(i, WRITE_SKIPPED)
+
+    def write_file(mp3_path: str, audio: MP3) -> tuple:
+        if undo is not None:
+            undo.append(take_snapshot(mp3_path))
+        tag_sizes = []
+        return write_tags(audio, padding, id3_version, stats, shrink=bool(transforms), tag_sizes=tag_sizes), tag_sizes[0]
+
+    async def write_stage() -> None:
+        while (item := await built.get()) is not None:
+            i, audio = item
+            try:
+                status, tag_sizes = await loop.run_in_executor(executor, write_file, mp3_paths[i], audio)
+            except _EMBED_ERRORS as e:
+                done(i, None, str(e) or type(e).__name__)
+                continue
+            done(i, status, tag_sizes=tag_sizes)
+
+    async def run_stages() -> None:
+        # Each stage is told to stop once the one before it has finished
+        await asyncio.gather(*readers)
+        await parsed.put(None)
+        await builder
+        for _ in writers:
+            await built.put(None)
+        await asyncio.gather(*writers)
+
+    # One thread per reader and writer, and one for the builder
+    with ThreadPoolExecutor(max_workers=2 * workers + 1) as executor:
+        readers = [asyncio.create_task(read_stage()) for _ in range(workers)]
+        builder = asyncio.create_task(build_stage())
+        writers = [asyncio.create_task(write_stage()) for _ in range(workers)]
+        tasks = readers + [builder] + writers + [asyncio.create_task(run_stages())]
+
+        # An unexpected error in one stage would leave the others waiting on its queue forever, so stop them all
+        finished, unfinished = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in unfinished:
+            task.cancel()
+        for task in finished:
+            if task.exception() is not None:
+                raise task.exception()
+
+    return cancelled
+
+
+def embed_cover_data(folder: str, album_name: str, mp3_files: list, cover_data: bytes, workers: int = 1, use_processes: bool = False, progress=None, cancel_event=None, skip_unchanged: bool = False, id3_version: int = DEFAULT_ID3_VERSION, stats=None, journal=None, pipeline: bool = False, undo=None, transforms: tuple = ()) -> EmbedResult:
+    """
+    Embeds already-encoded cover data into the MP3 files, optionally across a worker pool.
+
+    Parameters:
+    folder: str - Path to the folder containing MP3 files.
+    album_name: str - Name of the album.
+    mp3_files: list - List of MP3 files in the album.
+    cover_data: bytes - JPEG data of the cover image.
+    workers: int - Number of files to update at the same time (1 updates them one after another).
+    use_processes: bool - Whether to use a process pool instead of a thread pool; the cover is shared with its workers
+    through shared memory (see mp3cover.SharedCover).
+    progress: callable - Called as progress(done, total) after each file (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    skip_unchanged: bool - Whether to leave files that already have this cover and the Latin-1 text encodings untouched.
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    stats: mp3cover.RunStats - Records the embed_file, tag_parse and tag_save stages of each file (optional).
+    journal: mp3cover.RunJournal - Checkpoint journal; files it lists as done with this cover are skipped, and each finished file is added (optional).
+    pipeline: bool - Whether to read, build and write the tags in an asyncio pipeline of bounded queues instead of
+    handing whole files to a worker pool (see _embed_pipeline); use_processes is ignored then.
+    undo: mp3cover.UndoLog - Gets each file's original tags before they're written (optional). With a process pool the tags
+    are saved here before the file is handed to a worker, even if the worker then leaves the file unchanged.
+    transforms: tuple - Names of the extra tag transforms to apply in the same save (see mp3cover.TAG_TRANSFORMS).
+
+    Return EmbedResult - The written, skipped and failed files.
+    """
+    folder = os.path.normpath(folder)  # Normalize the path
+    result = EmbedResult(album_name)
+    result.folder = folder
+    mp3_paths = [os.path.join(folder, mp3_file) for mp3_file in mp3_files]
+    cover_digest = cover_hash(cover_data) if skip_unchanged or journal is not None else None
+    journal_key = completion_key(cover_digest, id3_version, transforms) if journal is not None else None
+    outcomes = {}
+
+    pending = list(range(len(mp3_paths)))
+    if journal is not None:
+        result.resumed_files = [mp3_path for mp3_path in mp3_paths if journal.is_done(mp3_path, journal_key)]
+        pending = [i for i in pending if not journal.is_done(mp3_paths[i], journal_key)]
+
+    def finish_file(i: int, outcome: tuple) -> None:
+        """
+        Stores the outcome of one file, journals it if it was processed and reports progress.
+
+        Parameters:
+        i: int - Index of the file.
+        outcome: tuple - (status, error, tag_sizes) as returned by _embed_file_task.
+
+        No Return
+        """
+        outcomes[i] = outcome
+        if journal is not None and outcome[1] is None:
+            journal.record(mp3_paths[i], journal_key)
+        if progress is not None:
+            progress(len(result.resumed_files) + len(outcomes), len(mp3_paths))
+
+    if pipeline:
+        import asyncio
+
+        result.cancelled = asyncio.run(_embed_pipeline(mp3_paths, pending, cover_data, max(workers, 1), skip_unchanged, cover_digest,
+                                                       id3_version, cancel_event, stats, finish_file, undo, transforms))
+    elif workers <= 1 or len(pending) <= 1:
+        for i in pending:
+            if cancel_event is not None and cancel_event.is_set():
+                result.cancelled = True
+                break
+            finish_file(i, _embed_file_task(mp3_paths[i], cover_data, skip_unchanged, cover_digest, id3_version, stats, undo, transforms))
+    else:
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+        from .shared_cover import SharedCover
+
+        shared_cover = None
+        if use_processes:
+            # The cover goes into shared memory once; the workers are only sent its name
+            shared_cover = SharedCover(cover_data)
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker, initargs=(shared_cover, skip_unchanged, id3_version, transforms))
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        # The pool shuts down before the shared cover is freed
+        with shared_cover or nullcontext(), executor:
+            if use_processes:
+                futures = {}
+                for i in pending:
+                    if undo is not None:
+                        # Workers can't reach the log, so the tags are saved before the file is handed over
+                        try:
+                            undo.append(take_snapshot(mp3_paths[i]))
+                        except (OSError, UndoError) as e:
+                            finish_file(i, (None, str(e) or type(e).__name__, None))
+                            continue
+                    futures[executor.submit(_embed_file_process_task, mp3_paths[i], cover_digest, stats is not None)] = i
+            else:
+                futures = {executor.submit(_embed_file_task, mp3_paths[i], cover_data, skip_unchanged, cover_digest, id3_version, stats, undo, transforms): i
+                           for i in pending}
+
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                if use_processes:
+                    status, error, tag_sizes, file_stats = future.result()
+                    finish_file(futures[future], (status, error, tag_sizes))
+                    if file_stats is not None:
+                        stats.merge(file_stats)
+                else:
+                    finish_file(futures[future], future.result())
+                if cancel_event is not None and cancel_event.is_set() and not result.cancelled:
+                    # Files already being written are finished; the rest are never started
+                    result.cancelled = True
+                    for queued in futures:
+                        queued.cancel()
+
+    for i in sorted(outcomes):
+        status, error, tag_sizes = outcomes[i]
+        if error is not None:
+            result.errors.append((mp3_files[i], error))
+        elif status == WRITE_SKIPPED:
+            result.skipped_files.append(mp3_paths[i])
+        else:
+            result.updated_files.append(mp3_paths[i])
+            result.tag_sizes[mp3_paths[i]] = tag_sizes
+            if status == WRITE_REWRITTEN:
+                result.rewritten_files.append(mp3_paths[i])
+
+    return result
+
+
+def embed_cover_targets(targets: list, album_name: str, mp3_files: list, variants: list, workers: int = 1, use_processes: bool = False, progress=None, cancel_event=None, skip_unchanged: bool = False, stats=None, journal=None, pipeline: bool = False, undo=None) -> list:
+    """
+    Embeds each target's cover variant into its copy of the album.
+
+    Parameters:
+    targets: list - (folder, DeviceProfile) pairs, one for each copy of the library (the MP3 files have the same relative paths in each).
+    album_name: str - Name of the album.
+    mp3_files: list - List of MP3 files in the album, relative to each folder.
+    variants: list - JPEG data of the cover for each target, in the same order (see encode_cover_variants).
+    workers: int - Number of files to update at the same time (1 updates them one after another).
+    use_processes: bool - Whether to use a process pool instead of a thread pool.
+    progress: callable - Called as progress(done, total) after each file, counted over all targets (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    skip_unchanged: bool - Whether to leave files that already have their cover, text encodings and ID3 version untouched.
+    stats: mp3cover.RunStats - Records the stages of each file (optional).
+    journal: mp3cover.RunJournal - Checkpoint journal of the run, used to skip files an interrupted run already finished (optional).
+    pipeline: bool - Whether to embed the files with the asyncio pipeline instead of a worker pool (see embed_cover_data).
+    undo: mp3cover.UndoLog - Gets each file's original tags before they're written (optional).
+
+    Return list - EmbedResult of each target, up to the one that was cancelled.
+    """
+    results = []
+    total = len(mp3_files) * len(targets)
+
+    for i, ((folder, profile), cover_data) in enumerate(zip(targets, variants)):
+        def target_progress(done: int, target_total: int, offset: int = i * len(mp3_files)) -> None:
+            progress(offset + done, total)
+
+        result = embed_cover_data(folder, album_name, mp3_files, cover_data, workers, use_processes,
+                                  target_progress if progress is not None else None, cancel_event, skip_unchanged, profile.id3_version, stats, journal, pipeline, undo,
+                                  profile.tag_transforms)
+        result.profile = profile.name
+        results.append(result)
+        if result.cancelled:
+            break
+
+    return results
+
+
+def embed_album_cover_targets(targets: list, cover_image_path: str, album_name: str, mp3_files: list, embed_folder: str = None, workers: int = 1, use_processes: bool = False, progress=None, cancel_event=None, cache=None, skip_unchanged: bool = False, stats=None, journal=None, pipeline: bool = False, undo=None) -> list:
+    """
+    Embeds the cover image into several copies of an album, each with the variant of its device profile.
+
+    The cover is decoded once and every variant is made from that decode (see encode_cover_variants).
+
+    Parameters:
+    targets: list - (folder, DeviceProfile) pairs, one for each copy of the library (the MP3 files have the same relative paths in each).
+    cover_image_path: str - Path to the cover image file.
+    album_name: str - Name of the album.
+    mp3_files: list - List of MP3 files in the album, relative to each folder.
+    embed_folder: str - Folder to save the embed example images in, or None to not save them.
+    workers: int - Number of files to update at the same time (1 updates them one after another).
+    use_processes: bool - Whether to use a process pool instead of a thread pool.
+    progress: callable - Called as progress(done, total) after each file, counted over all targets (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    skip_unchanged: bool - Whether to leave files that already have their cover, text encodings and ID3 version untouched.
+    stats: mp3cover.RunStats - Records the time spent in each stage (optional).
+    journal: mp3cover.RunJournal - Checkpoint journal of the run, used to skip files an interrupted run already finished (optional).
+    pipeline: bool - Whether to embed the files with the asyncio pipeline instead of a worker pool (see embed_cover_data).
+    undo: mp3cover.UndoLog - Gets each file's original tags before they're written (optional).
+
+    Return list - EmbedResult of each target, up to the one that was cancelled.
+    """
+    started = time.perf_counter()
+    with open(cover_image_path, 'rb') as file:
+        source_data = file.read()
+    if stats is not None:
+        stats.record("cover_read", time.perf_counter() - started, bytes_read=len(source_data))
+
+    variants = encode_cover_variants(source_data, [profile for folder, profile in targets], cache, stats)
+    results = embed_cover_targets(targets, album_name, mp3_files, variants, workers, use_processes, progress, cancel_event, skip_unchanged, stats, journal, pipeline, undo)
+
+    if embed_folder:
+        # The embed examples are the exact data that gets embedded, one per profile
+        several_profiles = len({profile.name for folder, profile in targets}) > 1
+        for result, cover_data in zip(results, variants):
+            result.embed_example_path = embed_example_path(embed_folder, album_name, cover_image_path, result.profile if several_profiles else None)
+            with open(result.embed_example_path, 'wb') as file:
+                file.write(cover_data)
+
+    return results
+
+
+def embed_album_cover(folder: str, cover_image_path: str, album_name: str, mp3_files: list, resize: bool = False, embed_folder: str = None, workers: int = 1, use_processes: bool = False, progress=None, cancel_event=None, cache=None, skip_unchanged: bool = False, profile: DeviceProfile = None, stats=None, journal=None, pipeline: bool = False, undo=None) -> EmbedResult:
+    """
+    Embeds the cover image into the MP3 files' metadata.
+
+    The cover is decoded and encoded once; the per-file tag writes can then be spread over
+    a thread or process pool. Errors are collected per file and returned with the result.
+
+    Parameters:
+    folder: str - Path to the folder containing MP3 files.
+    cover_image_path: str - Path to the cover image file.
+    album_name: str - Name of the album.
+    mp3_files: list - List of MP3 files in the album.
+    resize: bool - Whether to resize the cover image.
+    embed_folder: str - Folder to save the embed example image in, or None to not save one.
+    workers: int - Number of files to update at the same time (1 updates them one after another).
+    use_processes: bool - Whether to use a process pool instead of a thread pool.
+    progress: callable - Called as progress(done, total) after each file (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    skip_unchanged: bool - Whether to leave files that already have this cover and the Latin-1 text encodings untouched.
+    profile: DeviceProfile - Device profile to make the cover and write the tags for, instead of resize (optional).
+    stats: mp3cover.RunStats - Records the time spent in each stage (optional).
+    journal: mp3cover.RunJournal - Checkpoint journal of the run, used to skip files an interrupted run already finished (optional).
+    pipeline: bool - Whether to embed the files with the asyncio pipeline instead of a worker pool (see embed_cover_data).
+    undo: mp3cover.UndoLog - Gets each file's original tags before they're written (optional).
+
+    Return EmbedResult - The written, skipped and failed files.
+    """
+    targets = [(folder, profile or legacy_profile(resize))]
+    return embed_album_cover_targets(targets, cover_image_path, album_name, mp3_files, embed_folder, workers, use_processes,
+                                     progress, cancel_event, cache, skip_unchanged, stats, journal, pipeline, undo)[0]
@@ -0,0 +1,131 @@
+"""
+Content-addressed on-disk cache of processed cover images.
+
+Entries are keyed by a hash of the source image's bytes plus the processing
+parameters (size, resize on/off, JPEG quality), and hold the ready-to-embed
+JPEG data. The cache is bounded by total size; the least recently used
+entries are evicted first, using each file's modification time as its last use.
+"""
+import hashlib
+import json
+import os
+
+# Default size limit of the cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def source_hash(source_data: bytes) -> str:
+    """
+    Hashes the bytes of a source image.
+
+    Parameters:
+    source_data: bytes - Contents of the source image file.
+
+    Return str - Hex digest of the source image.
+    """
+    return hashlib.sha256(source_data).hexdigest()
+
+
+def cache_key(source_digest: str, **params) -> str:
+    """
+    Builds the cache key for a source image and its processing parameters.
+
+    Parameters:
+    source_digest: str - Hash of the source image (see source_hash).
+    params: keyword arguments - Processing parameters, such as size, resize and quality.
+
+    Return str - The cache key.
+    """
+    encoded_params = json.dumps(params, sort_keys=True, default=list)
+    return hashlib.sha256(f"{source_digest}:{encoded_params}".encode()).hexdigest()
+
+
+class CoverCache:
+    """
+    Size-bounded LRU cache of processed cover JPEG data stored in a folder.
+
+    Attributes:
+    cache_dir: str - Folder holding the cached covers.
+    max_bytes: int - Total size the cache is trimmed to after each insert.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initializes the cache, creating its folder if needed.
+
+        Parameters:
+        cache_dir: str - Folder holding the cached covers.
+        max_bytes: int - Total size the cache is trimmed to after each insert.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def get(self, key: str) -> bytes:
+        """
+        Looks up a processed cover and marks it as recently used.
+
+        Parameters:
+        key: str - The cache key (see cache_key).
+
+        Return bytes - The JPEG data, or None if the cover isn't cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Stores a processed cover, then evicts the least recently used covers beyond max_bytes.
+
+        Parameters:
+        key: str - The cache key (see cache_key).
+        data: bytes - The JPEG data.
+
+        No Return
+        """
+        import tempfile
+
+        # Write to a temporary file first so readers never see a partial cover
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used covers until the cache fits in max_bytes.
+
+        No Return
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as scanned:
+            for entry in scanned:
+                if entry.name.endswith(".jpg"):
+                    stat_result = entry.stat()
+                    entries.append((stat_result.st_mtime_ns, stat_result.st_size, entry.path))
+                    total += stat_result.st_size
+
+        for mtime_ns, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,277 @@
+"""
+Tag-only fast scan of MP3 files.
+
+Reading a file with mutagen's MP3(...) parses the ID3 tag and also the MPEG
+stream info, which means reading and decoding every frame of the tag, including
+large APIC covers, plus the sync frames after it. Scanning only needs the album
+name and whether a cover is present, so this module walks the ID3v2 frame
+headers directly, reads only the body of the album frame and seeks past the rest.
+
+Anything unusual (unsynchronisation, compressed or encrypted album frames,
+broken frame headers, no MPEG sync right after the tag) raises FastScanError,
+and read_album_info falls back to a full mutagen parse for that file.
+"""
+import hashlib
+import struct
+
+from mutagen.id3 import ID3
+from mutagen.mp3 import MP3
+
+# Largest album frame body that is read; longer frames use the full parse
+MAX_TEXT_FRAME_SIZE = 4096
+
+# Album and cover frame IDs for ID3v2.2 and ID3v2.3/2.4
+_ALBUM_FRAMES = (b'TAL', b'TALB')
+_COVER_FRAMES = (b'PIC', b'APIC')
+
+_TEXT_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+
+# Size of an ID3v1 tag, and where its album field is
+_ID3V1_SIZE = 128
+_ID3V1_ALBUM = slice(63, 93)
+
+# ID3v2.3 frame flags: compression, encryption
+_V23_UNSUPPORTED_FLAGS = 0x0080 | 0x0040
+# ID3v2.4 frame flags: compression, encryption, unsynchronisation, data length indicator
+_V24_UNSUPPORTED_FLAGS = 0x0008 | 0x0004 | 0x0002 | 0x0001
+
+
+class FastScanError(Exception):
+    """
+    Raised when a file can't be handled by the fast scan and needs a full parse.
+    """
+
+
+def _syncsafe(data: bytes) -> int:
+    """
+    Decodes a 4-byte syncsafe integer (7 bits per byte).
+
+    Parameters:
+    data: bytes - The 4 encoded bytes.
+
+    Return int - The decoded integer.
+    """
+    if any(b & 0x80 for b in data):
+        raise FastScanError("invalid syncsafe integer")
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def id3v2_tag_size(header: bytes) -> int:
+    """
+    Works out the size of the ID3v2 tag a file starts with from its first 10 bytes. Never raises.
+
+    Parameters:
+    header: bytes - The first 10 bytes of the file.
+
+    Return int - Size of the tag in bytes, with its header, padding and ID3v2.4 footer, 0 if the file doesn't start
+    with an ID3v2 tag, or None if the header's size field is invalid.
+    """
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    try:
+        size = _syncsafe(header[6:10])
+    except FastScanError:
+        return None
+    # ID3v2.4 tags can end with a 10-byte footer
+    return 10 + size + (10 if header[3] == 4 and header[5] & 0x10 else 0)
+
+
+def _id3v1_album(f) -> str:
+    """
+    Reads the album of an ID3v1 tag at the end of an open MP3 file.
+
+    Short ID3v1 tags written by old taggers and tags next to an APEv2 footer raise FastScanError,
+    so mutagen's full parse decides what they hold.
+
+    Parameters:
+    f: file object - The MP3 file, opened in binary mode.
+
+    Return str - The album name, or None if the file has no ID3v1 tag or its album is empty.
+    """
+    # A few bytes more than the tag, like mutagen, to find short tags and the end of "APETAGEX"
+    f.seek(0, 2)
+    f.seek(max(f.tell() - _ID3V1_SIZE - 3, 0))
+    data = f.read()
+    index = data.find(b'TAG')
+    if index == -1:
+        return None
+    if len(data) - index != _ID3V1_SIZE or b'APETAGEX' in data:
+        raise FastScanError("ID3v1 tag needs a full parse")
+    album = data[index:][_ID3V1_ALBUM].split(b'\x00')[0].strip()
+    return album.decode('latin-1') or None
+
+
+def _decode_text_frame(body: bytes) -> str:
+    """
+    Decodes the first string of an ID3 text frame body.
+
+    Parameters:
+    body: bytes - The frame body (encoding byte followed by the text).
+
+    Return str - The first string of the frame.
+    """
+    if not body or body[0] >= len(_TEXT_ENCODINGS):
+        raise FastScanError("invalid text encoding")
+    encoding = _TEXT_ENCODINGS[body[0]]
+    try:
+        text = body[1:].decode(encoding)
+    except UnicodeDecodeError:
+        raise FastScanError("undecodable text frame")
+    return text.split('\x00')[0]
+
+
+def _picture_data(body: bytes, version: int) -> bytes:
+    """
+    Extracts the image data from an APIC (or ID3v2.2 PIC) frame body.
+
+    Parameters:
+    body: bytes - The frame body.
+    version: int - Minor ID3v2 version of the tag (2, 3 or 4).
+
+    Return bytes - The image data.
+    """
+    if not body or body[0] >= len(_TEXT_ENCODINGS):
+        raise FastScanError("invalid picture frame encoding")
+    encoding = body[0]
+
+    if version == 2:
+        pos = 1 + 3  # Fixed 3-byte image format
+    else:
+        pos = body.index(b'\x00', 1) + 1  # Null-terminated MIME type
+    pos += 1  # Picture type
+
+    # Description, terminated by a null of the frame's text encoding
+    if encoding in (1, 2):
+        while body[pos:pos + 2] != b'\x00\x00':
+            if pos + 2 > len(body):
+                raise FastScanError("unterminated picture description")
+            pos += 2
+        return body[pos + 2:]
+    return body[body.index(b'\x00', pos) + 1:]
+
+
+def cover_hash(cover_data: bytes) -> str:
+    """
+    Hashes cover image data the same way for scanned and newly embedded covers.
+
+    Parameters:
+    cover_data: bytes - The image data.
+
+    Return str - Hex digest of the image data.
+    """
+    return hashlib.sha1(cover_data).hexdigest()
+
+
+def scan_tags(mp3_path: str, hash_cover: bool = False) -> tuple:
+    """
+    Reads the album name and cover presence from the ID3 tags without parsing the whole file.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+    hash_cover: bool - Whether to also read and hash the first cover's image data.
+
+    Return tuple - (album_name, has_cover, cover_hash) where album_name is None if the file has
+    no album frame and cover_hash is None unless hash_cover is set and the file has a cover.
+    """
+    with open(mp3_path, 'rb') as f:
+        header = f.read(10)
+        album_name = None
+        has_cover = False
+        picture_hash = None
+        audio_offset = 0
+
+        if len(header) == 10 and header[:3] == b'ID3':
+            version, flags = header[3], header[5]
+            if version not in (2, 3, 4):
+                raise FastScanError("unsupported ID3 version")
+            if flags & 0x80:
+                raise FastScanError("unsynchronised tag")
+
+            tag_size = _syncsafe(header[6:10])
+            tag_end = 10 + tag_size
+            audio_offset = tag_end + (10 if version == 4 and flags & 0x10 else 0)
+
+            if version != 2 and flags & 0x40:
+                ext_size = struct.unpack('>I', f.read(4))[0]
+                f.seek(10 + (ext_size if version == 4 else ext_size + 4))
+
+            frame_header_size = 6 if version == 2 else 10
+            while f.tell() + frame_header_size <= tag_end:
+                frame_header = f.read(frame_header_size)
+                if frame_header[0] == 0:
+                    break  # Padding
+
+                if version == 2:
+                    frame_id = frame_header[:3]
+                    frame_size = int.from_bytes(frame_header[3:6], 'big')
+                    frame_flags = 0
+                    unsupported_flags = 0
+                elif version == 3:
+                    frame_id = frame_header[:4]
+                    frame_size = struct.unpack('>I', frame_header[4:8])[0]
+                    frame_flags = struct.unpack('>H', frame_header[8:10])[0]
+                    unsupported_flags = _V23_UNSUPPORTED_FLAGS
+                else:
+                    frame_id = frame_header[:4]
+                    frame_size = _syncsafe(frame_header[4:8])
+                    frame_flags = struct.unpack('>H', frame_header[8:10])[0]
+                    unsupported_flags = _V24_UNSUPPORTED_FLAGS
+
+                if not frame_id.isalnum() or not frame_id.upper() == frame_id:
+                    raise FastScanError("invalid frame id")
+                if f.tell() + frame_size > tag_end:
+                    raise FastScanError("frame runs past the end of the tag")
+
+                if frame_id in _ALBUM_FRAMES and album_name is None:
+                    if frame_flags & unsupported_flags or frame_size > MAX_TEXT_FRAME_SIZE:
+                        raise FastScanError("album frame needs a full parse")
+                    album_name = _decode_text_frame(f.read(frame_size))
+                elif frame_id in _COVER_FRAMES and hash_cover and not has_cover:
+                    if frame_flags & unsupported_flags:
+                        raise FastScanError("cover frame needs a full parse")
+                    has_cover = True
+                    picture_hash = cover_hash(_picture_data(f.read(frame_size), version))
+                else:
+                    if frame_id in _COVER_FRAMES:
+                        has_cover = True
+                    f.seek(frame_size, 1)
+
+        # A full parse also requires the MPEG audio to start right after the tag
+        f.seek(audio_offset)
+        sync = f.read(2)
+        if len(sync) < 2 or sync[0] != 0xFF or sync[1] & 0xE0 != 0xE0:
+            raise FastScanError("no MPEG frame sync after the tag")
+
+        if album_name is None:
+            # Like mutagen, fall back to the album of an ID3v1 tag
+            album_name = _id3v1_album(f)
+
+    return album_name, has_cover, picture_hash
+
+
+def read_album_info(mp3_path: str, fast: bool = True, hash_cover: bool = False) -> tuple:
+    """
+    Reads the album name and cover presence of an MP3 file, using the fast scan when possible.
+
+    Files the fast scan can't handle are fully parsed with mutagen, which raises one of
+    mp3cover.READ_ERRORS for unreadable or corrupt files.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+    fast: bool - Whether to try the fast scan before the full parse.
+    hash_cover: bool - Whether to also hash the first cover's image data.
+
+    Return tuple - (album_name, has_cover, cover_hash) where album_name is None if the file has
+    no album frame and cover_hash is None unless hash_cover is set and the file has a cover.
+    """
+    if fast:
+        try:
+            return scan_tags(mp3_path, hash_cover)
+        except (FastScanError, struct.error, IndexError, ValueError):
+            pass
+
+    audio = MP3(mp3_path, ID3=ID3)
+    album = audio.get('TALB')
+    pictures = audio.tags.getall('APIC') if audio.tags is not None else []
+    picture_hash = cover_hash(pictures[0].data) if pictures and hash_cover else None
+    return (album.text[0] if album and album.text else None), bool(pictures), picture_hash
@@ -0,0 +1,202 @@
+"""
+Checkpoint journal for resumable embed runs.
+
+A run writes its plan (the folders, device profiles and albums it is going to
+update) as the first line of the journal, then one line for each file it has
+finished. If the run dies halfway, running the same job again finds the
+journal with the same plan and skips every file that is already done, so only
+the rest of the files are written. The journal is removed once a run
+completes.
+
+A file only counts as done for the same cover data, ID3 version and tag
+transforms, so a restarted job with a different cover still writes every
+file. Lines are flushed as they are written; a line lost in a crash only
+means that file is written again, which gives the same result.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+# Line types in the journal
+RECORD_PLAN = "plan"
+RECORD_DONE = "done"
+
+
+def run_plan(targets: list, albums: dict, cover_image_path: str = None) -> dict:
+    """
+    Describes the work of an embed run, so a restarted run can tell whether it is the same job.
+
+    Parameters:
+    targets: list - (folder, DeviceProfile) pairs the covers are embedded into.
+    albums: dict - Album names mapped to their MP3 files.
+    cover_image_path: str - The cover embedded into every album, or None if each album's cover is found automatically.
+
+    Return dict - The JSON-serializable plan.
+    """
+    return {
+        "targets": [[os.path.abspath(folder), profile.name, profile.to_dict()] for folder, profile in targets],
+        "albums": {album_name: len(mp3_files) for album_name, mp3_files in sorted(albums.items())},
+        "cover": os.path.abspath(cover_image_path) if cover_image_path else None,
+    }
+
+
+def completion_key(cover_digest: str, id3_version: int, transforms: tuple = ()) -> str:
+    """
+    Builds the key a finished file is journaled with.
+
+    Parameters:
+    cover_digest: str - Hash of the embedded cover data (see mp3cover.cover_hash).
+    id3_version: int - ID3v2 minor version the tags were written as.
+    transforms: tuple - Names of the extra tag transforms that were applied.
+
+    Return str - The key.
+    """
+    key = f"{cover_digest}:2.{id3_version}"
+    return key + ":" + "+".join(transforms) if transforms else key
+
+
+class RunJournal:
+    """
+    Journal of the planned work and the finished files of one embed run.
+
+    Attributes:
+    path: str - Path to the journal file.
+    plan: dict - The plan of the run (see run_plan).
+    completed: dict - Completion keys of the finished files, keyed by absolute path.
+    resumed: bool - Whether an interrupted run of the same plan was found and is being continued.
+    """
+
+    def __init__(self, path: str, plan: dict):
+        """
+        Opens the journal, continuing an interrupted run of the same plan or starting a new one.
+
+        Parameters:
+        path: str - Path to the journal file.
+        plan: dict - The plan of the run (see run_plan).
+        """
+        self.path = path
+        # Round trip through JSON so tuples compare equal to the lists read back
+        self.plan = json.loads(json.dumps(plan))
+        self.completed = {}
+        self.resumed = False
+
+        if os.path.exists(path):
+            self._load()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if self.resumed:
+            self._file = open(path, 'a')
+        else:
+            self._file = open(path, 'w')
+            self._write({"type": RECORD_PLAN, "plan": self.plan})
+
+    def _load(self) -> None:
+        """
+        Reads the finished files of an existing journal if it has the same plan.
+
+        No Return
+        """
+        with open(self.path, 'r') as file:
+            for line_number, line in enumerate(file):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may have been cut off by the crash
+                    continue
+                if line_number == 0:
+                    if record.get("type") != RECORD_PLAN or record.get("plan") != self.plan:
+                        return
+                    self.resumed = True
+                elif record.get("type") == RECORD_DONE:
+                    self.completed[record["path"]] = record["key"]
+
+    def _write(self, record: dict) -> None:
+        """
+        Appends a record to the journal and flushes it to the operating system.
+
+        Parameters:
+        record: dict - The record to write.
+
+        No Return
+        """
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def is_done(self, mp3_path: str, key: str) -> bool:
+        """
+        Checks whether the file was already finished with the same cover and ID3 version.
+
+        Parameters:
+        mp3_path: str - Path to the MP3 file.
+        key: str - Completion key of the work (see completion_key).
+
+        Return bool - True if the file can be skipped.
+        """
+        return self.completed.get(os.path.abspath(mp3_path)) == key
+
+    def record(self, mp3_path: str, key: str) -> None:
+        """
+        Journals a finished file.
+
+        Parameters:
+        mp3_path: str - Path to the MP3 file.
+        key: str - Completion key of the work (see completion_key).
+
+        No Return
+        """
+        mp3_path = os.path.abspath(mp3_path)
+        self.completed[mp3_path] = key
+        self._write({"type": RECORD_DONE, "path": mp3_path, "key": key})
+
+    def close(self) -> None:
+        """
+        Closes the journal, keeping it so the run can be continued later.
+
+        No Return
+        """
+        if not self._file.closed:
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def finish(self) -> None:
+        """
+        Closes and removes the journal once the run has completed.
+
+        No Return
+        """
+        if not self._file.closed:
+            self._file.close()
+        os.remove(self.path)
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+@contextmanager
+def journaled_run(path: str, plan: dict, cancel_event=None):
+    """
+    Opens the checkpoint journal for the run inside the with block.
+
+    The journal is removed if the block completes, and kept if it raises or the run is cancelled,
+    so the same job can be continued later.
+
+    Parameters:
+    path: str - Path to the journal file.
+    plan: dict - The plan of the run (see run_plan).
+    cancel_event: threading.Event - The run's cancel event (optional).
+
+    Yield RunJournal - The opened journal.
+    """
+    journal = RunJournal(path, plan)
+    try:
+        yield journal
+    except BaseException:
+        journal.close()
+        raise
+    if cancel_event is not None and cancel_event.is_set():
+        journal.close()
+    else:
+        journal.finish()
@@ -0,0 +1,225 @@
+"""
+Persistent on-disk index of scanned MP3 files.
+
+Each file is stored by path together with the size and modification time it
+had when it was read, so a rescan only reads the tags of files that are new
+or have changed since the last scan. The index is a SQLite database kept next
+to settings.json (see mp3cover.settings.INDEX_FILE).
+"""
+import os
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    album_name TEXT,
+    default_album_name TEXT,
+    has_cover INTEGER NOT NULL DEFAULT 0,
+    cover_hash TEXT,
+    corrupt INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files (folder);
+"""
+
+# Number of changed entries kept in memory before they are written out
+_COMMIT_EVERY = 1000
+
+
+class IndexEntry:
+    """
+    What the index knows about one MP3 file.
+
+    Attributes:
+    path: str - Absolute path to the MP3 file.
+    size: int - File size in bytes when the file was read.
+    mtime_ns: int - Modification time in nanoseconds when the file was read.
+    album_name: str - Album name from the tags, or None.
+    default_album_name: str - Album name derived from the filename, used when album_name is None.
+    has_cover: bool - Whether the file has an embedded cover.
+    cover_hash: str - Hash of the embedded cover's image data, or None.
+    corrupt: bool - Whether the file could not be read.
+    """
+
+    __slots__ = ("path", "size", "mtime_ns", "album_name", "default_album_name", "has_cover", "cover_hash", "corrupt")
+
+    def __init__(self, path: str, size: int, mtime_ns: int, album_name: str = None, default_album_name: str = None, has_cover: bool = False, cover_hash: str = None, corrupt: bool = False):
+        """
+        Initializes an IndexEntry.
+
+        Parameters:
+        See the class attributes.
+        """
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.album_name = album_name
+        self.default_album_name = default_album_name
+        self.has_cover = bool(has_cover)
+        self.cover_hash = cover_hash
+        self.corrupt = bool(corrupt)
+
+    def matches(self, stat_result: os.stat_result) -> bool:
+        """
+        Checks whether the file still has the size and modification time it had when it was indexed.
+
+        Parameters:
+        stat_result: os.stat_result - Current stat of the file.
+
+        Return bool - True if the entry is still valid.
+        """
+        return self.size == stat_result.st_size and self.mtime_ns == stat_result.st_mtime_ns
+
+
+class LibraryIndex:
+    """
+    SQLite-backed index of MP3 files keyed by path, size and modification time.
+
+    Use it as a context manager; changes are written in batches and when it closes.
+    A LibraryIndex must only be used from the thread that created it.
+
+    Attributes:
+    index_file: str - Path to the SQLite database.
+    """
+
+    def __init__(self, index_file: str):
+        """
+        Opens (and creates if needed) the index database.
+
+        Parameters:
+        index_file: str - Path to the SQLite database.
+        """
+        self.index_file = index_file
+        os.makedirs(os.path.dirname(os.path.abspath(index_file)), exist_ok=True)
+        self._connection = sqlite3.connect(index_file)
+        self._connection.executescript(_SCHEMA)
+        self._pending = {}
+        self._removed = set()
+        self._removed_folders = set()
+
+    def __enter__(self) -> "LibraryIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def load_folder(self, folder: str) -> dict:
+        """
+        Loads the entries of the files directly inside the given folder in one query.
+
+        Parameters:
+        folder: str - Absolute path to the folder.
+
+        Return dict - IndexEntry objects keyed by path.
+        """
+        rows = self._connection.execute(
+            "SELECT path, size, mtime_ns, album_name, default_album_name, has_cover, cover_hash, corrupt "
+            "FROM files WHERE folder = ?",
+            (folder,),
+        )
+        return {row[0]: IndexEntry(*row) for row in rows}
+
+    def folders_under(self, folder: str) -> set:
+        """
+        Lists the indexed folders at or below the given folder.
+
+        Parameters:
+        folder: str - Absolute path to the folder.
+
+        Return set - Absolute paths of the indexed folders.
+        """
+        prefix = os.path.join(folder, "")
+        rows = self._connection.execute(
+            "SELECT DISTINCT folder FROM files WHERE folder = ? OR substr(folder, 1, ?) = ?",
+            (folder, len(prefix), prefix),
+        )
+        return {row[0] for row in rows}
+
+    def get(self, path: str) -> IndexEntry:
+        """
+        Looks up the entry for a single file.
+
+        Parameters:
+        path: str - Absolute path to the MP3 file.
+
+        Return IndexEntry - The entry, or None if the file isn't indexed.
+        """
+        if path in self._pending:
+            return self._pending[path]
+        row = self._connection.execute(
+            "SELECT path, size, mtime_ns, album_name, default_album_name, has_cover, cover_hash, corrupt "
+            "FROM files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        return IndexEntry(*row) if row else None
+
+    def put(self, entry: IndexEntry) -> None:
+        """
+        Adds or replaces the entry for a file.
+
+        Parameters:
+        entry: IndexEntry - The entry to store.
+
+        No Return
+        """
+        self._removed.discard(entry.path)
+        self._pending[entry.path] = entry
+        if len(self._pending) >= _COMMIT_EVERY:
+            self.commit()
+
+    def remove(self, paths) -> None:
+        """
+        Removes the entries for files that no longer exist.
+
+        Parameters:
+        paths: iterable - Absolute paths of the files to remove.
+
+        No Return
+        """
+        for path in paths:
+            self._pending.pop(path, None)
+            self._removed.add(path)
+
+    def remove_folders(self, folders) -> None:
+        """
+        Removes the entries of every file directly inside the given folders.
+
+        Parameters:
+        folders: iterable - Absolute paths of the folders.
+
+        No Return
+        """
+        folders = set(folders)
+        for path in [path for path, entry in self._pending.items() if os.path.dirname(path) in folders]:
+            del self._pending[path]
+        self._removed_folders.update(folders)
+
+    def commit(self) -> None:
+        """
+        Writes the pending changes to disk in one transaction.
+
+        No Return
+        """
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files (path, folder, size, mtime_ns, album_name, default_album_name, has_cover, cover_hash, corrupt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(e.path, os.path.dirname(e.path), e.size, e.mtime_ns, e.album_name, e.default_album_name, int(e.has_cover), e.cover_hash, int(e.corrupt))
+                 for e in self._pending.values()],
+            )
+            self._connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in self._removed])
+            self._connection.executemany("DELETE FROM files WHERE folder = ?", [(folder,) for folder in self._removed_folders])
+        self._pending.clear()
+        self._removed.clear()
+        self._removed_folders.clear()
+
+    def close(self) -> None:
+        """
+        Commits pending changes and closes the database.
+
+        No Return
+        """
+        self.commit()
+        self._connection.close()
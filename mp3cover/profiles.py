@@ -0,0 +1,188 @@
+"""
+Device output profiles.
+
+A profile describes the cover a player needs: its size, how the JPEG is
+encoded and which ID3 version it reads. Profiles are stored by name under
+"device_profiles" in settings.json, so one library can be synced to several
+players, each getting a cover variant made for it. The profile used by
+default is stored under "device_profile".
+"""
+from .transforms import check_transforms
+
+# Screen size of the MECHEN 2.4" MP3/MP4 player
+MECHEN_COVER_SIZE = (240, 240)
+
+# Pillow's default JPEG quality, which embedded covers have always used
+DEFAULT_JPEG_QUALITY = 75
+
+# ID3v2 versions tags can be written as; mutagen writes 2.4 unless told otherwise
+ID3_VERSIONS = (3, 4)
+DEFAULT_ID3_VERSION = 4
+
+# Settings keys holding the profiles and the name of the default one
+PROFILES_SETTING = "device_profiles"
+ACTIVE_PROFILE_SETTING = "device_profile"
+
+
+class DeviceProfile:
+    """
+    How covers are made and tags written for one kind of player.
+
+    Attributes:
+    name: str - Name of the profile.
+    size: tuple - (width, height) the cover is fitted to, or None to keep the original size.
+    quality: int - JPEG quality of the cover.
+    progressive: bool - Whether to encode a progressive JPEG instead of a baseline one.
+    max_bytes: int - Largest size of the encoded cover in bytes, or None for no limit. Larger covers are
+    re-encoded with the quality and chroma subsampling that fit best (see mp3cover.encode_jpeg_budget).
+    id3_version: int - ID3v2 minor version tags are written as (3 or 4).
+    strip_metadata: bool - Whether to leave the source image's ICC profile and EXIF data out of the cover.
+    tag_transforms: tuple - Names of the extra tag transforms applied when the cover is embedded (see mp3cover.TAG_TRANSFORMS).
+    """
+
+    def __init__(self, name: str, size: tuple = MECHEN_COVER_SIZE, quality: int = DEFAULT_JPEG_QUALITY, progressive: bool = False, max_bytes: int = None, id3_version: int = DEFAULT_ID3_VERSION, strip_metadata: bool = True, tag_transforms: tuple = ()):
+        """
+        Initializes a DeviceProfile.
+
+        Parameters:
+        See the class attributes.
+        """
+        if size is not None and (len(size) != 2 or min(size) < 1):
+            raise ValueError(f"profile {name!r}: size must be [width, height]")
+        if not 1 <= quality <= 95:
+            raise ValueError(f"profile {name!r}: quality must be between 1 and 95")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"profile {name!r}: max_bytes must be positive")
+        if id3_version not in ID3_VERSIONS:
+            raise ValueError(f"profile {name!r}: id3_version must be 3 or 4")
+        try:
+            tag_transforms = check_transforms(tag_transforms)
+        except ValueError as e:
+            raise ValueError(f"profile {name!r}: {e}")
+
+        self.name = name
+        self.size = tuple(size) if size is not None else None
+        self.quality = quality
+        self.progressive = bool(progressive)
+        self.max_bytes = max_bytes
+        self.id3_version = id3_version
+        self.strip_metadata = bool(strip_metadata)
+        self.tag_transforms = tag_transforms
+
+    def copy(self, **changes) -> "DeviceProfile":
+        """
+        Makes a copy of the profile with some attributes changed.
+
+        Parameters:
+        changes: keyword arguments - Attributes to change.
+
+        Return DeviceProfile - The new profile.
+        """
+        attributes = dict(self.to_dict(), name=self.name)
+        attributes.update(changes)
+        return DeviceProfile(**attributes)
+
+    def encoding_params(self) -> dict:
+        """
+        Lists what the encoded cover depends on, for keying the cover cache.
+
+        Return dict - The size and JPEG encoding settings.
+        """
+        return {"size": self.size, "quality": self.quality, "progressive": self.progressive, "max_bytes": self.max_bytes, "strip_metadata": self.strip_metadata}
+
+    def to_dict(self) -> dict:
+        """
+        Converts the profile to the dictionary stored in settings.json.
+
+        Return dict - The profile without its name.
+        """
+        return {
+            "size": list(self.size) if self.size is not None else None,
+            "quality": self.quality,
+            "progressive": self.progressive,
+            "max_bytes": self.max_bytes,
+            "id3_version": self.id3_version,
+            "strip_metadata": self.strip_metadata,
+            "tag_transforms": list(self.tag_transforms),
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> "DeviceProfile":
+        """
+        Creates a profile from its settings.json dictionary; missing keys use the defaults.
+
+        Parameters:
+        name: str - Name of the profile.
+        data: dict - The stored profile.
+
+        Return DeviceProfile - The profile.
+        """
+        return cls(
+            name,
+            data.get("size", MECHEN_COVER_SIZE),
+            data.get("quality", DEFAULT_JPEG_QUALITY),
+            data.get("progressive", False),
+            data.get("max_bytes"),
+            data.get("id3_version", DEFAULT_ID3_VERSION),
+            data.get("strip_metadata", True),
+            data.get("tag_transforms", ()),
+        )
+
+
+# Built-in profiles: the MECHEN 2.4" player, and the cover at its original size
+MECHEN_PROFILE = DeviceProfile("MECHEN 2.4", MECHEN_COVER_SIZE)
+ORIGINAL_PROFILE = DeviceProfile("Original", None)
+DEFAULT_PROFILES = (MECHEN_PROFILE, ORIGINAL_PROFILE)
+
+
+def legacy_profile(resize: bool) -> DeviceProfile:
+    """
+    Gets the profile matching the original resize yes/no choice.
+
+    Parameters:
+    resize: bool - Whether to resize the cover for the MECHEN 2.4" screen.
+
+    Return DeviceProfile - MECHEN_PROFILE or ORIGINAL_PROFILE.
+    """
+    return MECHEN_PROFILE if resize else ORIGINAL_PROFILE
+
+
+def load_profiles(settings: dict) -> dict:
+    """
+    Reads the device profiles from the settings, on top of the built-in ones.
+
+    Parameters:
+    settings: dict - The loaded settings.
+
+    Return dict - DeviceProfile objects keyed by name.
+    """
+    profiles = {profile.name: profile for profile in DEFAULT_PROFILES}
+    for name, data in settings.get(PROFILES_SETTING, {}).items():
+        profiles[name] = DeviceProfile.from_dict(name, data)
+    return profiles
+
+
+def save_profiles(settings: dict, profiles: dict) -> None:
+    """
+    Stores the device profiles in the settings (call save_settings afterwards).
+
+    Parameters:
+    settings: dict - The loaded settings.
+    profiles: dict - DeviceProfile objects keyed by name.
+
+    No Return
+    """
+    settings[PROFILES_SETTING] = {name: profile.to_dict() for name, profile in profiles.items()}
+
+
+def active_profile(settings: dict, profiles: dict) -> DeviceProfile:
+    """
+    Gets the profile selected in the settings.
+
+    Parameters:
+    settings: dict - The loaded settings.
+    profiles: dict - DeviceProfile objects keyed by name (see load_profiles).
+
+    Return DeviceProfile - The selected profile, or MECHEN_PROFILE if none (or an unknown one) is selected.
+    """
+    return profiles.get(settings.get(ACTIVE_PROFILE_SETTING), MECHEN_PROFILE)
@@ -0,0 +1,282 @@
+"""
+Per-stage timing of runs and the JSONL run log.
+
+A RunStats object is passed (as stats=...) to the scan, encode and embed
+functions, which record how long each stage took for each file or cover:
+
+- scan_list: listing one directory
+- scan_index: loading one directory's entries from the library index
+- scan_file: reading the album of one MP3 file (or finding it in the index)
+- cover_read, cover_decode, cover_resize, cover_encode: reading, decoding,
+  fitting and JPEG encoding a cover
+- tag_parse, tag_save: parsing and saving one MP3 file's tags
+- embed_file: embedding the cover into one MP3 file, start to finish
+- sync_read, sync_write: reading one MP3 file from the library and writing
+  its copy to the sync target
+- audit_file: fully parsing and checking one MP3 file in an audit
+- undo_file: putting one MP3 file's original tags back from an undo log
+
+Each stage keeps a count, total and maximum wall time, a latency histogram,
+an error count and the bytes read and written where they're known (for the
+cover stages, the size of the source and encoded images). The run as a whole
+also records the bytes this process read and wrote, which leaves out process
+pool workers. At the end of a run the summary is appended as one JSON line to
+the run log, which is kept next to the embed folder (see run_log_path).
+
+profiled() is an opt-in cProfile hook for a whole run. It profiles the thread
+that runs it; files embedded by pool workers show up as time spent waiting.
+"""
+import cProfile
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Name of the run log file
+RUN_LOG_NAME = "run_log.jsonl"
+
+# Upper bounds (in milliseconds) of the latency histogram buckets; slower calls go into a last, open bucket
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def io_counters() -> tuple:
+    """
+    Reads how many bytes the current process has passed to read and write calls.
+
+    Return tuple - (bytes_read, bytes_written), or (None, None) where it can't be measured (only Linux has /proc/self/io).
+    """
+    counters = {}
+    try:
+        with open("/proc/self/io") as file:
+            for line in file:
+                name, value = line.split(":")
+                counters[name] = int(value)
+    except (OSError, ValueError):
+        return None, None
+    return counters.get("rchar"), counters.get("wchar")
+
+
+class StageStats:
+    """
+    Timing and byte counts of one stage.
+
+    Attributes:
+    count: int - Number of times the stage ran.
+    seconds: float - Total wall time.
+    max_seconds: float - Longest single run.
+    errors: int - Number of runs that failed.
+    bytes_read: int - Bytes read, where known.
+    bytes_written: int - Bytes written, where known.
+    histogram: list - Number of runs in each HISTOGRAM_BOUNDS_MS bucket, plus one for slower runs.
+    """
+
+    __slots__ = ("count", "seconds", "max_seconds", "errors", "bytes_read", "bytes_written", "histogram")
+
+    def __init__(self):
+        """
+        Initializes empty StageStats.
+        """
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds: float, bytes_read: int = 0, bytes_written: int = 0, error: bool = False) -> None:
+        """
+        Adds one run of the stage.
+
+        Parameters:
+        seconds: float - Wall time of the run.
+        bytes_read: int - Bytes the run read.
+        bytes_written: int - Bytes the run wrote.
+        error: bool - Whether the run failed.
+
+        No Return
+        """
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.errors += bool(error)
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+
+        milliseconds = seconds * 1000
+        bucket = 0
+        while bucket < len(HISTOGRAM_BOUNDS_MS) and milliseconds > HISTOGRAM_BOUNDS_MS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def merge(self, other: "StageStats") -> None:
+        """
+        Adds the runs of another StageStats to this one.
+
+        Parameters:
+        other: StageStats - The stats to add.
+
+        No Return
+        """
+        self.count += other.count
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.errors += other.errors
+        self.bytes_read += other.bytes_read
+        self.bytes_written += other.bytes_written
+        self.histogram = [mine + theirs for mine, theirs in zip(self.histogram, other.histogram)]
+
+    def to_dict(self) -> dict:
+        """
+        Converts the stats to a JSON-serializable dictionary.
+
+        Return dict - The stats, with the histogram keyed by bucket ("<=1ms" ... ">5000ms") and empty buckets left out.
+        """
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "seconds": self.seconds,
+            "mean_ms": 1000 * self.seconds / self.count if self.count else 0.0,
+            "max_ms": 1000 * self.max_seconds,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "histogram": {label: count for label, count in zip(labels, self.histogram) if count},
+        }
+
+
+class RunStats:
+    """
+    Per-stage timing of one run, safe to record into from several threads.
+
+    Attributes:
+    stages: dict - StageStats keyed by stage name.
+    started: datetime.datetime - When the run started.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty RunStats and notes the start of the run.
+        """
+        self.stages = {}
+        self.started = datetime.datetime.now()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._io_start = io_counters()
+
+    def __getstate__(self) -> dict:
+        # Process pool workers send their stats back to the parent, which can't pickle the lock
+        return {"stages": self.stages, "started": self.started, "_start": self._start, "_io_start": self._io_start}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, bytes_read: int = 0, bytes_written: int = 0, error: bool = False) -> None:
+        """
+        Records one run of a stage.
+
+        Parameters:
+        stage: str - Name of the stage.
+        seconds: float - Wall time of the run.
+        bytes_read: int - Bytes the run read.
+        bytes_written: int - Bytes the run wrote.
+        error: bool - Whether the run failed.
+
+        No Return
+        """
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageStats()
+            self.stages[stage].add(seconds, bytes_read, bytes_written, error)
+
+    def merge(self, other: "RunStats") -> None:
+        """
+        Adds the stages recorded by another RunStats, such as one filled in a process pool worker.
+
+        Parameters:
+        other: RunStats - The stats to add.
+
+        No Return
+        """
+        with self._lock:
+            for stage, stage_stats in other.stages.items():
+                if stage not in self.stages:
+                    self.stages[stage] = StageStats()
+                self.stages[stage].merge(stage_stats)
+
+    def to_dict(self) -> dict:
+        """
+        Summarizes the run so far.
+
+        Return dict - Start time, wall time, bytes the process read and wrote (None where unknown),
+        total errors and the stats of each stage.
+        """
+        bytes_read, bytes_written = io_counters()
+        read_start, written_start = self._io_start
+        with self._lock:
+            stages = {stage: stage_stats.to_dict() for stage, stage_stats in self.stages.items()}
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": time.perf_counter() - self._start,
+            "bytes_read": bytes_read - read_start if bytes_read is not None and read_start is not None else None,
+            "bytes_written": bytes_written - written_start if bytes_written is not None and written_start is not None else None,
+            "errors": sum(stage["errors"] for stage in stages.values()),
+            "stages": stages,
+        }
+
+
+def run_log_path(embed_folder: str) -> str:
+    """
+    Gets the path of the run log kept next to the embed folder.
+
+    Parameters:
+    embed_folder: str - Folder where embed example images are saved.
+
+    Return str - Path to the run log.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(embed_folder)), RUN_LOG_NAME)
+
+
+def write_run_log(log_path: str, stats: RunStats, **details) -> dict:
+    """
+    Appends the summary of a run to the run log as one JSON line.
+
+    Parameters:
+    log_path: str - Path to the run log.
+    stats: RunStats - The stats of the run.
+    details: keyword arguments - More fields to store with the run, such as the folder and album names.
+
+    Return dict - The entry that was written.
+    """
+    entry = dict(details, **stats.to_dict())
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    with open(log_path, 'a') as file:
+        file.write(json.dumps(entry) + "\n")
+    return entry
+
+
+@contextmanager
+def profiled(profile_path: str = None):
+    """
+    Profiles the code run inside the with block with cProfile, if a path is given.
+
+    Parameters:
+    profile_path: str - Path to save the profile to (readable with pstats), or None to not profile.
+
+    Yield None
+    """
+    if profile_path is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(profile_path)), exist_ok=True)
+        profiler.dump_stats(profile_path)
@@ -0,0 +1,82 @@
+"""
+Streaming directory scanner for MP3 libraries.
+
+Folders are walked with os.scandir one directory at a time, so nested
+Artist/Album/*.mp3 trees can be processed while they are still being walked
+and memory use only depends on the size of the largest single directory.
+"""
+import os
+
+
+def is_mp3_name(name: str) -> bool:
+    """
+    Checks whether a file name has the .mp3 extension.
+
+    Parameters:
+    name: str - File name.
+
+    Return bool - True for MP3 file names.
+    """
+    return name.lower().endswith('.mp3')
+
+
+def iter_mp3_dirs(folder: str, recursive: bool = True, cancel_event=None):
+    """
+    Walks the folder and yields the MP3 files of each directory that has any.
+
+    The DirEntry objects cache their stat results, so callers can use entry.stat()
+    without another lookup on platforms that return it with the listing.
+    Symlinked directories are not followed, to avoid loops.
+
+    Parameters:
+    folder: str - Path to the folder to walk.
+    recursive: bool - Whether to walk subfolders too.
+    cancel_event: threading.Event - Stops the walk between directories once set (optional).
+
+    Yield tuple - (directory, entries) where entries is a list of os.DirEntry for the MP3 files, sorted by name.
+    """
+    pending = [folder]
+    while pending:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+        directory = pending.pop()
+        mp3_entries = []
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and is_mp3_name(entry.name):
+                            mp3_entries.append(entry)
+                        elif recursive and entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            if directory == folder:
+                raise
+            continue
+
+        # Visit subfolders in name order
+        pending.extend(sorted(subdirectories, reverse=True))
+
+        if mp3_entries:
+            mp3_entries.sort(key=lambda entry: entry.name)
+            yield directory, mp3_entries
+
+
+def iter_mp3_files(folder: str, recursive: bool = True):
+    """
+    Yields the paths of the MP3 files in the folder, relative to the folder.
+
+    Parameters:
+    folder: str - Path to the folder to walk.
+    recursive: bool - Whether to walk subfolders too.
+
+    Yield str - Relative path of each MP3 file.
+    """
+    prefix_length = len(os.path.join(folder, ""))
+    for directory, entries in iter_mp3_dirs(folder, recursive):
+        for entry in entries:
+            yield entry.path[prefix_length:]
@@ -0,0 +1,45 @@
+"""
+Locations of the files the MP3 Album Cover Embedder keeps next to the program,
+and helpers to read and write settings.json without the GUI.
+"""
+import json
+import os
+
+# Folder containing mp3_album_cover_embedder.py and the mp3cover package
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETTINGS_FILE = os.path.join(APP_DIR, "settings.json")
+INDEX_FILE = os.path.join(APP_DIR, "library_index.sqlite")
+COVER_CACHE_DIR = os.path.join(APP_DIR, "cover_cache")
+JOURNAL_FILE = os.path.join(APP_DIR, "run_journal.jsonl")
+UNDO_DIR = os.path.join(APP_DIR, "undo_logs")
+
+
+def load_settings(settings_file: str = SETTINGS_FILE) -> dict:
+    """
+    Loads settings from the JSON file.
+
+    Parameters:
+    settings_file: str - Path to the settings JSON file.
+
+    Return dict - The settings, or an empty dictionary if the file doesn't exist.
+    """
+    if not os.path.exists(settings_file):
+        return {}
+    with open(settings_file, 'r') as file:
+        return json.load(file)
+
+
+def save_settings(settings: dict, settings_file: str = SETTINGS_FILE) -> None:
+    """
+    Saves settings to the JSON file.
+
+    Parameters:
+    settings: dict - The settings to save.
+    settings_file: str - Path to the settings JSON file.
+
+    No Return
+    """
+    os.makedirs(os.path.dirname(settings_file), exist_ok=True)
+    with open(settings_file, 'w') as file:
+        json.dump(settings, file)
@@ -0,0 +1,92 @@
+"""
+Cover data shared with process pool workers through shared memory.
+
+When embed_cover_data uses a process pool, the encoded cover is written once
+into a shared memory block. Each worker gets only the block's name and size,
+and maps the block itself, so the cover never passes through the pool's pipes,
+neither at worker start-up nor with each file. The tasks carry just the MP3
+path and the cover hash, which keeps IPC the same for an album of 10 tracks or
+10,000.
+
+mutagen only takes bytes for the APIC frame, so each worker copies the cover
+out of the block once, when it starts, and reuses that copy for every file.
+Where shared memory isn't available, the cover bytes are sent to each worker
+instead, which is what the pool did before.
+"""
+
+
+class SharedCover:
+    """
+    Encoded cover placed in a shared memory block for process pool workers.
+
+    Pickling a SharedCover (as the pool does with its initializer arguments) only sends
+    the block's name and size, unless shared memory couldn't be created.
+
+    Attributes:
+    name: str - Name of the shared memory block, or None if the cover couldn't be shared.
+    size: int - Length of the cover data in bytes.
+    """
+
+    def __init__(self, cover_data: bytes):
+        """
+        Copies the cover data into a new shared memory block.
+
+        Parameters:
+        cover_data: bytes - JPEG data of the cover image.
+        """
+        from multiprocessing import shared_memory
+
+        self.size = len(cover_data)
+        self._memory = None
+        self._data = None
+        try:
+            # A zero-sized block can't be created; max() keeps an empty cover working
+            self._memory = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        except OSError:
+            self.name = None
+            self._data = cover_data
+            return
+        self.name = self._memory.name
+        self._memory.buf[:self.size] = cover_data
+
+    def __getstate__(self) -> dict:
+        # Only the name travels to the workers; each one maps the block itself
+        return {"name": self.name, "size": self.size, "_data": self._data}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._memory = None
+
+    def read(self) -> bytes:
+        """
+        Gets the cover data, mapping the shared memory block if needed.
+
+        Return bytes - JPEG data of the cover image.
+        """
+        if self._data is not None:
+            return self._data
+        from multiprocessing import shared_memory
+
+        memory = self._memory or shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(memory.buf[:self.size])
+        finally:
+            if memory is not self._memory:
+                memory.close()
+
+    def close(self) -> None:
+        """
+        Frees the shared memory block. Only the process that created it may close it.
+
+        No Return
+        """
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self) -> "SharedCover":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,367 @@
+"""
+Single-pass sync of a music library to a player, with the covers embedded on the way.
+
+Embedding the covers into the library and then copying it to the player's SD
+card reads and writes every MP3 file twice. sync_library instead reads each
+source file once, puts the album's cover (and the Latin-1 text encodings the
+player needs) into its tags in memory, and writes the finished file to the
+target once. The library itself is never modified.
+
+Files are read and prepared by a pool of workers, but only one writer saves
+them, one after another in path order, so slow flash storage sees sequential
+writes of whole files. Each file is written to a .part file first and then
+renamed, so an interrupted sync never leaves a half-written track.
+
+A manifest in the target (SYNC_MANIFEST_NAME) remembers, for each file, the
+size and modification time of the source, a hash of its contents, the cover
+and ID3 version it was synced with, and the size and modification time of the
+copy. A file is skipped without reading it if its source and copy still
+match. If only the source's size or modification time changed, its contents
+are hashed and compared, so touched but unchanged files aren't written again.
+Albums without a cover and files that can't be parsed are copied unchanged.
+"""
+import hashlib
+import io
+import json
+import os
+import time
+from collections import deque
+
+from .batch import find_cover, split_by_sidecar
+from .core import READ_ERRORS, build_cover_tags, cover_padding, encode_cover_variants, read_tags, write_tags
+from .cover_cache import source_hash
+from .fastscan import cover_hash
+from .journal import completion_key
+
+# Name of the manifest kept in the root of the sync target
+SYNC_MANIFEST_NAME = ".mp3cover_sync.json"
+
+# Files read and prepared ahead of the writer per worker; bounds how many files are held in memory
+SYNC_LOOKAHEAD = 2
+
+# Finished files between saves of the manifest, so an interrupted sync keeps most of its progress
+MANIFEST_SAVE_INTERVAL = 100
+
+# Manifest key of files copied without a cover
+COPY_KEY = "copy"
+
+# What happened to a file
+SYNC_WRITTEN = "written"
+SYNC_COPIED = "copied"
+SYNC_SKIPPED = "skipped"
+
+
+class SyncResult:
+    """
+    The outcome of a sync run.
+
+    Attributes:
+    source: str - The music folder that was synced.
+    target: str - The folder it was synced to.
+    written: list - Files written with their album's cover, relative to source.
+    copied: list - Files copied unchanged, because their album has no cover or they couldn't be parsed.
+    skipped: list - Files whose copy in the target was already current.
+    errors: list - (file, message) tuples for the files that couldn't be synced.
+    missing_covers: list - Names of the albums for which no cover was found.
+    bytes_read: int - Bytes read from the source files (covers not counted).
+    bytes_written: int - Bytes written to the target.
+    cancelled: bool - Whether the run was cancelled before every file was synced.
+    """
+
+    def __init__(self, source: str, target: str):
+        """
+        Initializes an empty SyncResult.
+
+        Parameters:
+        source: str - The music folder being synced.
+        target: str - The folder it's synced to.
+        """
+        self.source = source
+        self.target = target
+        self.written = []
+        self.copied = []
+        self.skipped = []
+        self.errors = []
+        self.missing_covers = []
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.cancelled = False
+
+    def to_dict(self) -> dict:
+        """
+        Converts the result to a JSON-serializable dictionary.
+
+        Return dict - The result as a dictionary.
+        """
+        return {
+            "source": self.source,
+            "target": self.target,
+            "written": self.written,
+            "copied": self.copied,
+            "skipped_count": len(self.skipped),
+            "errors": [{"file": mp3_file, "error": message} for mp3_file, message in self.errors],
+            "missing_covers": self.missing_covers,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "cancelled": self.cancelled,
+        }
+
+
+def load_manifest(target: str) -> dict:
+    """
+    Reads the sync manifest of a target folder.
+
+    Parameters:
+    target: str - The sync target folder.
+
+    Return dict - Manifest entries keyed by path relative to the target, or an empty dictionary if there's no readable manifest.
+    """
+    try:
+        with open(os.path.join(target, SYNC_MANIFEST_NAME), 'r') as file:
+            return json.load(file).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def save_manifest(target: str, manifest: dict) -> None:
+    """
+    Saves the sync manifest of a target folder, replacing the old one in one step.
+
+    Parameters:
+    target: str - The sync target folder.
+    manifest: dict - Manifest entries keyed by path relative to the target.
+
+    No Return
+    """
+    manifest_path = os.path.join(target, SYNC_MANIFEST_NAME)
+    with open(manifest_path + ".part", 'w') as file:
+        json.dump({"files": manifest}, file)
+    os.replace(manifest_path + ".part", manifest_path)
+
+
+def _copy_unchanged(entry: dict, target_path: str) -> bool:
+    """
+    Checks whether the copy in the target is still the one the manifest entry describes.
+
+    Parameters:
+    entry: dict - The file's manifest entry.
+    target_path: str - Path to the copy.
+
+    Return bool - True if the copy has the recorded size and modification time.
+    """
+    try:
+        target_stat = os.stat(target_path)
+    except OSError:
+        return False
+    return target_stat.st_size == entry.get("target_size") and target_stat.st_mtime_ns == entry.get("target_mtime_ns")
+
+
+def _prepare_file(source_path: str, target_path: str, cover_data: bytes, key: str, entry: dict, id3_version: int, stats=None, transforms: tuple = ()) -> tuple:
+    """
+    Reads a source file once and builds the file to write to the target. Run on a worker thread.
+
+    Parameters:
+    source_path: str - Path to the source MP3 file.
+    target_path: str - Path to its copy in the target.
+    cover_data: bytes - JPEG data of the album's cover, or None to copy the file unchanged.
+    key: str - Manifest key of the cover, ID3 version and tag transforms (see mp3cover.completion_key), or COPY_KEY.
+    entry: dict - The file's manifest entry from an earlier sync, or None.
+    id3_version: int - ID3v2 minor version to write the tags as (3 or 4).
+    stats: mp3cover.RunStats - Records the sync_read, tag_parse and tag_save stages (optional).
+    transforms: tuple - Names of the extra tag transforms to apply (see mp3cover.TAG_TRANSFORMS).
+
+    Return tuple - (status, data, content_hash, bytes_read) where status is one of the SYNC_* values and
+    data is the file to write, or None if the copy is already current.
+    """
+    started = time.perf_counter()
+    with open(source_path, 'rb') as file:
+        source_data = file.read()
+    if stats is not None:
+        stats.record("sync_read", time.perf_counter() - started, bytes_read=len(source_data))
+
+    # The source was touched but its contents are the same as last time
+    content_hash = hashlib.sha1(source_data).hexdigest()
+    if entry is not None and entry.get("sha1") == content_hash and entry.get("key") == key and _copy_unchanged(entry, target_path):
+        return SYNC_SKIPPED, None, content_hash, len(source_data)
+
+    if cover_data is None:
+        return SYNC_COPIED, source_data, content_hash, len(source_data)
+
+    buffer = io.BytesIO(source_data)
+    try:
+        audio = read_tags(buffer, stats)
+        build_cover_tags(audio, cover_data, id3_version=id3_version, transforms=transforms)
+        write_tags(audio, cover_padding(len(cover_data)), id3_version, stats, buffer, shrink=bool(transforms))
+    except READ_ERRORS:
+        # The player may still be able to play it
+        return SYNC_COPIED, source_data, content_hash, len(source_data)
+    return SYNC_WRITTEN, buffer.getvalue(), content_hash, len(source_data)
+
+
+def _write_file(target_path: str, data: bytes, stats=None) -> None:
+    """
+    Writes a file to the target through a .part file, so it's never left half-written.
+
+    Parameters:
+    target_path: str - Path to write.
+    data: bytes - The file's contents.
+    stats: mp3cover.RunStats - Records the sync_write stage (optional).
+
+    No Return
+    """
+    started = time.perf_counter()
+    with open(target_path + ".part", 'wb') as file:
+        file.write(data)
+    os.replace(target_path + ".part", target_path)
+    if stats is not None:
+        stats.record("sync_write", time.perf_counter() - started, bytes_written=len(data))
+
+
+def sync_library(source: str, target: str, albums: dict, profile, covers_folder: str = None, corrupted_files: list = (), workers: int = 1, cache=None, progress=None, cancel_event=None, stats=None) -> SyncResult:
+    """
+    Copies the albums to the target with their covers embedded, reading and writing each file once.
+
+    Each album's cover is found like in batch mode (see mp3cover.find_cover and mp3cover.split_by_sidecar) and made for the profile.
+    Files keep their path relative to source.
+
+    Parameters:
+    source: str - Path to the music folder.
+    target: str - Folder to sync to, such as the player's music folder.
+    albums: dict - Album names mapped to their MP3 files relative to source, as returned by mp3cover.get_albums.
+    profile: mp3cover.DeviceProfile - Device profile to make the covers and write the tags for.
+    covers_folder: str - Folder with <album>.jpg covers (optional).
+    corrupted_files: list - Unreadable MP3 files relative to source, copied unchanged (optional).
+    workers: int - Number of files read and prepared at the same time; files are always written one at a time.
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    progress: callable - Called as progress(done, total) after each file (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    stats: mp3cover.RunStats - Records the time spent in each stage (optional).
+
+    Return SyncResult - The written, copied, skipped and failed files.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    source = os.path.normpath(source)
+    target = os.path.normpath(target)
+    result = SyncResult(source, target)
+    manifest = load_manifest(target)
+
+    # Cover and manifest key of every file
+    work = {}
+    encoded_covers = {}
+    album_parts = [(album_name, label, part_files) for album_name, mp3_files in albums.items()
+                   for label, part_files in split_by_sidecar(source, album_name, mp3_files)]
+    for album_name, label, mp3_files in album_parts:
+        cover_data = None
+        cover_source = find_cover(source, album_name, mp3_files, covers_folder)
+        if cover_source is None:
+            result.missing_covers.append(label)
+        else:
+            started = time.perf_counter()
+            try:
+                source_data = cover_source.read_data()
+            except OSError:
+                source_data = None
+            if stats is not None:
+                stats.record("cover_read", time.perf_counter() - started, bytes_read=len(source_data or b""), error=source_data is None)
+            digest = source_hash(source_data) if source_data else None
+            if digest is not None and digest not in encoded_covers:
+                try:
+                    encoded_covers[digest] = encode_cover_variants(source_data, [profile], cache, stats)[0]
+                except (OSError, ValueError):
+                    # Pillow raises OSError subclasses for images it can't decode
+                    encoded_covers[digest] = None
+            cover_data = encoded_covers.get(digest)
+            if cover_data is None:
+                result.errors.append((cover_source.path, "Cover image could not be read or decoded; the album is copied without it"))
+
+        key = completion_key(cover_hash(cover_data), profile.id3_version, profile.tag_transforms) if cover_data is not None else COPY_KEY
+        for mp3_file in mp3_files:
+            work[mp3_file] = (cover_data, key)
+    for mp3_file in corrupted_files:
+        work.setdefault(mp3_file, (None, COPY_KEY))
+
+    # Writing in path order keeps each folder's files together on the device
+    to_check = iter(sorted(work))
+    total = len(work)
+    done = 0
+    unsaved = 0
+    created_directories = set()
+    prepared = deque()
+    lookahead = max(workers, 1) * SYNC_LOOKAHEAD
+
+    def finish_file() -> None:
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while True:
+            # Keep the workers busy preparing the next files while this thread writes
+            while len(prepared) < lookahead and not result.cancelled:
+                mp3_file = next(to_check, None)
+                if mp3_file is None:
+                    break
+                source_path = os.path.join(source, mp3_file)
+                target_path = os.path.join(target, mp3_file)
+                cover_data, key = work[mp3_file]
+                entry = manifest.get(mp3_file)
+                try:
+                    source_stat = os.stat(source_path)
+                except OSError as e:
+                    result.errors.append((mp3_file, str(e) or type(e).__name__))
+                    finish_file()
+                    continue
+                if (entry is not None and entry.get("key") == key and entry.get("size") == source_stat.st_size
+                        and entry.get("mtime_ns") == source_stat.st_mtime_ns and _copy_unchanged(entry, target_path)):
+                    result.skipped.append(mp3_file)
+                    finish_file()
+                    continue
+                future = executor.submit(_prepare_file, source_path, target_path, cover_data, key, entry, profile.id3_version, stats,
+                                         profile.tag_transforms)
+                prepared.append((mp3_file, target_path, key, source_stat, future))
+
+            if not prepared:
+                break
+
+            mp3_file, target_path, key, source_stat, future = prepared.popleft()
+            try:
+                status, data, content_hash, bytes_read = future.result()
+                if data is not None:
+                    directory = os.path.dirname(target_path)
+                    if directory not in created_directories:
+                        os.makedirs(directory, exist_ok=True)
+                        created_directories.add(directory)
+                    _write_file(target_path, data, stats)
+                target_stat = os.stat(target_path)
+            except OSError as e:
+                result.errors.append((mp3_file, str(e) or type(e).__name__))
+            else:
+                manifest[mp3_file] = {
+                    "size": source_stat.st_size,
+                    "mtime_ns": source_stat.st_mtime_ns,
+                    "sha1": content_hash,
+                    "key": key,
+                    "target_size": target_stat.st_size,
+                    "target_mtime_ns": target_stat.st_mtime_ns,
+                }
+                {SYNC_WRITTEN: result.written, SYNC_COPIED: result.copied, SYNC_SKIPPED: result.skipped}[status].append(mp3_file)
+                result.bytes_read += bytes_read
+                result.bytes_written += len(data) if data is not None else 0
+                unsaved += 1
+            finish_file()
+
+            if unsaved >= MANIFEST_SAVE_INTERVAL:
+                save_manifest(target, manifest)
+                unsaved = 0
+
+            if cancel_event is not None and cancel_event.is_set() and not result.cancelled:
+                # Files already being prepared are written; the rest are never started
+                result.cancelled = True
+                for queued in prepared:
+                    queued[-1].cancel()
+                prepared = deque(queued for queued in prepared if not queued[-1].cancelled())
+
+    save_manifest(target, manifest)
+    return result
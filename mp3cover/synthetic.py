@@ -0,0 +1,139 @@
+"""
+Synthetic MP3 libraries and cover images for benchmarks.
+
+make_library writes an Artist/Album/track.mp3 tree of small but valid MP3
+files: a few silent MPEG frames, mostly with ID3 tags, plus the awkward cases a
+real library has (files without tags, tags without an album, already embedded
+covers and corrupt files). Each album gets a cover.jpg sidecar, with the
+source image sizes cycling through cover_sizes.
+
+Nothing here is needed to use the embedder; it only exists so scan and embed
+throughput can be measured on libraries of any size (see mp3cover.benchmark).
+"""
+import os
+import random
+
+from mutagen.id3 import ID3, APIC, TALB, TIT2, TPE1, TRCK
+from PIL import Image, ImageFilter
+
+# One silent MPEG-1 Layer III frame (128 kbit/s, 44.1 kHz, 417 bytes), enough for mutagen to find the audio
+MPEG_FRAME = b'\xff\xfb\x90\x00' + b'\x00' * 413
+
+# Kinds of synthetic tracks
+TRACK_TAGGED = "tagged"
+TRACK_WITH_COVER = "with_cover"
+TRACK_MISSING_ALBUM = "missing_album"
+TRACK_UNTAGGED = "untagged"
+TRACK_CORRUPT = "corrupt"
+
+
+def make_test_image(path: str, size: tuple = (3000, 3000), quality: int = 90) -> str:
+    """
+    Writes a synthetic JPEG cover with gradients and fine texture, so it has detail at every scale.
+
+    Parameters:
+    path: str - Path to write the JPEG to.
+    size: tuple - (width, height) of the image.
+    quality: int - JPEG quality of the image.
+
+    Return str - The path the image was written to.
+    """
+    gradient = Image.linear_gradient('L').resize(size)
+    noise = Image.effect_noise(size, 64).filter(ImageFilter.GaussianBlur(2))
+    radial = Image.radial_gradient('L').resize(size)
+    Image.merge("RGB", (gradient, noise, radial)).save(path, "JPEG", quality=quality)
+    return path
+
+
+def _track_kind(rng: random.Random, corrupt_ratio: float, untagged_ratio: float, missing_album_ratio: float, cover_ratio: float) -> str:
+    """
+    Picks the kind of a synthetic track.
+
+    Parameters:
+    rng: random.Random - Random number generator.
+    corrupt_ratio: float - Share of corrupt files.
+    untagged_ratio: float - Share of files without an ID3 tag.
+    missing_album_ratio: float - Share of tagged files without an album frame.
+    cover_ratio: float - Share of tagged files that already have an embedded cover.
+
+    Return str - One of the TRACK_* kinds.
+    """
+    roll = rng.random()
+    for kind, ratio in ((TRACK_CORRUPT, corrupt_ratio), (TRACK_UNTAGGED, untagged_ratio), (TRACK_MISSING_ALBUM, missing_album_ratio), (TRACK_WITH_COVER, cover_ratio)):
+        if roll < ratio:
+            return kind
+        roll -= ratio
+    return TRACK_TAGGED
+
+
+def make_library(root: str, albums: int = 20, tracks_per_album: int = 10, cover_sizes: tuple = (500, 1500, 3000), frames: int = 8,
+                 corrupt_ratio: float = 0.01, untagged_ratio: float = 0.02, missing_album_ratio: float = 0.03, cover_ratio: float = 0.2, seed: int = 0) -> dict:
+    """
+    Writes a synthetic MP3 library.
+
+    Parameters:
+    root: str - Folder to create the library in.
+    albums: int - Number of albums.
+    tracks_per_album: int - Number of tracks in each album.
+    cover_sizes: tuple - Side lengths of the square cover.jpg sidecars, used in turn by the albums.
+    frames: int - MPEG frames of audio in each track.
+    corrupt_ratio: float - Share of corrupt files (an ID3 header followed by garbage).
+    untagged_ratio: float - Share of files without an ID3 tag.
+    missing_album_ratio: float - Share of files with tags but no album frame.
+    cover_ratio: float - Share of tagged files that already have an embedded cover.
+    seed: int - Seed for the random choices, so the same arguments give the same library.
+
+    Return dict - Numbers of albums, files and bytes written, and the number of files of each kind.
+    """
+    rng = random.Random(seed)
+    audio = MPEG_FRAME * frames
+    summary = {"albums": albums, "files": 0, "bytes": 0, "kinds": {}}
+
+    # Each cover size is rendered once; albums get a copy with unique trailing bytes, which JPEG decoders
+    # ignore, so every album still has a distinct source image to decode and encode
+    cover_sources = {}
+    os.makedirs(root, exist_ok=True)
+    for side in cover_sizes:
+        image_path = make_test_image(os.path.join(root, f".cover_{side}.jpg"), (side, side))
+        with open(image_path, 'rb') as file:
+            cover_sources[side] = file.read()
+        os.remove(image_path)
+    # Covers already embedded in tracks are the small kind players usually come with
+    embedded_cover = cover_sources[min(cover_sizes)]
+
+    for album_number in range(albums):
+        artist = f"Artist {album_number % max(1, albums // 4):03d}"
+        album_name = f"Album {album_number:04d}"
+        album_folder = os.path.join(root, artist, album_name)
+        os.makedirs(album_folder, exist_ok=True)
+
+        cover_data = cover_sources[cover_sizes[album_number % len(cover_sizes)]] + album_number.to_bytes(4, 'big')
+        with open(os.path.join(album_folder, "cover.jpg"), 'wb') as file:
+            file.write(cover_data)
+
+        for track_number in range(1, tracks_per_album + 1):
+            path = os.path.join(album_folder, f"{track_number:02d} Track {track_number}.mp3")
+            kind = _track_kind(rng, corrupt_ratio, untagged_ratio, missing_album_ratio, cover_ratio)
+            summary["kinds"][kind] = summary["kinds"].get(kind, 0) + 1
+
+            with open(path, 'wb') as file:
+                if kind == TRACK_CORRUPT:
+                    file.write(b'ID3\x04\x00\x00\x00\x00\x10\x00' + rng.randbytes(256))
+                else:
+                    file.write(audio)
+
+            if kind not in (TRACK_CORRUPT, TRACK_UNTAGGED):
+                tags = ID3()
+                tags.add(TIT2(encoding=3, text=f"Track {track_number}"))
+                tags.add(TPE1(encoding=3, text=artist))
+                tags.add(TRCK(encoding=3, text=str(track_number)))
+                if kind != TRACK_MISSING_ALBUM:
+                    tags.add(TALB(encoding=3, text=album_name))
+                if kind == TRACK_WITH_COVER:
+                    tags.add(APIC(encoding=0, mime='image/jpeg', type=3, desc='', data=embedded_cover))
+                tags.save(path)
+
+            summary["files"] += 1
+            summary["bytes"] += os.path.getsize(path)
+
+    return summary
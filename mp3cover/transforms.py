@@ -0,0 +1,73 @@
+"""
+Extra tag transforms applied when a cover is embedded.
+
+Embedding always puts the cover in the tags and forces the album, artist and
+title frames to Latin-1. A device profile can list more transforms under
+"tag_transforms" in settings.json, such as dropping frames the player never
+shows. They are applied in order to the same parsed tags, after the cover, so
+a file is still loaded and saved only once however many transforms there are.
+Writing the tags as ID3v2.3 is the profile's "id3_version" setting, applied
+last.
+
+Smaller tags mean less to write and less for the player to skip past when it
+scans its library. When a profile has transforms, write_tags also cuts back
+padding left over beyond the usual reserve, so dropped frames really shrink
+the tag instead of turning into padding. The size of each file's tag before
+and after is reported with the embed results.
+"""
+
+# Frames each transform removes, by transform name
+TAG_TRANSFORMS = {
+    "drop_private": ("PRIV",),          # Private data, such as store purchase IDs
+    "drop_objects": ("GEOB",),          # Encapsulated files
+    "drop_comments": ("COMM",),
+    "drop_lyrics": ("USLT", "SYLT"),
+    "drop_extra_text": ("TXXX",),       # User-defined text, such as ReplayGain and tagger IDs
+}
+
+
+def check_transforms(transforms) -> tuple:
+    """
+    Checks that every transform name is known.
+
+    Parameters:
+    transforms: iterable - Transform names.
+
+    Return tuple - The names.
+    Raises ValueError for an unknown name.
+    """
+    transforms = tuple(transforms)
+    for name in transforms:
+        if name not in TAG_TRANSFORMS:
+            raise ValueError(f"unknown tag transform {name!r} (available: {', '.join(TAG_TRANSFORMS)})")
+    return transforms
+
+
+def transforms_pending(tags, transforms: tuple) -> bool:
+    """
+    Checks whether applying the transforms would change the tags.
+
+    Parameters:
+    tags: ID3 - The file's tags, or None.
+    transforms: tuple - Transform names.
+
+    Return bool - True if the tags have a frame one of the transforms removes.
+    """
+    if tags is None:
+        return False
+    return any(tags.getall(frame_id) for name in transforms for frame_id in TAG_TRANSFORMS[name])
+
+
+def apply_transforms(tags, transforms: tuple) -> None:
+    """
+    Applies the transforms to the parsed tags in memory.
+
+    Parameters:
+    tags: ID3 - The file's tags.
+    transforms: tuple - Transform names, applied in order.
+
+    No Return
+    """
+    for name in transforms:
+        for frame_id in TAG_TRANSFORMS[name]:
+            tags.delall(frame_id)
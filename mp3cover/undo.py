@@ -0,0 +1,437 @@
+"""
+Undo log of the original tags of every file a run changes.
+
+Embedding replaces the covers and the text encodings of a file's tags, so a
+batch run with the wrong covers could only be fixed by embedding again, with
+the original tags lost. Before a file is written, its original tag region is
+saved to the run's undo log: the ID3v2 tag at the start of the file, with its
+padding, and the ID3v1 tag at the end if there is one. The audio is never
+copied, so the log of a whole library run stays small.
+
+restore_tags puts the saved tags back, in parallel. The audio between the
+tags is moved only if the tag region changed size, and never rewritten. A
+file whose audio has changed since the run (it was replaced or re-encoded)
+is left alone and reported.
+
+Each run writes its own log (see undo_log_path). A record is flushed before
+the file is written, and a record cut off by a crash is ignored, so the log
+always covers every file the run may have changed. Only the first record of
+each file is kept, which is its state before the run.
+"""
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .fastscan import id3v2_tag_size
+
+# File name extension of undo logs
+UNDO_LOG_EXTENSION = ".undo"
+
+# Undo logs kept in the undo folder; older ones are removed when a new run starts
+UNDO_LOG_KEEP = 20
+
+# Length of the start of the audio that is hashed to tell whether the audio changed since the run
+AUDIO_CHECK_SIZE = 64 * 1024
+
+# Length prefix of each record's JSON header
+_RECORD_HEADER = struct.Struct(">I")
+
+# What happened to a file when its tags were restored
+RESTORE_RESTORED = "restored"
+RESTORE_UNCHANGED = "unchanged"
+
+
+class UndoError(Exception):
+    """
+    Raised when a file's saved tags can't be put back, because the file has changed since the run.
+    """
+
+
+class TagSnapshot:
+    """
+    The original tag region of one MP3 file.
+
+    Attributes:
+    path: str - Absolute path to the MP3 file.
+    head: bytes - The ID3v2 tag at the start of the file, with its padding (empty if there was none).
+    tail: bytes - The ID3v1 tag at the end of the file (empty if there was none).
+    audio_size: int - Number of bytes between the two tags.
+    audio_crc: int - CRC-32 of the first AUDIO_CHECK_SIZE bytes of the audio.
+    """
+
+    def __init__(self, path: str, head: bytes, tail: bytes, audio_size: int, audio_crc: int):
+        """
+        Initializes a TagSnapshot.
+
+        Parameters:
+        See the class attributes.
+        """
+        self.path = path
+        self.head = head
+        self.tail = tail
+        self.audio_size = audio_size
+        self.audio_crc = audio_crc
+
+
+def _tag_region(file, file_size: int) -> tuple:
+    """
+    Finds the ID3v2 tag at the start and the ID3v1 tag at the end of an open MP3 file.
+
+    Parameters:
+    file: file object - The MP3 file, opened in binary mode.
+    file_size: int - Size of the file in bytes.
+
+    Return tuple - (head_size, tail_size) in bytes.
+    Raises UndoError if the ID3v2 header's size field is invalid.
+    """
+    file.seek(0)
+    head_size = id3v2_tag_size(file.read(10))
+    if head_size is None:
+        raise UndoError("invalid ID3v2 tag size")
+    head_size = min(head_size, file_size)
+
+    tail_size = 0
+    if file_size - head_size >= 128:
+        file.seek(file_size - 128)
+        if file.read(3) == b'TAG':
+            tail_size = 128
+    return head_size, tail_size
+
+
+def _resize_region(file, old_size: int, new_size: int, offset: int) -> None:
+    """
+    Grows or shrinks a region of an open file in place, moving the rest of the file along.
+
+    Parameters:
+    file: file object - The file, opened for reading and writing in binary mode.
+    old_size: int - Current size of the region in bytes.
+    new_size: int - Size to give it.
+    offset: int - Where the region starts.
+
+    No Return
+    """
+    # resize_bytes is private mutagen API, the same code mutagen moves audio with when a tag grows.
+    # It's only imported here, so a mutagen change can break undoing but not importing mp3cover.
+    from mutagen._util import resize_bytes
+
+    resize_bytes(file, old_size, new_size, offset)
+
+
+def _audio_crc(file, head_size: int, audio_size: int) -> int:
+    """
+    Hashes the start of the audio of an open MP3 file.
+
+    Parameters:
+    file: file object - The MP3 file, opened in binary mode.
+    head_size: int - Size of the ID3v2 tag region before the audio.
+    audio_size: int - Number of bytes of audio.
+
+    Return int - CRC-32 of the first AUDIO_CHECK_SIZE bytes of the audio.
+    """
+    file.seek(head_size)
+    return zlib.crc32(file.read(min(audio_size, AUDIO_CHECK_SIZE)))
+
+
+def take_snapshot(mp3_path: str) -> TagSnapshot:
+    """
+    Reads the tag region of an MP3 file before it's changed.
+
+    Parameters:
+    mp3_path: str - Path to the MP3 file.
+
+    Return TagSnapshot - The file's tags and a fingerprint of its audio.
+    Raises UndoError if the file's ID3v2 header is invalid.
+    """
+    with open(mp3_path, 'rb') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        head_size, tail_size = _tag_region(file, file_size)
+        audio_size = file_size - head_size - tail_size
+        file.seek(0)
+        head = file.read(head_size)
+        audio_crc = _audio_crc(file, head_size, audio_size)
+        file.seek(file_size - tail_size)
+        tail = file.read(tail_size)
+    return TagSnapshot(os.path.abspath(mp3_path), head, tail, audio_size, audio_crc)
+
+
+def restore_snapshot(snapshot: TagSnapshot) -> str:
+    """
+    Puts a file's saved tags back, leaving its audio as it is.
+
+    Parameters:
+    snapshot: TagSnapshot - The saved tags.
+
+    Return str - RESTORE_RESTORED, or RESTORE_UNCHANGED if the file already has these tags.
+    Raises UndoError if the file's audio changed since the snapshot was taken, or its ID3v2 header is invalid.
+    """
+    with open(snapshot.path, 'r+b') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        head_size, tail_size = _tag_region(file, file_size)
+        audio_size = file_size - head_size - tail_size
+        if audio_size != snapshot.audio_size or _audio_crc(file, head_size, audio_size) != snapshot.audio_crc:
+            raise UndoError("the audio has changed since the run")
+
+        file.seek(0)
+        head = file.read(head_size)
+        file.seek(file_size - tail_size)
+        tail = file.read(tail_size)
+        if head == snapshot.head and tail == snapshot.tail:
+            return RESTORE_UNCHANGED
+
+        # The end first, so the head's offsets stay valid
+        if tail != snapshot.tail:
+            file.truncate(file_size - tail_size)
+            file.seek(file_size - tail_size)
+            file.write(snapshot.tail)
+        if head != snapshot.head:
+            _resize_region(file, head_size, len(snapshot.head), 0)
+            file.seek(0)
+            file.write(snapshot.head)
+    return RESTORE_RESTORED
+
+
+class UndoLog:
+    """
+    Append-only log of the original tags of the files a run changes. Safe to use from several threads.
+
+    The log file is only created once the first snapshot is added, so a run that changes nothing leaves no log.
+
+    Attributes:
+    path: str - Path to the log file.
+    paths: set - Absolute paths of the files in the log.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes an UndoLog.
+
+        Parameters:
+        path: str - Path to the log file.
+        """
+        self.path = path
+        self.paths = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, snapshot: TagSnapshot) -> None:
+        """
+        Adds a file's original tags to the log, unless the log already has them, and flushes them to the operating system.
+
+        Parameters:
+        snapshot: TagSnapshot - The tags, taken before the file is written.
+
+        No Return
+        """
+        header = json.dumps({
+            "path": snapshot.path,
+            "head": len(snapshot.head),
+            "tail": len(snapshot.tail),
+            "audio_size": snapshot.audio_size,
+            "audio_crc": snapshot.audio_crc,
+        }).encode("utf-8")
+        with self._lock:
+            if snapshot.path in self.paths:
+                return
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, 'ab')
+            self._file.write(_RECORD_HEADER.pack(len(header)) + header + snapshot.head + snapshot.tail)
+            self._file.flush()
+            self.paths.add(snapshot.path)
+
+    def close(self) -> None:
+        """
+        Closes the log file.
+
+        No Return
+        """
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def __enter__(self) -> "UndoLog":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def read_undo_log(path: str) -> list:
+    """
+    Reads the saved tags from an undo log.
+
+    Parameters:
+    path: str - Path to the log file.
+
+    Return list - TagSnapshot of each file, in the order they were saved.
+    """
+    snapshots = {}
+    with open(path, 'rb') as file:
+        while True:
+            prefix = file.read(_RECORD_HEADER.size)
+            if len(prefix) < _RECORD_HEADER.size:
+                break
+            header = file.read(_RECORD_HEADER.unpack(prefix)[0])
+            try:
+                record = json.loads(header)
+            except ValueError:
+                break
+            head = file.read(record["head"])
+            tail = file.read(record["tail"])
+            if len(head) < record["head"] or len(tail) < record["tail"]:
+                # The last record may have been cut off by a crash
+                break
+            snapshots.setdefault(record["path"], TagSnapshot(record["path"], head, tail, record["audio_size"], record["audio_crc"]))
+    return list(snapshots.values())
+
+
+def undo_log_path(undo_dir: str) -> str:
+    """
+    Chooses the path of a new run's undo log, removing the oldest logs beyond UNDO_LOG_KEEP.
+
+    Parameters:
+    undo_dir: str - Folder the undo logs are kept in.
+
+    Return str - Path for the new log, named after the current time.
+    """
+    for old_path in list_undo_logs(undo_dir)[UNDO_LOG_KEEP - 1:]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+    name = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(undo_dir, name + UNDO_LOG_EXTENSION)
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = os.path.join(undo_dir, f"{name}-{suffix}{UNDO_LOG_EXTENSION}")
+    return path
+
+
+def list_undo_logs(undo_dir: str) -> list:
+    """
+    Lists the undo logs in a folder.
+
+    Parameters:
+    undo_dir: str - Folder the undo logs are kept in.
+
+    Return list - Paths of the logs, newest first.
+    """
+    try:
+        names = [name for name in os.listdir(undo_dir) if name.endswith(UNDO_LOG_EXTENSION)]
+    except OSError:
+        return []
+    paths = [os.path.join(undo_dir, name) for name in names]
+    return sorted(paths, key=lambda path: (os.path.getmtime(path), path), reverse=True)
+
+
+class UndoResult:
+    """
+    The outcome of restoring the tags from an undo log.
+
+    Attributes:
+    restored: list - Files whose original tags were put back.
+    unchanged: list - Files that already had their original tags.
+    errors: list - (file, message) tuples for the files that couldn't be restored.
+    cancelled: bool - Whether the run was cancelled before every file was restored.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty UndoResult.
+        """
+        self.restored = []
+        self.unchanged = []
+        self.errors = []
+        self.cancelled = False
+
+    def to_dict(self) -> dict:
+        """
+        Converts the result to a JSON-serializable dictionary.
+
+        Return dict - The result as a dictionary.
+        """
+        return {
+            "restored": self.restored,
+            "unchanged": self.unchanged,
+            "errors": [{"file": mp3_file, "error": message} for mp3_file, message in self.errors],
+            "cancelled": self.cancelled,
+        }
+
+
+def _restore_task(snapshot: TagSnapshot, stats=None) -> tuple:
+    """
+    Restores one file's tags, returning the error instead of raising it.
+
+    Parameters:
+    snapshot: TagSnapshot - The saved tags.
+    stats: mp3cover.RunStats - Records the undo_file stage (optional).
+
+    Return tuple - (status, error) where status is RESTORE_RESTORED or RESTORE_UNCHANGED and error is the error message,
+    or None if the file was processed.
+    """
+    started = time.perf_counter()
+    try:
+        outcome = restore_snapshot(snapshot), None
+    except (OSError, UndoError) as e:
+        outcome = None, str(e) or type(e).__name__
+    if stats is not None:
+        stats.record("undo_file", time.perf_counter() - started, bytes_written=len(snapshot.head) + len(snapshot.tail), error=outcome[1] is not None)
+    return outcome
+
+
+def restore_tags(snapshots: list, workers: int = 1, progress=None, cancel_event=None, stats=None) -> UndoResult:
+    """
+    Puts the saved tags of many files back, optionally across a thread pool.
+
+    Parameters:
+    snapshots: list - TagSnapshot of each file (see read_undo_log).
+    workers: int - Number of files to restore at the same time.
+    progress: callable - Called as progress(done, total) after each file (optional).
+    cancel_event: threading.Event - Stops the run between files once set (optional).
+    stats: mp3cover.RunStats - Records the undo_file stage (optional).
+
+    Return UndoResult - The restored, unchanged and failed files.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    result = UndoResult()
+    done = 0
+
+    def finish_file(snapshot: TagSnapshot, outcome: tuple) -> None:
+        nonlocal done
+        status, error = outcome
+        if error is not None:
+            result.errors.append((snapshot.path, error))
+        elif status == RESTORE_UNCHANGED:
+            result.unchanged.append(snapshot.path)
+        else:
+            result.restored.append(snapshot.path)
+        done += 1
+        if progress is not None:
+            progress(done, len(snapshots))
+
+    if workers <= 1:
+        for snapshot in snapshots:
+            if cancel_event is not None and cancel_event.is_set():
+                result.cancelled = True
+                break
+            finish_file(snapshot, _restore_task(snapshot, stats))
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_restore_task, snapshot, stats): snapshot for snapshot in snapshots}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            finish_file(futures[future], future.result())
+            if cancel_event is not None and cancel_event.is_set() and not result.cancelled:
+                # Files already being restored are finished; the rest are never started
+                result.cancelled = True
+                for queued in futures:
+                    queued.cancel()
+    return result
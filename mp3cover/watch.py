@@ -0,0 +1,561 @@
+"""
+Watch mode: embeds covers into new or changed MP3 files as they arrive.
+
+The music folder is watched with inotify on Linux, or polled where inotify
+isn't available. Either watcher only reports files whose writing has finished,
+and keeps the files still being written in its writing set: inotify reports a
+file once it is closed after writing (IN_CLOSE_WRITE) or moved in, and the
+polling watcher once its size and modification time are the same on two polls
+in a row. A file is never embedded while it is still being copied, since
+growing its tag moves the audio under the copier's feet.
+
+Finished files are collected per directory, and after a directory has been
+quiet for the debounce time they are compared with a snapshot of the files'
+sizes and modification times. The new or changed MP3 files are grouped by
+album, and each album gets its cover the same way as in batch mode (see
+mp3cover.batch.find_cover). A new or changed cover sidecar counts as a change
+to every MP3 file in its folder that isn't still being written.
+
+Only the changed files are embedded, with skip_unchanged so a file that
+already has the cover is left alone. The snapshot is updated with the stats of
+the written files, so the watcher's own writes don't trigger another round.
+"""
+import os
+import select
+import struct
+import time
+
+from .batch import IMAGE_EXTENSIONS, find_cover
+from .core import EmbedResult, embed_cover_targets, encode_cover_variants, get_albums
+from .profiles import MECHEN_PROFILE
+from .scanner import is_mp3_name
+
+# inotify flags and event masks (from <sys/inotify.h>)
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+# Size of struct inotify_event without its name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Default seconds without new writes before a burst is processed, and between polls of the polling watcher
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 5.0
+
+# Longest a continuous stream of finished files can hold back processing a directory, in multiples of the debounce time.
+# Files still being written are never processed, however long they take.
+MAX_DEBOUNCE_FACTOR = 10
+
+
+def iter_directories(folder: str, recursive: bool = True):
+    """
+    Walks the folder and yields it and its subfolders, without following symlinks.
+
+    Parameters:
+    folder: str - Path to the folder to walk.
+    recursive: bool - Whether to walk subfolders too.
+
+    Yield str - Path of each directory.
+    """
+    pending = [folder]
+    while pending:
+        directory = pending.pop()
+        yield directory
+        if not recursive:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                pending.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+
+
+def is_cover_name(name: str) -> bool:
+    """
+    Checks whether a file name could be an album's cover sidecar (cover.jpg, folder.png, <album>.jpg, ...).
+
+    Parameters:
+    name: str - File name.
+
+    Return bool - True for image file names.
+    """
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def snapshot_directory(directory: str) -> dict:
+    """
+    Reads the sizes and modification times of the MP3 files and images in one directory.
+
+    Parameters:
+    directory: str - Path to the directory.
+
+    Return dict - (size, mtime_ns) keyed by file name, or None if the directory no longer exists.
+    """
+    snapshot = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not (is_mp3_name(entry.name) or is_cover_name(entry.name)):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat_result = entry.stat()
+                        snapshot[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return snapshot
+
+
+def stat_key(path: str) -> tuple:
+    """
+    Reads the size and modification time of a file.
+
+    Parameters:
+    path: str - Path to the file.
+
+    Return tuple - (size, mtime_ns), or None if the file can't be read.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result.st_size, stat_result.st_mtime_ns
+
+
+def changed_mp3_files(old: dict, new: dict, names=None) -> list:
+    """
+    Compares two snapshots of a directory.
+
+    Parameters:
+    old: dict - The earlier snapshot (see snapshot_directory).
+    new: dict - The current snapshot.
+    names: iterable - Only compare these files (optional; all files by default).
+
+    Return list - Names of the MP3 files that are new or changed, or of every MP3 file if an image is new or changed.
+    """
+    if names is not None:
+        new_names = set(names)
+        compared = {name: key for name, key in new.items() if name in new_names}
+    else:
+        compared = new
+    changed = [name for name, key in compared.items() if old.get(name) != key]
+    if any(is_cover_name(name) for name in changed):
+        return sorted(name for name in new if is_mp3_name(name))
+    return sorted(name for name in changed if is_mp3_name(name))
+
+
+class InotifyWatcher:
+    """
+    Reports finished files using Linux inotify, with one watch per directory.
+
+    Files found in a new subfolder, or anywhere after inotify dropped events, may have been opened before
+    their folder was watched. They are settled like in PollingWatcher: reported once their size and modification
+    time stay the same for settle_interval, unless an event shows they're still being written.
+
+    Attributes:
+    folder: str - The watched folder.
+    recursive: bool - Whether subfolders are watched too.
+    settle_interval: float - Seconds a file found without events must stay unchanged before it's reported.
+    writing: set - Paths of the files that are being written (modified and not closed yet).
+    """
+
+    def __init__(self, folder: str, recursive: bool = True, settle_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Starts watching the folder.
+
+        Parameters:
+        folder: str - Path to the folder to watch.
+        recursive: bool - Whether to watch subfolders too, including ones created later.
+        settle_interval: float - Seconds a file found without events must stay unchanged before it's reported.
+
+        Raises OSError - If inotify isn't available.
+        """
+        # ctypes is only needed by this watcher, so it isn't loaded for polling or other runs
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is None or not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.folder = folder
+        self.recursive = recursive
+        self.settle_interval = settle_interval
+        self.writing = set()
+        self._settling = {}
+        self._next_settle = None
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._directories = {}
+        self._add_tree(folder)
+
+    def _add_tree(self, folder: str) -> set:
+        """
+        Adds watches for a folder and, when recursive, its subfolders.
+
+        Parameters:
+        folder: str - Path to the folder.
+
+        Return set - The directories now watched.
+        """
+        added = set()
+        for directory in iter_directories(folder, self.recursive):
+            watch = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if watch < 0:
+                from ctypes import get_errno
+
+                error = get_errno()
+                if directory == folder and folder == self.folder:
+                    raise OSError(error, f"{os.strerror(error)}: {directory}")
+                continue
+            self._directories[watch] = directory
+            added.add(directory)
+        return added
+
+    def _settle(self, directories) -> None:
+        """
+        Starts settling every file already in the directories, whose writing inotify may not have seen.
+
+        Parameters:
+        directories: iterable - Paths of the directories.
+
+        No Return
+        """
+        for directory in directories:
+            for name in snapshot_directory(directory) or {}:
+                path = os.path.join(directory, name)
+                if path not in self.writing:
+                    self._settling[path] = stat_key(path)
+        if self._settling and self._next_settle is None:
+            self._next_settle = time.monotonic() + self.settle_interval
+
+    def _settled(self) -> set:
+        """
+        Checks the settling files once settle_interval has passed since the last check.
+
+        Return set - Paths of the files that didn't change since the last check.
+        """
+        if self._next_settle is None or time.monotonic() < self._next_settle:
+            return set()
+        settled = set()
+        for path, key in list(self._settling.items()):
+            current = stat_key(path)
+            if current is None or current == key:
+                del self._settling[path]
+                if current is not None:
+                    settled.add(path)
+            else:
+                self._settling[path] = current
+        self._next_settle = time.monotonic() + self.settle_interval if self._settling else None
+        return settled
+
+    def wait(self, timeout: float) -> set:
+        """
+        Waits for files to be finished.
+
+        Parameters:
+        timeout: float - Longest time to wait in seconds.
+
+        Return set - Paths of the files closed after writing or moved in (empty if nothing happened).
+        New subfolders are watched from now on; the files in a folder moved in are reported, and the files
+        in a folder created in place are settled first.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return self._settled()
+
+        finished = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return self._settled()
+
+        offset = 0
+        while offset < len(data):
+            watch, mask, cookie, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + name_length].rstrip(b"\0"))
+            offset += INOTIFY_EVENT.size + name_length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so any file may have changed
+                self._settle(self._directories.values())
+                continue
+            directory = self._directories.get(watch)
+            if mask & IN_IGNORED:
+                self._directories.pop(watch, None)
+                continue
+            if directory is None:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if self.recursive and mask & IN_MOVED_TO:
+                    # A folder moved in is complete
+                    for added in self._add_tree(path):
+                        finished.update(os.path.join(added, name) for name in snapshot_directory(added) or {})
+                elif self.recursive and mask & IN_CREATE:
+                    # Files can land in a new folder before its watch exists, still open or not
+                    self._settle(self._add_tree(path))
+            elif mask & (IN_CREATE | IN_MODIFY):
+                self.writing.add(path)
+                self._settling.pop(path, None)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.writing.discard(path)
+                self._settling.pop(path, None)
+                finished.add(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.writing.discard(path)
+                self._settling.pop(path, None)
+                finished.discard(path)
+        return finished | self._settled()
+
+    def close(self) -> None:
+        """
+        Stops watching.
+
+        No Return
+        """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    Reports finished files by comparing snapshots of the folder at a fixed interval, for systems without inotify.
+
+    A new or changed file is only reported once its size and modification time are the same on two polls in a row.
+    Polling can't see whether a file is still open, so a copy that stalls for longer than the interval looks finished;
+    use inotify where it's available.
+
+    Attributes:
+    folder: str - The watched folder.
+    recursive: bool - Whether subfolders are watched too.
+    interval: float - Seconds between polls.
+    writing: set - Paths of the files that changed on the last poll.
+    """
+
+    def __init__(self, folder: str, recursive: bool = True, interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Initializes a PollingWatcher.
+
+        Parameters:
+        folder: str - Path to the folder to watch.
+        recursive: bool - Whether to watch subfolders too.
+        interval: float - Seconds between polls.
+        """
+        self.folder = folder
+        self.recursive = recursive
+        self.interval = interval
+        self.writing = set()
+        self._snapshots = {directory: snapshot_directory(directory) for directory in iter_directories(folder, recursive)}
+        self._next_poll = time.monotonic() + interval
+
+    def wait(self, timeout: float) -> set:
+        """
+        Waits until the next poll or the timeout, whichever comes first.
+
+        Parameters:
+        timeout: float - Longest time to wait in seconds.
+
+        Return set - Paths of the MP3 files and images that changed before the last poll and not since
+        (empty if it wasn't time to poll).
+        """
+        remaining = self._next_poll - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(remaining, 0))
+
+        snapshots = {directory: snapshot_directory(directory) for directory in iter_directories(self.folder, self.recursive)}
+        finished = set()
+        writing = set()
+        for directory, snapshot in snapshots.items():
+            old = self._snapshots.get(directory) or {}
+            for name, key in (snapshot or {}).items():
+                path = os.path.join(directory, name)
+                if old.get(name) != key:
+                    writing.add(path)
+                elif path in self.writing:
+                    finished.add(path)
+        self.writing = writing
+        self._snapshots = snapshots
+        self._next_poll = time.monotonic() + self.interval
+        return finished
+
+    def close(self) -> None:
+        """
+        Stops watching (nothing to release).
+
+        No Return
+        """
+
+
+def open_watcher(folder: str, recursive: bool = True, poll_interval: float = DEFAULT_POLL_INTERVAL, polling: bool = False):
+    """
+    Starts watching the folder with inotify where available, or by polling.
+
+    Parameters:
+    folder: str - Path to the folder to watch.
+    recursive: bool - Whether to watch subfolders too.
+    poll_interval: float - Seconds between polls when polling, and the settle interval of the inotify watcher.
+    polling: bool - Whether to poll even if inotify is available.
+
+    Return InotifyWatcher or PollingWatcher - The watcher.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(folder, recursive, poll_interval)
+        except OSError:
+            pass
+    return PollingWatcher(folder, recursive, poll_interval)
+
+
+def embed_changed_files(directory: str, mp3_names: list, profile=MECHEN_PROFILE, covers_folder: str = None, workers: int = 1,
+                        use_processes: bool = False, cache=None, index=None, stats=None) -> tuple:
+    """
+    Embeds covers into the given files of one directory, grouped by album.
+
+    Each album's cover is looked for among all its files in the directory, so a new track
+    also gets a cover already embedded in the album's other tracks.
+
+    Parameters:
+    directory: str - Path to the directory.
+    mp3_names: list - Names of the new or changed MP3 files in it.
+    profile: mp3cover.DeviceProfile - Device profile to make the covers and write the tags for.
+    covers_folder: str - Folder with <album>.jpg covers (optional).
+    workers: int - Number of files to update at the same time.
+    use_processes: bool - Whether to use a process pool instead of a thread pool.
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    index: mp3cover.LibraryIndex - Index used to read the albums of unchanged files (optional).
+    stats: mp3cover.RunStats - Records the time spent in each stage (optional).
+
+    Return tuple - (results, missing_covers) where results lists the EmbedResult of each album
+    and missing_covers the names of the albums for which no cover was found.
+    """
+    albums, corrupted_files = get_albums(directory, index=index, recursive=False, stats=stats)
+    wanted = set(mp3_names)
+    results = []
+    missing_covers = []
+
+    for album_name, mp3_files in albums.items():
+        changed = [mp3_file for mp3_file in mp3_files if mp3_file in wanted]
+        if not changed:
+            continue
+
+        source = find_cover(directory, album_name, mp3_files, covers_folder)
+        if source is None:
+            missing_covers.append(album_name)
+            continue
+
+        try:
+            source_data = source.read_data()
+            variants = encode_cover_variants(source_data, [profile], cache, stats) if source_data else None
+        except (OSError, ValueError):
+            variants = None
+        if variants is None:
+            result = EmbedResult(album_name)
+            result.errors.append((source.path, "Cover image could not be read or decoded"))
+            results.append(result)
+            continue
+
+        results.extend(embed_cover_targets([(directory, profile)], album_name, changed, variants, workers, use_processes,
+                                           skip_unchanged=True, stats=stats))
+
+    return results, missing_covers
+
+
+def watch_folder(folder: str, profile=MECHEN_PROFILE, covers_folder: str = None, recursive: bool = True, debounce: float = DEFAULT_DEBOUNCE,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, polling: bool = False, workers: int = 1, use_processes: bool = False,
+                 cache=None, index=None, on_results=None, cancel_event=None, stats=None) -> None:
+    """
+    Watches the folder and embeds covers into new or changed MP3 files until cancelled.
+
+    Files already in the folder when watching starts are left alone; embed them with a batch run first.
+
+    Parameters:
+    folder: str - Path to the music folder.
+    profile: mp3cover.DeviceProfile - Device profile to make the covers and write the tags for.
+    covers_folder: str - Folder with <album>.jpg covers (optional).
+    recursive: bool - Whether to watch subfolders too.
+    debounce: float - Seconds without newly finished files in a directory before its files are processed.
+    poll_interval: float - Seconds between polls when inotify isn't available.
+    polling: bool - Whether to poll even if inotify is available.
+    workers: int - Number of files to update at the same time.
+    use_processes: bool - Whether to use a process pool instead of a thread pool.
+    cache: mp3cover.CoverCache - Cache of processed covers (optional).
+    index: mp3cover.LibraryIndex - Index used to read the albums of unchanged files (optional).
+    on_results: callable - Called as on_results(directory, results, missing_covers) after each directory is processed (optional).
+    cancel_event: threading.Event - Stops watching once set (optional; otherwise watch until interrupted).
+    stats: mp3cover.RunStats - Records the time spent in each stage (optional).
+
+    No Return
+    """
+    folder = os.path.abspath(folder)
+    watcher = open_watcher(folder, recursive, poll_interval, polling)
+    snapshots = {directory: snapshot_directory(directory) for directory in iter_directories(folder, recursive)}
+    # Finished files waiting for their directory to be quiet, and when the directory's first and last ones came in
+    pending = {}
+    first_change = {}
+    last_change = {}
+
+    try:
+        while cancel_event is None or not cancel_event.is_set():
+            finished = watcher.wait(min(debounce, 1.0))
+            now = time.monotonic()
+            for path in finished:
+                directory, name = os.path.split(path)
+                if not (is_mp3_name(name) or is_cover_name(name)):
+                    continue
+                pending.setdefault(directory, set()).add(name)
+                last_change[directory] = now
+                first_change.setdefault(directory, now)
+
+            for directory in sorted(pending):
+                if now - last_change[directory] < debounce and now - first_change[directory] < debounce * MAX_DEBOUNCE_FACTOR:
+                    continue
+                names = pending.pop(directory)
+                del first_change[directory], last_change[directory]
+
+                snapshot = snapshot_directory(directory)
+                if snapshot is None:
+                    snapshots.pop(directory, None)
+                    continue
+                old = snapshots.setdefault(directory, {})
+                # Files opened again since they were finished wait for their next close
+                mp3_names = [name for name in changed_mp3_files(old, snapshot, names) if os.path.join(directory, name) not in watcher.writing]
+                for name in names:
+                    if name in snapshot:
+                        old[name] = snapshot[name]
+                    else:
+                        old.pop(name, None)
+                if not mp3_names:
+                    continue
+
+                results, missing_covers = embed_changed_files(directory, mp3_names, profile, covers_folder, workers, use_processes, cache, index, stats)
+                # Take in the watcher's own writes, so they aren't seen as new changes
+                for result in results:
+                    for mp3_path in result.updated_files:
+                        key = stat_key(mp3_path)
+                        if key is not None:
+                            old[os.path.basename(mp3_path)] = key
+                if on_results is not None:
+                    on_results(directory, results, missing_covers)
+    finally:
+        watcher.close()
@@ -0,0 +1,69 @@
+"""
+Shared fixtures for the tests: a small synthetic library and cover data to embed.
+
+Run the tests from the repository root with python -m pytest.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mp3cover.synthetic import make_library  # noqa: E402
+
+
+def fake_cover(size: int, seed: int = 0) -> bytes:
+    """
+    Makes cover data of an exact size. The tags don't care whether it decodes.
+
+    Parameters:
+    size: int - Size of the data in bytes.
+    seed: int - Changes the bytes, so covers of the same size differ.
+
+    Return bytes - JPEG start-of-image marker followed by filler bytes.
+    """
+    filler = bytes((i * 7 + seed) % 256 for i in range(256))
+    return (b'\xff\xd8' + filler * (size // 256 + 1))[:size]
+
+
+def read_tree(root: str) -> dict:
+    """
+    Reads every MP3 file under a folder.
+
+    Parameters:
+    root: str - The folder.
+
+    Return dict - Contents of each MP3 file, keyed by its path relative to root.
+    """
+    contents = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".mp3"):
+                path = os.path.join(directory, name)
+                with open(path, 'rb') as file:
+                    contents[os.path.relpath(path, root)] = file.read()
+    return contents
+
+
+@pytest.fixture
+def library(tmp_path) -> str:
+    """
+    A library of 2 albums of 4 tracks, each album with a cover.jpg sidecar; some tracks already have a cover.
+    """
+    root = str(tmp_path / "library")
+    make_library(root, albums=2, tracks_per_album=4, cover_sizes=(300,), corrupt_ratio=0, untagged_ratio=0,
+                 missing_album_ratio=0, cover_ratio=0.25, seed=1)
+    return root
+
+
+@pytest.fixture
+def albums(library) -> dict:
+    """
+    Album names of the library mapped to their MP3 files.
+    """
+    from mp3cover import get_albums
+
+    albums, corrupted_files = get_albums(library)
+    assert not corrupted_files
+    return albums
@@ -0,0 +1,162 @@
+"""
+Tests for auditing a library: one small library with every kind of problem the audit reports.
+"""
+import csv
+import io
+import json
+import os
+
+import pytest
+from mutagen.id3 import APIC, ID3, TALB, TIT2
+from PIL import Image
+
+from mp3cover import MECHEN_PROFILE, audit_library
+from mp3cover.audit import (ISSUE_BAD_COVER, ISSUE_CORRUPT, ISSUE_MISMATCHED_COVERS, ISSUE_MISSING_COVER, ISSUE_MULTIPLE_COVERS,
+                            ISSUE_NON_LATIN1_TEXT, ISSUE_OVERSIZED_COVER, ISSUE_TRUNCATED)
+from mp3cover.cli import main
+from mp3cover.synthetic import MPEG_FRAME
+
+AUDIO = MPEG_FRAME * 8
+MAX_BYTES = 20000
+PROFILE = MECHEN_PROFILE.copy(max_bytes=MAX_BYTES)
+
+
+def image_data(size: tuple, image_format: str = "JPEG", noise: bool = False, **options) -> bytes:
+    """
+    Encodes a test image.
+    """
+    if noise:
+        cover_image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+    else:
+        cover_image = Image.new("RGB", size, (200, 40, 40))
+    buffer = io.BytesIO()
+    cover_image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+GOOD = image_data((240, 240))
+OTHER = image_data((200, 200), quality=50)
+
+
+def track(path: str, album: str = None, covers: tuple = (), title: str = "Title", audio: bytes = AUDIO) -> None:
+    """
+    Writes an MP3 file with an ID3v2.3 tag holding the album, title and covers.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(audio)
+    tags = ID3()
+    if album is not None:
+        tags.add(TALB(encoding=0, text=album))
+    tags.add(TIT2(encoding=1, text=title))
+    for i, cover_data in enumerate(covers):
+        tags.add(APIC(encoding=0, mime="image/jpeg", type=3 if i == 0 else 4, desc=str(i), data=cover_data))
+    tags.save(path, v2_version=3)
+
+
+def raw(path: str, data: bytes) -> None:
+    """
+    Writes a file as it is.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+# (file, or album for a whole album, issue) of every problem in the library, and the albums whose cover has to be embedded again
+EXPECTED_ISSUES = sorted([
+    ("Good/09 cut audio.mp3", ISSUE_TRUNCATED),
+    ("Problems/01 missing.mp3", ISSUE_MISSING_COVER),
+    ("Problems/02 multiple.mp3", ISSUE_MULTIPLE_COVERS),
+    ("Problems/03 big.mp3", ISSUE_OVERSIZED_COVER),
+    ("Problems/04 heavy.mp3", ISSUE_OVERSIZED_COVER),
+    ("Problems/05 png.mp3", ISSUE_BAD_COVER),
+    ("Problems/06 progressive.mp3", ISSUE_BAD_COVER),
+    ("Problems/07 garbage.mp3", ISSUE_BAD_COVER),
+    ("Problems/08 text.mp3", ISSUE_NON_LATIN1_TEXT),
+    ("Broken/corrupt.mp3", ISSUE_CORRUPT),
+    ("Broken/bad size.mp3", ISSUE_CORRUPT),
+    ("Broken/cut tag.mp3", ISSUE_TRUNCATED),
+    ("Mixed", ISSUE_MISMATCHED_COVERS),
+    ("Problems", ISSUE_MISMATCHED_COVERS),
+])
+ALBUMS_TO_EMBED = ["Mixed", "Problems"]
+
+
+@pytest.fixture
+def problems(tmp_path) -> str:
+    """
+    A library with every kind of problem in EXPECTED_ISSUES.
+    """
+    root = str(tmp_path / "library")
+    track(os.path.join(root, "Good", "01.mp3"), "Good", [GOOD])
+    track(os.path.join(root, "Good", "02.mp3"), "Good", [GOOD])
+    # A Xing header promising far more frames than the file has
+    xing = bytearray(MPEG_FRAME)
+    xing[36:48] = b"Xing" + (1).to_bytes(4, 'big') + (1000).to_bytes(4, 'big')
+    track(os.path.join(root, "Good", "09 cut audio.mp3"), "Good", [GOOD], audio=bytes(xing) + AUDIO)
+
+    track(os.path.join(root, "Mixed", "01.mp3"), "Mixed", [GOOD])
+    track(os.path.join(root, "Mixed", "02.mp3"), "Mixed", [OTHER])
+
+    heavy = image_data((200, 200), noise=True, quality=95)
+    assert len(heavy) > MAX_BYTES
+    problem_tracks = {
+        "01 missing.mp3": {},
+        "02 multiple.mp3": {"covers": [GOOD, OTHER]},
+        "03 big.mp3": {"covers": [image_data((400, 400))]},
+        "04 heavy.mp3": {"covers": [heavy]},
+        "05 png.mp3": {"covers": [image_data((200, 200), "PNG")]},
+        "06 progressive.mp3": {"covers": [image_data((200, 200), progressive=True)]},
+        "07 garbage.mp3": {"covers": [b"\xff\xd8 not really a JPEG"]},
+        "08 text.mp3": {"covers": [GOOD], "title": "Ωmega"},
+    }
+    for name, options in problem_tracks.items():
+        track(os.path.join(root, "Problems", name), "Problems", **options)
+
+    raw(os.path.join(root, "Broken", "corrupt.mp3"), b"ID3\x03\x00\x00\x00\x00\x02\x00" + b"\xff\xfe garbage " * 40)
+    raw(os.path.join(root, "Broken", "bad size.mp3"), b"ID3\x03\x00\x00\x80\x80\x80\x80" + AUDIO)
+    raw(os.path.join(root, "Broken", "cut tag.mp3"), b"ID3\x03\x00\x00\x00\x01\x00\x00" + b"\x00" * 100)
+    return root
+
+
+def found(issues: list) -> list:
+    """
+    Reduces the issues of a report to sorted (file or album, issue) pairs, with paths using forward slashes.
+    """
+    return sorted((issue["file"].replace(os.sep, "/") if issue["file"] else issue["album"], issue["issue"]) for issue in issues)
+
+
+@pytest.mark.parametrize("options", [{}, {"workers": 3}, {"workers": 2, "use_processes": True}], ids=["serial", "threads", "processes"])
+def test_audit_finds_every_issue(problems, options):
+    report = audit_library(problems, PROFILE, **options)
+    assert report.files_checked == 16
+    assert not report.cancelled
+    assert found(report.issues) == EXPECTED_ISSUES
+    assert report.albums_to_embed() == ALBUMS_TO_EMBED
+
+
+def test_truncated_audio_needs_no_new_cover(problems):
+    report = audit_library(os.path.join(problems, "Good"), PROFILE.copy(max_bytes=None), recursive=False)
+    assert found(report.issues) == [("09 cut audio.mp3", ISSUE_TRUNCATED)]
+    assert report.albums_to_embed() == []
+
+
+def test_json_and_csv_reports(problems, tmp_path, capsys):
+    csv_path = str(tmp_path / "audit.csv")
+    exit_code = main(["--folder", problems, "--audit", "--profile", PROFILE.name, "--max-bytes", str(MAX_BYTES), "--json", "--csv", csv_path])
+    assert exit_code == 1
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["files_checked"] == 16
+    assert report["albums_to_embed"] == ALBUMS_TO_EMBED
+    assert found(report["issues"]) == EXPECTED_ISSUES
+    expected_counts = {}
+    for name, issue in EXPECTED_ISSUES:
+        expected_counts[issue] = expected_counts.get(issue, 0) + 1
+    assert report["counts"] == expected_counts
+
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    assert [(row["file"] or None, row["album"] or None, row["issue"], row["detail"]) for row in rows] == \
+        [(issue["file"], issue["album"], issue["issue"], issue["detail"]) for issue in report["issues"]]
@@ -0,0 +1,135 @@
+"""
+Tests that the fast tag scan reads the same album and cover as mutagen's full parse.
+"""
+import os
+
+import pytest
+from conftest import fake_cover
+
+from mp3cover import READ_ERRORS, id3v2_tag_size, read_album_info, scan_tags
+
+COVER = fake_cover(3000)
+UTF16_ALBUM = b"\x01" + "Café del Mar".encode("utf-16") + b"\x00\x00"
+# A 128-byte ID3v1 tag
+ID3V1_TAG = b"TAG" + b"Title".ljust(30, b"\0") + b"Artist".ljust(30, b"\0") + b"Old Album".ljust(30, b"\0") + b"1999" + b"\0" * 30 + b"\x0c"
+
+
+def syncsafe(value: int) -> bytes:
+    """
+    Encodes an integer in 4 bytes of 7 bits each, like ID3v2 sizes.
+    """
+    return bytes((value >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def frame(version: int, frame_id: bytes, body: bytes) -> bytes:
+    """
+    Builds an ID3v2 frame of the given minor version.
+    """
+    if version == 2:
+        return frame_id + len(body).to_bytes(3, 'big') + body
+    size = syncsafe(len(body)) if version == 4 else len(body).to_bytes(4, 'big')
+    return frame_id + size + b"\x00\x00" + body
+
+
+def picture(version: int, encoding: int = 0, description: bytes = b"\x00") -> bytes:
+    """
+    Builds a front cover frame holding COVER.
+    """
+    if version == 2:
+        return frame(2, b"PIC", bytes([encoding]) + b"JPG\x03" + description + COVER)
+    return frame(version, b"APIC", bytes([encoding]) + b"image/jpeg\x00\x03" + description + COVER)
+
+
+def album(version: int, body: bytes = b"\x00Album") -> bytes:
+    """
+    Builds an album frame.
+    """
+    return frame(version, b"TAL" if version == 2 else b"TALB", body)
+
+
+def tag(version: int, frames: list, extended: bool = False, footer: bool = False, padding: int = 100) -> bytes:
+    """
+    Builds an ID3v2 tag, optionally with an extended header or an ID3v2.4 footer.
+    """
+    body = b"".join(frames)
+    flags = 0
+    if extended:
+        flags |= 0x40
+        # Extended header without CRC or restrictions
+        body = (b"\x00\x00\x00\x06\x00\x00\x00\x00\x00\x00" if version == 3 else syncsafe(6) + b"\x01\x00") + body
+    if footer:
+        flags |= 0x10
+        padding = 0  # Tags with a footer can't have padding
+    body += b"\x00" * padding
+    header = bytes([version, 0, flags]) + syncsafe(len(body))
+    return b"ID3" + header + body + (b"3DI" + header if footer else b"")
+
+
+CASES = {
+    "v2.2": tag(2, [album(2), picture(2)]),
+    "v2.3": tag(3, [album(3), picture(3)]),
+    "v2.4": tag(4, [album(4), picture(4)]),
+    "v2.3 utf-16 album": tag(3, [album(3, UTF16_ALBUM), picture(3)]),
+    "v2.4 utf-8 album": tag(4, [album(4, b"\x03" + "Café".encode("utf-8")), picture(4)]),
+    "utf-16 description": tag(3, [picture(3, 1, "Front".encode("utf-16") + b"\x00\x00"), album(3)]),
+    "utf-16-be description": tag(4, [picture(4, 2, "Front".encode("utf-16-be") + b"\x00\x00"), album(4)]),
+    "v2.3 extended header": tag(3, [album(3), picture(3)], extended=True),
+    "v2.4 extended header": tag(4, [album(4), picture(4)], extended=True),
+    "v2.4 footer": tag(4, [album(4), picture(4)], footer=True),
+    "no cover": tag(3, [album(3)]),
+    "no album": tag(3, [picture(3)]),
+}
+
+
+@pytest.fixture
+def audio(library, albums) -> bytes:
+    """
+    MPEG audio of a library track, without its tag.
+    """
+    with open(os.path.join(library, albums["Album 0000"][0]), 'rb') as file:
+        data = file.read()
+    return data[id3v2_tag_size(data[:10]):]
+
+
+def write(path, data: bytes) -> str:
+    """
+    Writes a test file and returns its path.
+    """
+    with open(path, 'wb') as file:
+        file.write(data)
+    return str(path)
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_fast_scan_matches_full_parse(tmp_path, audio, name):
+    mp3_path = write(tmp_path / "track.mp3", CASES[name] + audio)
+    full = read_album_info(mp3_path, fast=False, hash_cover=True)
+    assert full[0] is not None or full[1]
+
+    # The fast scan has to handle these itself, not fall back to the full parse
+    assert scan_tags(mp3_path, hash_cover=True) == full
+    assert read_album_info(mp3_path, fast=True, hash_cover=True) == full
+    assert read_album_info(mp3_path, fast=True) == full[:2] + (None,)
+
+
+@pytest.mark.parametrize("prefix, suffix, expected", [
+    (b"", b"", (None, False, None)),
+    (b"", ID3V1_TAG, ("Old Album", False, None)),
+    (CASES["no album"], ID3V1_TAG, ("Old Album", True, None)),
+], ids=["untagged", "id3v1 only", "album only in id3v1"])
+def test_files_without_id3v2_album(tmp_path, audio, prefix, suffix, expected):
+    mp3_path = write(tmp_path / "track.mp3", prefix + audio + suffix)
+    assert read_album_info(mp3_path, fast=False) == expected
+    assert scan_tags(mp3_path) == expected
+    assert read_album_info(mp3_path, fast=True) == expected
+
+
+@pytest.mark.parametrize("data", [
+    b"not an mp3 file at all" * 10,
+    b"ID3\x03\x00\x00\x00\x00\x10\x00" + b"\x00" * 50,
+], ids=["garbage", "tag without audio"])
+def test_corrupt_files_fail_both_ways(tmp_path, data):
+    mp3_path = write(tmp_path / "track.mp3", data)
+    for fast in (True, False):
+        with pytest.raises(READ_ERRORS):
+            read_album_info(mp3_path, fast=fast, hash_cover=True)
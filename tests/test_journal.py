@@ -0,0 +1,79 @@
+"""
+Tests for resuming an interrupted embed run from its checkpoint journal.
+"""
+import os
+import shutil
+import threading
+
+from conftest import fake_cover, read_tree
+
+from mp3cover import MECHEN_PROFILE, RunJournal, completion_key, embed_cover_data, journaled_run, run_plan
+
+
+def interrupted_run(library: str, albums: dict, journal_path: str, cover_data: bytes, files_done: int):
+    """
+    Embeds the cover into Album 0000 and cancels the run after files_done files, like a user pressing Cancel.
+
+    Return EmbedResult - The result of the interrupted run.
+    """
+    cancel_event = threading.Event()
+
+    def progress(done: int, total: int) -> None:
+        if done >= files_done:
+            cancel_event.set()
+
+    with journaled_run(journal_path, run_plan([(library, MECHEN_PROFILE)], albums), cancel_event) as journal:
+        return embed_cover_data(library, "Album 0000", albums["Album 0000"], cover_data, progress=progress, cancel_event=cancel_event, journal=journal)
+
+
+def test_interrupted_run_resumes(tmp_path, library, albums):
+    cover_data = fake_cover(20000)
+    journal_path = str(tmp_path / "journal.jsonl")
+    expected = str(tmp_path / "expected")
+    shutil.copytree(library, expected)
+    embed_cover_data(expected, "Album 0000", albums["Album 0000"], cover_data)
+
+    first = interrupted_run(library, albums, journal_path, cover_data, 2)
+    assert first.cancelled
+    assert len(first.updated_files) == 2
+    assert os.path.exists(journal_path)
+
+    plan = run_plan([(library, MECHEN_PROFILE)], albums)
+    with journaled_run(journal_path, plan) as journal:
+        assert journal.resumed
+        second = embed_cover_data(library, "Album 0000", albums["Album 0000"], cover_data, journal=journal)
+    assert sorted(second.resumed_files) == sorted(first.updated_files)
+    assert len(second.updated_files) == len(albums["Album 0000"]) - 2
+    assert not set(second.updated_files) & set(first.updated_files)
+
+    # A completed run removes its journal, and the files end up as if the run had never stopped
+    assert not os.path.exists(journal_path)
+    assert read_tree(library) == read_tree(expected)
+
+
+def test_different_cover_is_not_resumed(tmp_path, library, albums):
+    journal_path = str(tmp_path / "journal.jsonl")
+    interrupted_run(library, albums, journal_path, fake_cover(20000), 2)
+
+    with journaled_run(journal_path, run_plan([(library, MECHEN_PROFILE)], albums)) as journal:
+        assert journal.resumed
+        result = embed_cover_data(library, "Album 0000", albums["Album 0000"], fake_cover(20000, seed=1), journal=journal)
+    assert result.resumed_files == []
+    assert len(result.updated_files) == len(albums["Album 0000"])
+
+
+def test_different_plan_starts_over(tmp_path, library, albums):
+    journal_path = str(tmp_path / "journal.jsonl")
+    interrupted_run(library, albums, journal_path, fake_cover(20000), 2)
+
+    other_plan = run_plan([(library, MECHEN_PROFILE)], {"Album 0000": albums["Album 0000"]})
+    journal = RunJournal(journal_path, other_plan)
+    journal.close()
+    assert not journal.resumed
+    assert journal.completed == {}
+
+
+def test_completion_key_covers_the_written_tags():
+    key = completion_key("abc", 4)
+    assert completion_key("abc", 4, ()) == key
+    assert len({key, completion_key("abd", 4), completion_key("abc", 3), completion_key("abc", 4, ("drop_comments",))}) == 4
@@ -0,0 +1,100 @@
+"""
+Tests that the asyncio embed pipeline writes the same files as the worker pool.
+"""
+import os
+import shutil
+import threading
+
+import pytest
+from conftest import fake_cover, read_tree
+
+from mp3cover import embed_cover_data
+from mp3cover.synthetic import make_library
+
+COVER = fake_cover(20000)
+
+
+def relative(paths: list, root: str) -> list:
+    """
+    Sorts file paths relative to the library they're in.
+    """
+    return sorted(os.path.relpath(path, root) for path in paths)
+
+
+def embed_all(library: str, albums: dict, **options) -> list:
+    """
+    Embeds COVER into every album of the library.
+
+    Return list - EmbedResult of each album.
+    """
+    return [embed_cover_data(library, album_name, mp3_files, COVER, **options) for album_name, mp3_files in albums.items()]
+
+
+@pytest.mark.parametrize("options", [{}, {"id3_version": 4}, {"transforms": ("drop_comments",)}], ids=["default", "v2.4", "transforms"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_pipeline_matches_thread_pool(tmp_path, library, albums, workers, options):
+    expected = str(tmp_path / "expected")
+    shutil.copytree(library, expected)
+    pooled = embed_all(expected, albums, workers=2, **options)
+
+    results = embed_all(library, albums, workers=workers, pipeline=True, **options)
+    assert read_tree(library) == read_tree(expected)
+    for result, pooled_result in zip(results, pooled):
+        assert not result.errors and not result.cancelled
+        assert relative(result.updated_files, library) == relative(pooled_result.updated_files, expected)
+        assert ({os.path.relpath(path, library): sizes for path, sizes in result.tag_sizes.items()}
+                == {os.path.relpath(path, expected): sizes for path, sizes in pooled_result.tag_sizes.items()})
+
+    # Nothing is left to change the second time
+    again = embed_all(library, albums, workers=workers, pipeline=True, skip_unchanged=True, **options)
+    assert all(result.updated_files == [] for result in again)
+    assert read_tree(library) == read_tree(expected)
+
+
+def test_cancelled_pipeline_leaves_whole_files(tmp_path):
+    library = str(tmp_path / "library")
+    make_library(library, albums=1, tracks_per_album=30, cover_sizes=(300,), corrupt_ratio=0, untagged_ratio=0,
+                 missing_album_ratio=0, cover_ratio=0, seed=2)
+    mp3_files = sorted(os.path.relpath(os.path.join(directory, name), library)
+                       for directory, _, names in os.walk(library) for name in names if name.endswith(".mp3"))
+    original = read_tree(library)
+    expected = str(tmp_path / "expected")
+    shutil.copytree(library, expected)
+    embed_cover_data(expected, "Album 0000", mp3_files, COVER)
+    embedded = read_tree(expected)
+
+    cancel_event = threading.Event()
+
+    def progress(done: int, total: int) -> None:
+        if done >= 2:
+            cancel_event.set()
+
+    result = embed_cover_data(library, "Album 0000", mp3_files, COVER, workers=2, pipeline=True, progress=progress, cancel_event=cancel_event)
+    assert result.cancelled
+    assert 2 <= len(result.updated_files) < len(mp3_files)
+    assert not result.errors
+
+    # Files read before the cancel are finished, and the rest are untouched
+    current = read_tree(library)
+    written = set(relative(result.updated_files, library))
+    for mp3_file, data in current.items():
+        assert data == (embedded[mp3_file] if mp3_file in written else original[mp3_file])
+
+    # Running again finishes the album
+    rest = embed_cover_data(library, "Album 0000", mp3_files, COVER, workers=2, pipeline=True, skip_unchanged=True)
+    assert not rest.cancelled
+    assert len(rest.updated_files) == len(mp3_files) - len(written)
+    assert read_tree(library) == embedded
+
+
+def test_pipeline_errors_fail_only_their_files(library, albums):
+    mp3_files = albums["Album 0000"]
+    with open(os.path.join(library, mp3_files[1]), 'wb') as file:
+        file.write(b"ID3\x03\x00\x00\x00\x00\x10\x00" + b"not a tag" * 20)
+    os.remove(os.path.join(library, mp3_files[3]))
+
+    result = embed_cover_data(library, "Album 0000", mp3_files, COVER, workers=2, pipeline=True)
+    assert not result.cancelled
+    assert sorted(mp3_file for mp3_file, message in result.errors) == [mp3_files[1], mp3_files[3]]
+    assert all(message for mp3_file, message in result.errors)
+    assert relative(result.updated_files, library) == [mp3_files[0], mp3_files[2]]
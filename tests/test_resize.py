@@ -0,0 +1,52 @@
+"""
+Quality-equivalence tests for the reduced-resolution decode (see mp3cover.decode_near_size).
+
+The fast path decodes large covers with JPEG DCT scaling or Image.reduce before the final LANCZOS
+resample; its output has to look the same as resampling the full decode.
+"""
+import pytest
+from PIL import Image
+
+from mp3cover import decode_near_size, psnr, resize_cover_image
+from mp3cover.synthetic import make_test_image
+
+# Smallest PSNR (in dB) at which the fast and full resize count as the same cover
+MIN_PSNR = 40.0
+
+
+@pytest.mark.parametrize("source_size, size", [
+    ((3000, 3000), (240, 240)),
+    ((3000, 3000), (500, 500)),
+    ((4000, 2500), (240, 240)),
+    ((2000, 4000), (320, 240)),
+])
+def test_fast_jpeg_resize_matches_full_decode(tmp_path, source_size, size):
+    image_path = make_test_image(str(tmp_path / "cover.jpg"), source_size)
+
+    # The fast path has to actually decode less, or this test checks nothing
+    decoded = decode_near_size(image_path, size)
+    assert decoded.width < source_size[0]
+
+    fast = resize_cover_image(image_path, size, fast=True)
+    full = resize_cover_image(image_path, size, fast=False)
+    assert fast.size == full.size == size
+    assert psnr(full, fast) >= MIN_PSNR
+
+
+def test_fast_png_resize_matches_full_decode(tmp_path):
+    jpeg_path = make_test_image(str(tmp_path / "cover.jpg"), (2000, 2000))
+    png_path = str(tmp_path / "cover.png")
+    with Image.open(jpeg_path) as image:
+        image.save(png_path, compress_level=1)
+
+    # PNG has no DCT scaling, so this goes through Image.reduce
+    assert decode_near_size(png_path, (240, 240)).width < 2000
+
+    fast = resize_cover_image(png_path, (240, 240), fast=True)
+    full = resize_cover_image(png_path, (240, 240), fast=False)
+    assert psnr(full, fast) >= MIN_PSNR
+
+
+def test_small_cover_is_decoded_fully(tmp_path):
+    image_path = make_test_image(str(tmp_path / "cover.jpg"), (400, 400))
+    assert decode_near_size(image_path, (240, 240)).size == (400, 400)
@@ -0,0 +1,105 @@
+"""
+Tests for syncing the library to a player folder with the covers embedded on the way.
+"""
+import os
+import shutil
+
+from conftest import read_tree
+
+from mp3cover import SYNC_MANIFEST_NAME, embed_library, legacy_profile, sync_library
+
+PROFILE = legacy_profile(False)
+
+
+def files_in(root: str) -> list:
+    """
+    Lists every file under a folder, relative to it.
+    """
+    return sorted(os.path.relpath(os.path.join(directory, name), root) for directory, _, names in os.walk(root) for name in names)
+
+
+def sync(library: str, target: str, albums: dict, workers: int = 2):
+    """
+    Syncs the library to target with the Original profile.
+    """
+    return sync_library(library, target, albums, PROFILE, workers=workers)
+
+
+def test_sync_matches_in_place_embed(tmp_path, library, albums):
+    source_before = read_tree(library)
+    expected = str(tmp_path / "expected")
+    shutil.copytree(library, expected)
+    embed_library(expected, albums, profile=PROFILE)
+    target = str(tmp_path / "player")
+    os.makedirs(target)
+
+    result = sync(library, target, albums)
+    assert not result.errors
+    assert len(result.written) == sum(len(mp3_files) for mp3_files in albums.values())
+
+    # The library itself is left alone, and the player gets what an in-place embed writes
+    assert read_tree(library) == source_before
+    assert read_tree(target) == read_tree(expected)
+    assert not [path for path in files_in(target) if path.endswith(".part")]
+    assert SYNC_MANIFEST_NAME in files_in(target)
+
+
+def test_second_sync_skips_everything(tmp_path, library, albums):
+    target = str(tmp_path / "player")
+    os.makedirs(target)
+    sync(library, target, albums)
+    synced = read_tree(target)
+
+    result = sync(library, target, albums)
+    assert result.written == [] and result.copied == []
+    assert len(result.skipped) == len(synced)
+    assert result.bytes_read == 0 and result.bytes_written == 0
+    assert read_tree(target) == synced
+
+
+def test_touched_source_is_skipped_after_hashing(tmp_path, library, albums):
+    target = str(tmp_path / "player")
+    os.makedirs(target)
+    sync(library, target, albums)
+
+    mp3_file = albums["Album 0000"][0]
+    source_stat = os.stat(os.path.join(library, mp3_file))
+    os.utime(os.path.join(library, mp3_file), ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns + 10 ** 9))
+
+    result = sync(library, target, albums)
+    assert result.written == []
+    assert mp3_file in result.skipped
+    assert result.bytes_read == source_stat.st_size
+
+
+def test_changed_copy_is_written_again(tmp_path, library, albums):
+    target = str(tmp_path / "player")
+    os.makedirs(target)
+    sync(library, target, albums)
+    synced = read_tree(target)
+
+    mp3_file = albums["Album 0001"][0]
+    with open(os.path.join(target, mp3_file), 'ab') as file:
+        file.write(b"changed on the player")
+
+    result = sync(library, target, albums)
+    assert result.written == [mp3_file]
+    assert read_tree(target) == synced
+
+
+def test_leftover_part_file_is_replaced(tmp_path, library, albums):
+    target = str(tmp_path / "player")
+    os.makedirs(target)
+    sync(library, target, albums)
+    synced = read_tree(target)
+
+    # A sync that died mid-write leaves a .part file, never a half-written MP3
+    mp3_file = albums["Album 0000"][1]
+    os.remove(os.path.join(target, mp3_file))
+    with open(os.path.join(target, mp3_file + ".part"), 'wb') as file:
+        file.write(b"half a file")
+
+    result = sync(library, target, albums, workers=1)
+    assert result.written == [mp3_file]
+    assert read_tree(target) == synced
+    assert not [path for path in files_in(target) if path.endswith(".part")]
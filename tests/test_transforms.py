@@ -0,0 +1,103 @@
+"""
+Tests for the extra tag transforms applied in the same save as the cover.
+"""
+import os
+
+import pytest
+from conftest import fake_cover
+from mutagen.id3 import COMM, GEOB, ID3, PRIV, SYLT, TALB, TIT2, TPE1, TRCK, TXXX, USLT
+
+from mp3cover import TAG_TRANSFORMS, RunStats, cover_padding, embed_cover_data, embed_cover_into_file, id3v2_tag_size
+from mp3cover.synthetic import MPEG_FRAME
+
+AUDIO = MPEG_FRAME * 8
+COVER = fake_cover(5000)
+# Frames every transform leaves alone, and the cover the embed adds
+KEPT = {"TALB", "TIT2", "TPE1", "TRCK", "APIC"}
+
+
+@pytest.fixture
+def mp3_path(tmp_path) -> str:
+    """
+    An ID3v2.4-tagged MP3 file with a frame for every transform, and a large encapsulated object.
+    """
+    path = str(tmp_path / "track.mp3")
+    with open(path, 'wb') as file:
+        file.write(AUDIO)
+    tags = ID3()
+    tags.add(TALB(encoding=3, text="Album"))
+    tags.add(TIT2(encoding=3, text="Title"))
+    tags.add(TPE1(encoding=3, text="Artist"))
+    tags.add(TRCK(encoding=3, text="3/12"))
+    tags.add(PRIV(owner="www.example.com", data=b"\x01" * 40))
+    tags.add(GEOB(encoding=3, mime="application/octet-stream", filename="notes.bin", desc="notes", data=b"\x02" * 50000))
+    tags.add(COMM(encoding=3, lang="eng", desc="", text="A comment"))
+    tags.add(USLT(encoding=3, lang="eng", desc="", text="Some lyrics"))
+    tags.add(SYLT(encoding=3, lang="eng", format=2, type=1, desc="", text=[("Some", 0), ("lyrics", 1000)]))
+    tags.add(TXXX(encoding=3, desc="REPLAYGAIN_TRACK_GAIN", text="-6.5 dB"))
+    tags.save(path, v2_version=4)
+    return path
+
+
+def split_file(path: str) -> tuple:
+    """
+    Splits an MP3 file into its ID3v2 tag region and everything after it.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    tag_size = id3v2_tag_size(data[:10])
+    return data[:tag_size], data[tag_size:]
+
+
+def frame_ids(path: str) -> set:
+    """
+    Reads the IDs of the frames in a file's tags.
+    """
+    return {frame.FrameID for frame in ID3(path).values()}
+
+
+@pytest.mark.parametrize("name", TAG_TRANSFORMS)
+def test_transform_drops_only_its_frames(mp3_path, name):
+    before = frame_ids(mp3_path)
+    stats = RunStats()
+    embed_cover_into_file(mp3_path, COVER, stats=stats, transforms=(name,))
+
+    assert frame_ids(mp3_path) == (before | {"APIC"}) - set(TAG_TRANSFORMS[name])
+    # The cover, encodings and transform are all written in one save
+    assert stats.stages["tag_parse"].count == stats.stages["tag_save"].count == 1
+
+
+def test_all_transforms_in_one_save(mp3_path):
+    stats = RunStats()
+    embed_cover_into_file(mp3_path, COVER, stats=stats, transforms=tuple(TAG_TRANSFORMS))
+    assert frame_ids(mp3_path) == KEPT
+    assert stats.stages["tag_save"].count == 1
+    assert ID3(mp3_path)["TRCK"].text == ["3/12"]
+
+
+@pytest.mark.parametrize("id3_version", [3, 4])
+def test_id3_version_of_the_header(mp3_path, id3_version):
+    embed_cover_into_file(mp3_path, COVER, id3_version=id3_version, transforms=("drop_comments",))
+    tag, audio = split_file(mp3_path)
+    assert tag[:4] == b"ID3" + bytes([id3_version])
+    assert ID3(mp3_path).version[1] == id3_version
+    assert audio == AUDIO
+
+
+@pytest.mark.parametrize("transforms", [(), ("drop_private",), ("drop_objects",)], ids=["none", "small frame", "large frame"])
+def test_tag_sizes_match_the_file(mp3_path, transforms):
+    folder, mp3_file = os.path.split(mp3_path)
+    before = len(split_file(mp3_path)[0])
+
+    result = embed_cover_data(folder, "Album", [mp3_file], COVER, transforms=transforms)
+    tag, audio = split_file(mp3_path)
+    assert result.tag_sizes == {mp3_path: (before, len(tag))}
+    assert os.path.getsize(mp3_path) == len(tag) + len(AUDIO)
+    assert audio == AUDIO
+    if "drop_objects" in transforms:
+        # Dropping the 50 KB object shrinks the tag down to the usual reserve instead of leaving it all as padding
+        assert len(tag) < before
+        assert len(tag) - len(tag.rstrip(b"\0")) <= cover_padding(len(COVER))
+
+    totals = result.to_dict()
+    assert (totals["tag_bytes_before"], totals["tag_bytes_after"]) == (before, len(tag))
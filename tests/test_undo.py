@@ -0,0 +1,112 @@
+"""
+Tests for putting back the original tags of the files a run changed.
+"""
+import os
+
+import pytest
+from conftest import fake_cover, read_tree
+
+from mp3cover import UndoError, UndoLog, embed_cover_data, read_undo_log, restore_tags, take_snapshot
+
+# A 128-byte ID3v1 tag, for files that have one at the end
+ID3V1_TAG = b"TAG" + b"Title".ljust(30, b"\0") + b"Artist".ljust(30, b"\0") + b"Album".ljust(30, b"\0") + b"1999" + b"\0" * 30 + b"\x0c"
+
+
+def embed_all(library: str, albums: dict, log_path: str, **options) -> list:
+    """
+    Embeds a new cover into every album with an undo log, like a batch run.
+
+    Return list - EmbedResult of each album.
+    """
+    with UndoLog(log_path) as undo:
+        return [embed_cover_data(library, album_name, mp3_files, fake_cover(20000, seed=len(album_name)), workers=2, undo=undo, **options)
+                for album_name, mp3_files in albums.items()]
+
+
+@pytest.mark.parametrize("options", [{}, {"use_processes": True}, {"pipeline": True}], ids=["threads", "processes", "pipeline"])
+def test_undo_restores_original_files(tmp_path, library, albums, options):
+    with open(os.path.join(library, albums["Album 0000"][0]), 'ab') as file:
+        file.write(ID3V1_TAG)
+    original = read_tree(library)
+    log_path = str(tmp_path / "run.undo")
+
+    results = embed_all(library, albums, log_path, **options)
+    assert all(not result.errors for result in results)
+    assert read_tree(library) != original
+
+    snapshots = read_undo_log(log_path)
+    assert len(snapshots) == len(original)
+    result = restore_tags(snapshots, workers=2)
+    assert not result.errors
+    assert len(result.restored) == len(original)
+    assert read_tree(library) == original
+
+    # Restoring again finds every file already as it was
+    again = restore_tags(read_undo_log(log_path))
+    assert again.restored == []
+    assert len(again.unchanged) == len(original)
+
+
+def test_log_keeps_the_state_before_the_run(tmp_path, library, albums):
+    original = read_tree(library)
+    log_path = str(tmp_path / "run.undo")
+
+    # Embedding twice in one run logs each file once, with its tags from before the first write
+    with UndoLog(log_path) as undo:
+        for seed in (0, 1):
+            embed_cover_data(library, "Album 0000", albums["Album 0000"], fake_cover(20000, seed=seed), undo=undo)
+    restore_tags(read_undo_log(log_path))
+    assert read_tree(library) == original
+
+
+def test_changed_audio_is_left_alone(tmp_path, library, albums):
+    log_path = str(tmp_path / "run.undo")
+    embed_all(library, albums, log_path)
+
+    mp3_path = os.path.join(library, albums["Album 0001"][0])
+    with open(mp3_path, 'ab') as file:
+        file.write(b"\xff" * 417)
+    with open(mp3_path, 'rb') as file:
+        replaced = file.read()
+
+    result = restore_tags(read_undo_log(log_path))
+    assert [path for path, message in result.errors] == [os.path.abspath(mp3_path)]
+    assert len(result.restored) == sum(len(mp3_files) for mp3_files in albums.values()) - 1
+    with open(mp3_path, 'rb') as file:
+        assert file.read() == replaced
+
+
+def test_cut_off_record_is_ignored(tmp_path, library, albums):
+    original = read_tree(library)
+    log_path = str(tmp_path / "run.undo")
+    embed_all(library, albums, log_path)
+
+    # A crash while appending the last record leaves part of it behind
+    with open(log_path, 'rb') as file:
+        data = file.read()
+    snapshot = take_snapshot(os.path.join(library, albums["Album 0000"][0]))
+    with UndoLog(str(tmp_path / "one.undo")) as undo:
+        undo.append(snapshot)
+    with open(str(tmp_path / "one.undo"), 'rb') as file:
+        record = file.read()
+    with open(log_path, 'wb') as file:
+        file.write(data + record[:len(record) // 2])
+
+    snapshots = read_undo_log(log_path)
+    assert len(snapshots) == len(original)
+    restore_tags(snapshots)
+    assert read_tree(library) == original
+
+
+@pytest.mark.parametrize("options", [{}, {"use_processes": True}, {"pipeline": True}], ids=["threads", "processes", "pipeline"])
+def test_corrupt_tag_size_fails_only_that_file(tmp_path, library, albums, options):
+    mp3_path = os.path.join(library, albums["Album 0000"][0])
+    with open(mp3_path, 'r+b') as file:
+        file.seek(6)
+        file.write(b"\x80\x80\x80\x80")
+    with pytest.raises(UndoError):
+        take_snapshot(mp3_path)
+
+    results = embed_all(library, albums, str(tmp_path / "run.undo"), **options)
+    assert [mp3_file for result in results for mp3_file, message in result.errors] == [albums["Album 0000"][0]]
+    assert sum(len(result.updated_files) for result in results) == sum(len(mp3_files) for mp3_files in albums.values()) - 1
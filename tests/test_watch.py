@@ -0,0 +1,167 @@
+"""
+Tests for watching the library and embedding covers into files once they're finished.
+"""
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from mutagen.id3 import ID3
+
+from mp3cover import InotifyWatcher, PollingWatcher, embed_changed_files, id3v2_tag_size, legacy_profile, watch_folder
+from mp3cover.watch import changed_mp3_files
+
+PROFILE = legacy_profile(False)
+DEBOUNCE = 0.2
+POLL_INTERVAL = 0.5
+# Longest a test waits for the watcher to embed a file
+TIMEOUT = 15.0
+
+
+def audio_of(path: str) -> bytes:
+    """
+    Reads an MP3 file without its ID3v2 tag.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    return data[id3v2_tag_size(data[:10]):]
+
+
+def has_cover(path: str) -> bool:
+    """
+    Checks whether an MP3 file has an embedded cover.
+    """
+    return bool(ID3(path).getall("APIC"))
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def polling(request, tmp_path) -> bool:
+    """
+    Runs a test with each watcher, skipping inotify where it isn't available.
+    """
+    if request.param == "inotify":
+        try:
+            InotifyWatcher(str(tmp_path)).close()
+        except OSError:
+            pytest.skip("inotify isn't available")
+    return request.param == "polling"
+
+
+@contextmanager
+def watching(library: str, polling: bool):
+    """
+    Watches the library in a thread while the block runs.
+
+    Yield list - (directory, embedded file names) of each processed directory, appended as they're processed.
+    """
+    calls = []
+    cancel_event = threading.Event()
+
+    def on_results(directory: str, results: list, missing_covers: list) -> None:
+        calls.append((directory, sorted(os.path.basename(path) for result in results for path in result.updated_files)))
+
+    thread = threading.Thread(target=watch_folder, args=(library, PROFILE), daemon=True,
+                              kwargs={"debounce": DEBOUNCE, "poll_interval": POLL_INTERVAL, "polling": polling,
+                                      "on_results": on_results, "cancel_event": cancel_event})
+    thread.start()
+    # Let the watcher take its first snapshot before anything changes
+    time.sleep(0.3)
+    try:
+        yield calls
+    finally:
+        cancel_event.set()
+        thread.join()
+
+
+def wait_for(calls: list, names: set) -> None:
+    """
+    Waits until the watcher has embedded every named file.
+    """
+    deadline = time.monotonic() + TIMEOUT
+    while not names <= {name for directory, embedded in calls for name in embedded}:
+        assert time.monotonic() < deadline, f"not embedded: {names}"
+        time.sleep(0.05)
+
+
+def test_changed_mp3_files():
+    old = {"a.mp3": (10, 1), "b.mp3": (20, 1), "cover.jpg": (5, 1)}
+    assert changed_mp3_files(old, dict(old)) == []
+    assert changed_mp3_files(old, {**old, "b.mp3": (21, 1), "c.mp3": (30, 1)}) == ["b.mp3", "c.mp3"]
+    assert changed_mp3_files(old, {**old, "b.mp3": (20, 2)}, names=["a.mp3"]) == []
+
+    # A new cover means every MP3 file in the folder, even with names given
+    assert changed_mp3_files(old, {**old, "cover.jpg": (6, 1)}) == ["a.mp3", "b.mp3"]
+    assert changed_mp3_files(old, {**old, "cover.jpg": (6, 1)}, names=["cover.jpg"]) == ["a.mp3", "b.mp3"]
+
+
+def test_embed_changed_files_writes_only_those_files(library, albums):
+    mp3_files = albums["Album 0000"]
+    directory = os.path.join(library, os.path.dirname(mp3_files[0]))
+    names = [os.path.basename(mp3_files[0]), os.path.basename(mp3_files[2])]
+    before = {mp3_file: audio_of(os.path.join(library, mp3_file)) for mp3_file in mp3_files}
+    untouched = {mp3_file: os.stat(os.path.join(library, mp3_file)).st_mtime_ns for mp3_file in mp3_files[1::2]}
+
+    results, missing_covers = embed_changed_files(directory, names, PROFILE)
+    assert missing_covers == []
+    assert sorted(os.path.basename(path) for result in results for path in result.updated_files) == names
+    for mp3_file in mp3_files:
+        path = os.path.join(library, mp3_file)
+        assert audio_of(path) == before[mp3_file]
+        if mp3_file in untouched:
+            assert os.stat(path).st_mtime_ns == untouched[mp3_file]
+        else:
+            assert has_cover(path)
+
+
+def test_polling_waits_for_two_equal_polls(tmp_path):
+    watcher = PollingWatcher(str(tmp_path), interval=0.05)
+    path = str(tmp_path / "new.mp3")
+    with open(path, 'wb') as file:
+        file.write(b"first half")
+
+    assert watcher.wait(1.0) == set()
+    assert path in watcher.writing
+    with open(path, 'ab') as file:
+        file.write(b"second half")
+    assert watcher.wait(1.0) == set()
+    assert watcher.wait(1.0) == {path}
+    assert watcher.writing == set()
+    assert watcher.wait(1.0) == set()
+
+
+def test_file_written_in_parts_is_embedded_once_finished(library, albums, polling):
+    source = os.path.join(library, albums["Album 0000"][0])
+    directory = os.path.dirname(source)
+    target = os.path.join(directory, "05 Track 5.mp3")
+    with open(source, 'rb') as file:
+        data = file.read()
+    # inotify sees the file is still open, however long the copy stalls; polling only sees a stall within one interval
+    pause = DEBOUNCE * 5 if not polling else POLL_INTERVAL / 5
+
+    with watching(library, polling) as calls:
+        with open(target, 'wb') as file:
+            file.write(data[:len(data) // 2])
+            file.flush()
+            time.sleep(pause)
+            assert calls == []
+            file.write(data[len(data) // 2:])
+        wait_for(calls, {"05 Track 5.mp3"})
+
+    assert audio_of(target) == audio_of(source)
+    assert has_cover(target)
+
+
+def test_finished_files_are_processed_together_once(library, albums, polling):
+    directory = os.path.dirname(os.path.join(library, albums["Album 0001"][0]))
+    names = {"05 Track 5.mp3", "06 Track 6.mp3"}
+
+    with watching(library, polling) as calls:
+        for name, mp3_file in zip(sorted(names), albums["Album 0001"]):
+            shutil.copyfile(os.path.join(library, mp3_file), os.path.join(directory, name))
+        wait_for(calls, names)
+        # The watcher's own writes don't count as new changes
+        time.sleep(DEBOUNCE * 2 + POLL_INTERVAL * 2)
+
+    assert calls == [(directory, sorted(names))]
@@ -0,0 +1,66 @@
+"""
+Tests for writing covers into the existing tag region instead of rewriting the file.
+"""
+import os
+
+from conftest import fake_cover
+
+from mp3cover import WRITE_IN_PLACE, WRITE_REWRITTEN, WRITE_SKIPPED, embed_cover_data, embed_cover_into_file, id3v2_tag_size
+
+
+def split_file(path: str) -> tuple:
+    """
+    Splits an MP3 file into its ID3v2 tag region and everything after it.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    tag_size = id3v2_tag_size(data[:10])
+    return data[:tag_size], data[tag_size:]
+
+
+def test_recover_writes_in_place(library, albums):
+    mp3_path = os.path.join(library, albums["Album 0000"][0])
+    tag, audio = split_file(mp3_path)
+
+    # The first cover grows the tag and reserves room for another one
+    assert embed_cover_into_file(mp3_path, fake_cover(20000)) == WRITE_REWRITTEN
+    first_tag, first_audio = split_file(mp3_path)
+    assert first_audio == audio
+    assert len(first_tag) > len(tag) + 20000
+
+    # A cover up to twice as big replaces it inside the same region
+    assert embed_cover_into_file(mp3_path, fake_cover(38000, seed=1)) == WRITE_IN_PLACE
+    second_tag, second_audio = split_file(mp3_path)
+    assert second_audio == audio
+    assert len(second_tag) == len(first_tag)
+
+    # And back to a smaller one, which leaves more padding instead of shrinking the file
+    assert embed_cover_into_file(mp3_path, fake_cover(5000, seed=2)) == WRITE_IN_PLACE
+    third_tag, third_audio = split_file(mp3_path)
+    assert third_audio == audio
+    assert len(third_tag) == len(first_tag)
+
+
+def test_unchanged_cover_is_skipped(library, albums):
+    mp3_path = os.path.join(library, albums["Album 0000"][0])
+    cover_data = fake_cover(20000)
+    embed_cover_into_file(mp3_path, cover_data)
+    with open(mp3_path, 'rb') as file:
+        before = file.read()
+
+    assert embed_cover_into_file(mp3_path, cover_data, skip_unchanged=True) == WRITE_SKIPPED
+    with open(mp3_path, 'rb') as file:
+        assert file.read() == before
+
+
+def test_album_reembed_needs_no_rewrites(library, albums):
+    mp3_files = albums["Album 0001"]
+    first = embed_cover_data(library, "Album 0001", mp3_files, fake_cover(20000), workers=2)
+    assert not first.errors
+    sizes = {mp3_file: os.path.getsize(os.path.join(library, mp3_file)) for mp3_file in mp3_files}
+
+    second = embed_cover_data(library, "Album 0001", mp3_files, fake_cover(30000, seed=1), workers=2)
+    assert not second.errors
+    assert len(second.updated_files) == len(mp3_files)
+    assert second.rewritten_files == []
+    assert {mp3_file: os.path.getsize(os.path.join(library, mp3_file)) for mp3_file in mp3_files} == sizes